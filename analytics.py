@@ -0,0 +1,323 @@
+import argparse
+import json
+import os
+import sqlite3
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Column files of the store: name -> dtype. Times are local clock seconds since 1970 (naive, like created_at).
+ORDER_COLUMNS = {'id': np.int64, 'time': np.int64, 'total_price': np.int64, 'discount': np.int64,
+                 'final_price': np.int64}
+LINE_COLUMNS = {'order_id': np.int64, 'item': np.int32, 'price': np.int64, 'amount': np.int64}
+REPORTS = ('daily', 'hourly', 'top', 'discount', 'basket')
+
+
+class OrderColumns:
+    """Order history as columns: one array per field for orders and for order lines."""
+
+    def __init__(self, orders: Dict[str, np.ndarray], lines: Dict[str, np.ndarray], items: List[str]) -> None:
+        """
+        Initialization method for the OrderColumns class.
+        :param orders: ORDER_COLUMNS arrays, sorted by id
+        :param lines: LINE_COLUMNS arrays
+        :param items: drink name of every item code
+        :return: None
+        """
+        self.orders = orders
+        self.lines = lines
+        self.items = items
+        self._line_order: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        """
+        Number of orders
+        :return: order count
+        """
+        return len(self.orders['id'])
+
+    @property
+    def line_order(self) -> np.ndarray:
+        """
+        Position in the order arrays of every line's order
+        :return: int64 array as long as the line arrays
+        """
+        if self._line_order is None:
+            self._line_order = np.searchsorted(self.orders['id'], self.lines['order_id'])
+        return self._line_order
+
+    def between(self, since: Optional[str] = None, until: Optional[str] = None) -> 'OrderColumns':
+        """
+        Orders of a date range
+        :param since: first day, "YYYY-MM-DD", None for no limit
+        :param until: last day (included), None for no limit
+        :return: the orders and their lines in the range
+        """
+        times = self.orders['time']
+        keep = np.ones(len(times), dtype=bool)
+        if since is not None:
+            keep &= times >= day_seconds(since)
+        if until is not None:
+            keep &= times < day_seconds(until) + 86400
+        if keep.all():
+            return self
+        return OrderColumns({name: column[keep] for name, column in self.orders.items()},
+                            {name: column[keep[self.line_order]] for name, column in self.lines.items()},
+                            self.items)
+
+
+def day_seconds(day: str) -> int:
+    """
+    Local clock seconds of midnight of a day
+    :param day: "YYYY-MM-DD"
+    :return: seconds since 1970-01-01 00:00 of the same clock
+    """
+    return int(np.datetime64(day, 's').astype(np.int64))
+
+
+class ColumnStore:
+    """
+    Append-only column files of the order ledger, one raw binary file per column, read back
+    memory-mapped so reports over years of history don't need it all in RAM. sync() copies the
+    orders the ledger got since the last sync, in chunks.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Initialization method for the ColumnStore class.
+        :param path: directory of the column files, created if missing
+        :return: None
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.meta_path = os.path.join(path, 'meta.json')
+        self.meta = {'last_order_id': 0, 'orders': 0, 'lines': 0, 'items': []}
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, encoding='utf-8') as fp:
+                self.meta = json.load(fp)
+
+    def _file(self, table: str, name: str) -> str:
+        """
+        Path of one column file
+        :param table: 'orders' or 'lines'
+        :param name: column name
+        :return: file path
+        """
+        return os.path.join(self.path, f'{table}.{name}.bin')
+
+    def append(self, orders: Dict[str, np.ndarray], lines: Dict[str, np.ndarray], items: List[str]) -> None:
+        """
+        Append a chunk of orders and their lines. Order ids must be higher than any stored so far.
+        :param orders: ORDER_COLUMNS arrays
+        :param lines: LINE_COLUMNS arrays, item codes referring to items
+        :param items: drink names of every item code so far (extends the stored list)
+        :return: None
+        """
+        if len(orders['id']):
+            if orders['id'][0] <= self.meta['last_order_id']:
+                raise ValueError("Orders must be appended in id order.")
+        for table, columns, data in (('orders', ORDER_COLUMNS, orders), ('lines', LINE_COLUMNS, lines)):
+            valid = self.meta[table]
+            for name, dtype in columns.items():
+                path = self._file(table, name)
+                with open(path, 'ab') as fp:
+                    fp.truncate(valid * np.dtype(dtype).itemsize)  # drop a chunk a crash left half written
+                    np.ascontiguousarray(data[name], dtype=dtype).tofile(fp)
+        if len(orders['id']):
+            self.meta['last_order_id'] = int(orders['id'][-1])
+        self.meta['orders'] += len(orders['id'])
+        self.meta['lines'] += len(lines['order_id'])
+        self.meta['items'] = list(items)
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fp:
+            json.dump(self.meta, fp, ensure_ascii=False)
+        os.replace(tmp_path, self.meta_path)  # the meta file says how far the columns are valid
+
+    def sync(self, db_path: str, chunk_orders: int = 100000) -> int:
+        """
+        Copy the ledger's new orders into the column files
+        :param db_path: ledger database
+        :param chunk_orders: orders read per chunk
+        :return: orders copied
+        """
+        item_codes = {name: code for code, name in enumerate(self.meta['items'])}
+        copied = 0
+        conn = sqlite3.connect(db_path)
+        try:
+            while True:
+                last_id = self.meta['last_order_id']
+                rows = conn.execute(
+                    "select id, cast(strftime('%s', created_at) as integer), total_price, discount, final_price "
+                    "from orders where id > ? order by id limit ?", (last_id, chunk_orders)).fetchall()
+                if not rows:
+                    break
+                order_array = np.array(rows, dtype=np.int64)
+                orders = {name: order_array[:, k] for k, name in enumerate(ORDER_COLUMNS)}
+                line_rows = conn.execute(
+                    'select order_id, drink_name, price, amount from order_lines '
+                    'where order_id between ? and ? order by order_id, rowid', (rows[0][0], rows[-1][0])).fetchall()
+                order_ids, names, prices, amounts = zip(*line_rows) if line_rows else ((), (), (), ())
+                lines = {
+                    'order_id': np.array(order_ids, dtype=np.int64),
+                    'item': np.array([item_codes.setdefault(name, len(item_codes)) for name in names], dtype=np.int32),
+                    'price': np.array(prices, dtype=np.int64),
+                    'amount': np.array(amounts, dtype=np.int64),
+                }
+                self.append(orders, lines, list(item_codes))
+                copied += len(rows)
+        finally:
+            conn.close()
+        return copied
+
+    def load(self) -> OrderColumns:
+        """
+        Map the column files read-only, up to the length the meta file vouches for
+        :return: order history columns
+        """
+        columns = {}
+        for table, spec in (('orders', ORDER_COLUMNS), ('lines', LINE_COLUMNS)):
+            valid = self.meta[table]
+            columns[table] = {name: (np.memmap(self._file(table, name), dtype=dtype, mode='r', shape=(valid,))
+                                     if valid else np.empty(0, dtype=dtype))
+                              for name, dtype in spec.items()}
+        return OrderColumns(columns['orders'], columns['lines'], self.meta['items'])
+
+
+def daily_revenue(columns: OrderColumns) -> pd.DataFrame:
+    """
+    Orders, gross sales, discounts and revenue per day
+    :param columns: order history
+    :return: one row per day
+    """
+    day = columns.orders['time'] // 86400
+    first = int(day.min()) if len(day) else 0
+    day_index = day - first  # bincount over the day range instead of sorting for unique days
+    orders = np.bincount(day_index)
+    gross = np.bincount(day_index, weights=columns.orders['total_price']).astype(np.int64)
+    discount = np.bincount(day_index, weights=columns.orders['discount']).astype(np.int64)
+    revenue = np.bincount(day_index, weights=columns.orders['final_price']).astype(np.int64)
+    days = np.flatnonzero(orders)  # skip days without orders
+    frame = pd.DataFrame({'orders': orders[days], 'gross': gross[days], 'discount': discount[days],
+                          'revenue': revenue[days]},
+                         index=pd.Index(((days + first) * 86400).astype('datetime64[s]').astype('datetime64[D]'),
+                                        name='day'))
+    frame['avg_order'] = (frame['revenue'] / frame['orders'].where(frame['orders'] > 0)).round(0)
+    return frame
+
+
+def hourly_revenue(columns: OrderColumns) -> pd.DataFrame:
+    """
+    Orders and revenue per hour of the day over the whole range
+    :param columns: order history
+    :return: 24 rows
+    """
+    hours = (columns.orders['time'] // 3600) % 24
+    return pd.DataFrame({
+        'orders': np.bincount(hours, minlength=24),
+        'revenue': np.bincount(hours, weights=columns.orders['final_price'], minlength=24).astype(np.int64),
+    }, index=pd.RangeIndex(24, name='hour'))
+
+
+def top_sellers(columns: OrderColumns, top: int = 10) -> pd.DataFrame:
+    """
+    Best selling drinks by quantity
+    :param columns: order history
+    :param top: number of drinks
+    :return: one row per drink, best first
+    """
+    item = columns.lines['item']
+    amount = columns.lines['amount']
+    count = len(columns.items)
+    quantity = np.bincount(item, weights=amount, minlength=count).astype(np.int64)
+    sales = np.bincount(item, weights=amount * columns.lines['price'], minlength=count).astype(np.int64)
+    best = np.argsort(-quantity, kind='stable')[:top]
+    return pd.DataFrame({'quantity': quantity[best], 'sales': sales[best]},
+                        index=pd.Index([columns.items[k] for k in best], name='drink'))
+
+
+def discount_cost(columns: OrderColumns) -> pd.Series:
+    """
+    What discounts cost over the range
+    :param columns: order history
+    :return: totals and shares
+    """
+    orders = columns.orders
+    gross = int(orders['total_price'].sum())
+    discount = int(orders['discount'].sum())
+    discounted = int(np.count_nonzero(orders['discount']))
+    count = len(orders['id'])
+    return pd.Series({
+        'gross': gross,
+        'discount': discount,
+        'discount_share_%': round(100 * discount / gross, 2) if gross else 0.0,
+        'discounted_orders': discounted,
+        'discounted_orders_%': round(100 * discounted / count, 2) if count else 0.0,
+        'avg_discount_when_given': round(discount / discounted) if discounted else 0,
+    }, name='discount cost', dtype=object)
+
+
+def basket_size(columns: OrderColumns) -> pd.Series:
+    """
+    Items and distinct drinks per order
+    :param columns: order history
+    :return: summary statistics
+    """
+    count = len(columns)
+    if count == 0:
+        return pd.Series(dtype=object, name='basket size')
+    items = np.bincount(columns.line_order, weights=columns.lines['amount'], minlength=count)
+    drinks = np.bincount(columns.line_order, minlength=count)
+    return pd.Series({
+        'orders': count,
+        'items_mean': round(float(items.mean()), 2),
+        'items_median': float(np.median(items)),
+        'items_p90': float(np.percentile(items, 90)),
+        'items_max': int(items.max()),
+        'distinct_drinks_mean': round(float(drinks.mean()), 2),
+    }, name='basket size', dtype=object)
+
+
+def run_report(columns: OrderColumns, name: str, top: int = 10):
+    """
+    Compute one report by name
+    :param columns: order history
+    :param name: one of REPORTS
+    :param top: number of drinks for the top sellers report
+    :return: DataFrame or Series
+    """
+    if name == 'daily':
+        return daily_revenue(columns)
+    if name == 'hourly':
+        return hourly_revenue(columns)
+    if name == 'top':
+        return top_sellers(columns, top)
+    if name == 'discount':
+        return discount_cost(columns)
+    if name == 'basket':
+        return basket_size(columns)
+    raise ValueError(f"Unknown report: {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-of-day sales reports over the order ledger.")
+    parser.add_argument('reports', nargs='*', default=list(REPORTS),
+                        help=f"reports to print, all by default: {', '.join(REPORTS)}")
+    parser.add_argument('--db', default='queue_number.db', help='order ledger database')
+    parser.add_argument('--store', default=None, help='column store directory, <db>.columns by default')
+    parser.add_argument('--since', default=None, help='first day, YYYY-MM-DD')
+    parser.add_argument('--until', default=None, help='last day, YYYY-MM-DD')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+    for unknown in set(args.reports) - set(REPORTS):
+        parser.error(f"unknown report {unknown!r}, choose from {', '.join(REPORTS)}")
+
+    store = ColumnStore(args.store or args.db + '.columns')
+    if os.path.exists(args.db):
+        store.sync(args.db)
+    history = store.load().between(args.since, args.until)
+    with pd.option_context('display.width', 120, 'display.max_rows', 400):
+        for report in args.reports:
+            print(f"== {report} ==")
+            print(run_report(history, report, args.top).to_string())
+            print()
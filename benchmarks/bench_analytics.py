@@ -0,0 +1,159 @@
+"""End-of-day reports of analytics.py on a synthetic 10M-line order history.
+
+Writes the history into a analytics.ColumnStore in a temp directory (chunk by chunk), maps it
+back and times every report. A row-by-row Python loop over the first --sample lines is the
+baseline (its results are checked against the vectorized reports on the same orders), and a
+small SQLite ledger measures how fast ColumnStore.sync imports.
+
+    python -m benchmarks.bench_analytics --lines 10000000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from analytics import ColumnStore, OrderColumns, REPORTS, basket_size, daily_revenue, run_report, top_sellers
+from storage import SCHEMA
+
+ITEMS = [f"Drink {k:02d}" for k in range(40)]
+PRICES = np.array([1500 + 250 * (k % 16) for k in range(40)], dtype=np.int64)
+EPOCH = datetime(1970, 1, 1)
+START = int(np.datetime64('2025-10-18', 's').astype(np.int64))
+
+
+def synthetic_chunk(rng: np.random.Generator, first_id: int, orders: int, days: int):
+    """
+    Orders with 1-5 lines, popular drinks picked more often, 10% off from 10000 won
+    :param rng: random source
+    :param first_id: id of the first order
+    :param orders: orders in the chunk
+    :param days: days the whole history spans
+    :return: order columns and line columns
+    """
+    ids = np.arange(first_id, first_id + orders, dtype=np.int64)
+    times = START + np.sort(rng.integers(0, days * 86400, orders)) // 1
+    per_order = rng.integers(1, 6, orders)
+    line_order = np.repeat(np.arange(orders), per_order)
+    popularity = 1 / np.arange(1, len(ITEMS) + 1)
+    item = rng.choice(len(ITEMS), len(line_order), p=popularity / popularity.sum()).astype(np.int32)
+    amount = rng.integers(1, 4, len(line_order)).astype(np.int64)
+    price = PRICES[item]
+    total = np.bincount(line_order, weights=price * amount, minlength=orders).astype(np.int64)
+    discount = np.where(total >= 10000, (total * 1000 + 5000) // 10000, 0)
+    return ({'id': ids, 'time': times, 'total_price': total, 'discount': discount, 'final_price': total - discount},
+            {'order_id': ids[line_order], 'item': item, 'price': price, 'amount': amount})
+
+
+def python_reports(columns: OrderColumns, sample: int):
+    """
+    Baseline: daily revenue, top sellers and basket size with a loop over rows
+    :param columns: history
+    :param sample: lines to process
+    :return: (daily, quantities, items per order) and the number of orders covered
+    """
+    lines = columns.lines
+    order_ids = lines['order_id'][:sample].tolist()
+    items = lines['item'][:sample].tolist()
+    amounts = lines['amount'][:sample].tolist()
+    last_order = order_ids[-1]
+    orders = columns.orders
+    count = int(np.searchsorted(orders['id'], last_order)) + 1
+
+    daily = defaultdict(int)
+    for created, final in zip(orders['time'][:count].tolist(), orders['final_price'][:count].tolist()):
+        daily[(EPOCH + timedelta(seconds=created)).strftime('%Y-%m-%d')] += final
+    quantity = defaultdict(int)
+    basket = defaultdict(int)
+    for order_id, item, amount in zip(order_ids, items, amounts):
+        quantity[ITEMS[item]] += amount
+        basket[order_id] += amount
+    return (daily, quantity, basket), count
+
+
+def run(lines: int, days: int, chunk: int, sample: int) -> None:
+    """
+    Build the history, time the reports, check them against the baseline
+    :param lines: approximate order lines
+    :param days: days of history
+    :param chunk: orders per appended chunk
+    :param sample: lines of the Python baseline
+    :return: None
+    """
+    rng = np.random.default_rng(0)
+    orders = lines // 3  # three lines per order on average
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ColumnStore(os.path.join(tmp, 'history.columns'))
+        start = time.perf_counter()
+        for first in range(0, orders, chunk):
+            order_chunk, line_chunk = synthetic_chunk(rng, first + 1, min(chunk, orders - first), days)
+            store.append(order_chunk, line_chunk, ITEMS)
+        print(f"wrote {store.meta['orders']} orders / {store.meta['lines']} lines in "
+              f"{time.perf_counter() - start:.1f} s")
+
+        start = time.perf_counter()
+        history = ColumnStore(store.path).load()
+        print(f"{'map':<10} {(time.perf_counter() - start) * 1e3:8.1f} ms")
+        total = 0.0
+        for name in REPORTS:
+            start = time.perf_counter()
+            run_report(history, name)
+            seconds = time.perf_counter() - start
+            total += seconds
+            print(f"{name:<10} {seconds * 1e3:8.1f} ms")
+        print(f"{'all':<10} {total * 1e3:8.1f} ms  ({store.meta['lines'] / total / 1e6:.0f} M lines/s)")
+
+        # baseline on a sample cut at an order boundary, and the same orders through the vectorized reports
+        line_orders = history.lines['order_id']
+        sample = int(np.searchsorted(line_orders, line_orders[min(sample, len(line_orders) - 1)]))
+        start = time.perf_counter()
+        (daily, quantity, basket), covered = python_reports(history, sample)
+        loop_s = time.perf_counter() - start
+        print(f"python loop over {sample} lines: {loop_s:.2f} s "
+              f"(~{loop_s * store.meta['lines'] / sample:.0f} s for the whole history)")
+        part = OrderColumns({name: column[:covered] for name, column in history.orders.items()},
+                            {name: column[:sample] for name, column in history.lines.items()}, history.items)
+        vec_daily = daily_revenue(part)['revenue']
+        vec_top = top_sellers(part, len(ITEMS))['quantity']
+        if ({str(day.date()): int(v) for day, v in vec_daily.items()} != dict(daily)
+                or vec_top.to_dict() != {k: v for k, v in quantity.items()}
+                or basket_size(part)['items_max'] != max(basket.values())):
+            raise SystemExit("Vectorized reports disagree with the loop.")
+
+        # import speed from a ledger database
+        db_path = os.path.join(tmp, 'ledger.db')
+        conn = sqlite3.connect(db_path)
+        for statement in SCHEMA:
+            conn.execute(statement)
+        order_chunk, line_chunk = synthetic_chunk(rng, 1, 100000, 30)
+        stamps = order_chunk['time'].astype('datetime64[s]').astype(str)
+        conn.executemany('insert into orders values (?, 0, ?, ?, ?, ?)',
+                         zip(order_chunk['id'].tolist(), order_chunk['total_price'].tolist(),
+                             order_chunk['discount'].tolist(), order_chunk['final_price'].tolist(),
+                             (stamp.replace('T', ' ') for stamp in stamps)))
+        conn.executemany('insert into order_lines values (?, ?, ?, ?)',
+                         zip(line_chunk['order_id'].tolist(), (ITEMS[k] for k in line_chunk['item'].tolist()),
+                             line_chunk['price'].tolist(), line_chunk['amount'].tolist()))
+        conn.commit()
+        conn.close()
+        start = time.perf_counter()
+        ledger_store = ColumnStore(os.path.join(tmp, 'ledger.db.columns'))
+        ledger_store.sync(db_path)
+        seconds = time.perf_counter() - start
+        print(f"sync from SQLite: {ledger_store.meta['lines'] / seconds / 1e6:.2f} M lines/s")
+        if ledger_store.meta['lines'] != len(line_chunk['order_id']):
+            raise SystemExit("Sync lost lines.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=10000000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--chunk', type=int, default=1000000, help='orders per appended chunk')
+    parser.add_argument('--sample', type=int, default=1000000, help='lines of the Python baseline')
+    args = parser.parse_args()
+    run(args.lines, args.days, args.chunk, args.sample)
@@ -0,0 +1,131 @@
+"""Dense per-menu-slot amounts list versus the sparse cart.Cart, at several menu sizes.
+
+For every --sizes menu size, a typical order (--lines distinct lines, a few clicks each) is timed
+from the empty cart to the receipt lines:
+  new cart     allocate the cart for a new customer
+  lines        list the ordered lines, as the receipt and the cart display do on every redraw
+  whole order  new cart, add the order's items one by one, list the lines
+The dense side replays the old OrderProcessor ([0] * menu length, scanned with enumerate). Then
+a random mix of adds and removes with modifiers is checked: the cart's running subtotal and
+quantities against a recount of its lines, and the pricing session against the cart.
+
+    python -m benchmarks.bench_cart --sizes 10,1000,10000 --lines 3 --orders 2000
+"""
+import argparse
+import random
+import time
+from typing import Callable, List
+
+from cart import Cart, Modifiers, line_key
+from order_core import Menu, OrderProcessor
+
+
+class DenseCart:
+    """The cart as OrderProcessor kept it before: a quantity per menu slot and a running total."""
+
+    def __init__(self, menu: Menu) -> None:
+        self.menu = menu
+        self.amounts = [0] * menu.get_menu_length()
+        self.total_price = 0
+
+    def add(self, idx: int) -> None:
+        self.total_price += self.menu.get_price(idx)
+        self.amounts[idx] += 1
+
+    def lines(self) -> list:
+        menu = self.menu
+        return [(menu.get_drink_name(i), menu.get_price(i), amount) for i, amount in enumerate(self.amounts) if amount > 0]
+
+
+def per_order_us(func: Callable[[], None], orders: int) -> float:
+    """Best of three runs of orders calls, in us per call"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(orders):
+            func()
+        best = min(best, (time.perf_counter() - start) / orders)
+    return best * 1e6
+
+
+def run(size: int, lines: int, orders: int) -> None:
+    menu = Menu([f"Drink {k:05d}" for k in range(size)], [1500 + 100 * (k % 30) for k in range(size)])
+    rng = random.Random(size)
+    clicks: List[int] = [slot for slot in rng.sample(range(size), min(lines, size)) for _ in range(2)]
+
+    def dense_new() -> None:
+        DenseCart(menu)
+
+    def sparse_new() -> None:
+        Cart(menu)
+
+    def dense_order() -> None:
+        cart = DenseCart(menu)
+        for idx in clicks:
+            cart.add(idx)
+        cart.lines()
+
+    def sparse_order() -> None:
+        cart = Cart(menu)
+        for idx in clicks:
+            cart.add(idx)
+        [(line.name(menu), line.unit_price, line.quantity) for line in cart]
+
+    dense_filled, sparse_filled = DenseCart(menu), Cart(menu)
+    for idx in clicks:
+        dense_filled.add(idx)
+        sparse_filled.add(idx)
+
+    results = [
+        ('new cart', per_order_us(dense_new, orders), per_order_us(sparse_new, orders)),
+        ('lines', per_order_us(dense_filled.lines, orders),
+         per_order_us(lambda: [(line.name(menu), line.unit_price, line.quantity) for line in sparse_filled], orders)),
+        ('whole order', per_order_us(dense_order, orders), per_order_us(sparse_order, orders)),
+    ]
+    print(f"{size} menu items, {len(set(clicks))} lines, {len(clicks)} clicks per order")
+    for name, dense, sparse in results:
+        print(f"  {name:<12} dense {dense:10.2f} us   sparse {sparse:8.2f} us   ({dense / sparse:6.1f}x)")
+
+
+def check(size: int, changes: int) -> None:
+    """
+    Random adds and removes with modifiers through OrderProcessor; raises SystemExit on a mismatch
+    :param size: menu size
+    :param changes: cart changes
+    :return: None
+    """
+    menu = Menu([f"Drink {k:05d}" for k in range(size)], [1500 + 100 * (k % 30) for k in range(size)])
+    processor = OrderProcessor(menu)
+    cart = processor.cart
+    rng = random.Random(3)
+    choices = [Modifiers(), Modifiers('large'), Modifiers(shots=1), Modifiers('large', 2)]
+    slots = rng.sample(range(size), min(8, size))
+    for _ in range(changes):
+        idx, modifiers = rng.choice(slots), rng.choice(choices)
+        line = cart.lines.get(line_key(idx, modifiers))
+        if line is not None and rng.random() < 0.4:
+            processor.remove_order(idx, modifiers, rng.randint(1, line.quantity))
+        else:
+            processor.process_order(idx, modifiers, rng.randint(1, 3))
+
+        amounts = {}
+        for line in cart:
+            amounts[line.slot] = amounts.get(line.slot, 0) + line.quantity
+        subtotal = sum(line.unit_price * line.quantity for line in cart)
+        if (cart.subtotal, cart.amounts) != (subtotal, amounts) or cart.quantity != sum(amounts.values()):
+            raise SystemExit(f"Running totals drifted: {cart.subtotal} vs {subtotal}.")
+        if processor.get_price_result().subtotal != subtotal or processor.total_price != subtotal:
+            raise SystemExit("Pricing session disagrees with the cart.")
+    print(f"{changes} random adds/removes with modifiers: running totals and pricing match a recount")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10,1000,10000', help='comma-separated menu sizes')
+    parser.add_argument('--lines', type=int, default=3, help='distinct lines per order')
+    parser.add_argument('--orders', type=int, default=2000, help='orders timed per measurement')
+    parser.add_argument('--changes', type=int, default=20000, help='cart changes in the consistency check')
+    args = parser.parse_args()
+    for menu_size in (int(n) for n in args.sizes.split(',')):
+        run(menu_size, args.lines, args.orders)
+    check(1000, args.changes)
@@ -0,0 +1,120 @@
+"""Per-click latency of the order summary: full rebuild versus cart_view.CartViewModel.
+
+Simulates clicks on random items of a large menu and updates an in-memory stand-in for
+the tk.Text widget, so it runs without a display. The full rebuild replays the old
+update_order_display (scan the whole menu, rebuild the string, replace the widget text).
+
+    python -m benchmarks.bench_cart_view --items 500 --clicks 10000
+"""
+import argparse
+import random
+import time
+from typing import List
+
+from cart_view import CartViewModel
+from order_core import Menu, OrderProcessor
+
+
+class TextBuffer:
+    """Line list understanding the "row.col", "row.end" and "end" indexes used on tk.Text."""
+
+    def __init__(self) -> None:
+        self.lines: List[str] = [""]
+
+    def _pos(self, index: str):
+        if index == "end":
+            return len(self.lines) - 1, len(self.lines[-1])
+        row, col = index.split(".")
+        row = min(int(row) - 1, len(self.lines) - 1)
+        return row, len(self.lines[row]) if col == "end" else int(col)
+
+    def get(self) -> str:
+        return "\n".join(self.lines)
+
+    def delete(self, start: str, end: str) -> None:
+        (r1, c1), (r2, c2) = self._pos(start), self._pos(end)
+        self.lines[r1:r2 + 1] = [self.lines[r1][:c1] + self.lines[r2][c2:]]
+
+    def insert(self, index: str, chars: str) -> None:
+        row, col = self._pos(index)
+        line = self.lines[row]
+        parts = (line[:col] + chars + line[col:]).split("\n")
+        self.lines[row:row + 1] = parts
+
+
+def full_rebuild(order_processor: OrderProcessor, text: TextBuffer) -> None:
+    """
+    The pre-view-model update_order_display, minus the Tk state toggling
+    :param order_processor: cart to show
+    :param text: widget stand-in
+    :return: None
+    """
+    menu = order_processor.menu
+    text.delete("1.0", "end")
+    order_info = "Current Order:\n\n"
+    amounts = order_processor.amounts
+    for i in range(menu.get_menu_length()):
+        if amounts.get(i, 0) > 0:
+            drink_name = menu.get_drink_name(i)
+            drink_price = menu.get_price(i)
+            subtotal = drink_price * amounts[i]
+            order_info += f"{drink_name}: {amounts[i]} × {drink_price} = {subtotal} won\n"
+    order_info += CartViewModel(order_processor).render_totals()
+    text.insert("end", order_info)
+
+
+def percentiles(samples: List[float]) -> str:
+    """
+    Format p50/p90/p99/max of latencies
+    :param samples: latencies in seconds
+    :return: formatted line in microseconds
+    """
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1e6
+    return f"p50 {pick(0.50):8.1f} us  p90 {pick(0.90):8.1f} us  p99 {pick(0.99):8.1f} us  max {ordered[-1] * 1e6:8.1f} us"
+
+
+def run(items: int, clicks: int, cart_lines: int) -> None:
+    """
+    Replay the same click sequence against both strategies
+    :param items: menu size
+    :param clicks: number of clicks
+    :param cart_lines: distinct items the customer picks from
+    :return: None
+    """
+    menu = Menu([f"Drink {k:04d}" for k in range(items)], [1000 + k * 10 for k in range(items)])
+    rng = random.Random(0)
+    picks = rng.sample(range(items), cart_lines)
+    sequence = [rng.choice(picks) for _ in range(clicks)]
+
+    legacy_order, legacy_text, legacy_times = OrderProcessor(menu), TextBuffer(), []
+    for idx in sequence:
+        start = time.perf_counter()
+        legacy_order.process_order(idx)
+        full_rebuild(legacy_order, legacy_text)
+        legacy_times.append(time.perf_counter() - start)
+
+    order = OrderProcessor(menu)
+    view, text, view_times = CartViewModel(order), TextBuffer(), []
+    view.flush(text)
+    for idx in sequence:
+        start = time.perf_counter()
+        view.mark_dirty(order.process_order(idx))
+        view.flush(text)
+        view_times.append(time.perf_counter() - start)
+
+    if sorted(text.lines) != sorted(legacy_text.lines):  # the rebuild lists lines in menu order, the view as added
+        raise SystemExit("Incremental view diverged from the full rebuild.")
+
+    print(f"{items} menu items, {clicks} clicks over {cart_lines} distinct lines")
+    print(f"{'full rebuild:':<14} {percentiles(legacy_times)}")
+    print(f"{'incremental:':<14} {percentiles(view_times)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--clicks', type=int, default=10000)
+    parser.add_argument('--cart-lines', type=int, default=20)
+    args = parser.parse_args()
+    run(args.items, args.clicks, args.cart_lines)
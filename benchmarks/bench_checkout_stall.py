@@ -0,0 +1,161 @@
+"""Event loop stalls of the kiosk checkout, synchronous on the UI thread vs checkout.CheckoutPipeline.
+
+Runs headlessly: HeadlessLoop stands in for the Tk event loop (after/after_cancel/mainloop), and
+stall_monitor.StallMonitor measures how late its 10 ms ticks run. A simulated customer adds a few
+drinks and completes the order, over and over. The ticket counter sits on a "slow disk": every
+database reservation sleeps --disk-ms first.
+
+    python -m benchmarks.bench_checkout_stall --orders 40 --disk-ms 80
+"""
+import argparse
+import heapq
+import itertools
+import os
+import queue
+import tempfile
+import time
+from typing import Callable, List, Tuple
+
+from checkout import CheckoutPipeline
+from order_core import Menu, OrderProcessor
+from ledger import OrderLedger
+from stall_monitor import StallMonitor
+from ticket import TicketAllocator
+
+DRINKS = ["Ice Americano", "Cafe Latte", "Watermelon Juice", "Ice tea"]
+PRICES = [2000, 3000, 4900, 3500]
+
+
+class HeadlessLoop:
+    """Single-threaded timer loop with Tk's after() interface; after() may be called from any thread."""
+
+    def __init__(self) -> None:
+        self._timers: List[Tuple[float, int, Callable[[], None]]] = []
+        self._incoming: "queue.Queue" = queue.Queue()
+        self._cancelled = set()
+        self._ids = itertools.count()
+        self._running = False
+
+    def after(self, ms: int, callback: Callable[[], None]) -> int:
+        after_id = next(self._ids)
+        self._incoming.put((time.perf_counter() + ms / 1000, after_id, callback))
+        return after_id
+
+    def after_cancel(self, after_id: int) -> None:
+        self._cancelled.add(after_id)
+
+    def quit(self) -> None:
+        self._running = False
+
+    def mainloop(self) -> None:
+        self._running = True
+        while self._running:
+            timeout = max(0.0, self._timers[0][0] - time.perf_counter()) if self._timers else 0.05
+            try:
+                heapq.heappush(self._timers, self._incoming.get(timeout=timeout))
+                while True:
+                    heapq.heappush(self._timers, self._incoming.get_nowait())
+            except queue.Empty:
+                pass
+            while self._timers and self._timers[0][0] <= time.perf_counter():
+                _, after_id, callback = heapq.heappop(self._timers)
+                if after_id in self._cancelled:
+                    self._cancelled.discard(after_id)
+                    continue
+                callback()
+
+
+class SlowDiskAllocator(TicketAllocator):
+    """Ticket allocator whose every database reservation waits like a slow fsync."""
+
+    def __init__(self, db_path: str, delay: float) -> None:
+        super().__init__(db_path)
+        self.delay = delay
+
+    def _reserve(self, count: int) -> int:
+        time.sleep(self.delay)
+        return super()._reserve(count)
+
+
+class Customer:
+    """Clicks drinks every click_ms and completes the order after items_per_order clicks."""
+
+    def __init__(self, loop: HeadlessLoop, menu: Menu, allocator: TicketAllocator, ledger: OrderLedger,
+                 orders: int, pipelined: bool, click_ms: int = 30, items_per_order: int = 3) -> None:
+        self.loop = loop
+        self.menu = menu
+        self.allocator = allocator
+        self.ledger = ledger
+        self.orders = orders
+        self.pipelined = pipelined
+        self.click_ms = click_ms
+        self.items_per_order = items_per_order
+        self.pipeline = CheckoutPipeline(lambda fn: loop.after(0, fn), ledger)
+        self.processor = OrderProcessor(menu, allocator)
+        self.pending = False
+        self.clicks = 0
+        self.completed = 0
+        self.ignored_clicks = 0
+
+    def start(self) -> None:
+        self.loop.after(self.click_ms, self.click)
+
+    def click(self) -> None:
+        self.clicks += 1
+        if self.clicks % (self.items_per_order + 1):
+            if self.pending:
+                self.ignored_clicks += 1  # KioskGUI.add_to_order ignores clicks during a checkout
+            else:
+                self.processor.process_order(self.clicks % self.menu.get_menu_length())
+        elif not self.pending and self.processor.total_price > 0:
+            if self.pipelined:
+                self.pending = True
+                self.pipeline.submit(self.processor, self.done)
+            else:
+                order = self.processor.checkout(self.ledger)
+                self.done(order, OrderProcessor.receipt_renderer.render_text(order))
+        self.loop.after(self.click_ms, self.click)
+
+    def done(self, order, receipt_text: str) -> None:
+        self.pending = False
+        self.completed += 1
+        self.processor = OrderProcessor(self.menu, self.allocator)
+        if self.completed >= self.orders:
+            self.loop.quit()
+
+
+def run_mode(pipelined: bool, orders: int, disk_ms: int) -> None:
+    """
+    Measure one mode with its own database
+    :param pipelined: check out on the pipeline instead of the loop thread
+    :param orders: orders to complete
+    :param disk_ms: simulated latency of each ticket reservation
+    :return: None
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'stall.db')
+        ledger = OrderLedger(db_path)
+        loop = HeadlessLoop()
+        monitor = StallMonitor(loop)
+        customer = Customer(loop, Menu(DRINKS, PRICES), SlowDiskAllocator(db_path, disk_ms / 1000), ledger,
+                            orders, pipelined)
+        monitor.start()
+        customer.start()
+        start = time.perf_counter()
+        loop.mainloop()
+        elapsed = time.perf_counter() - start
+        customer.pipeline.close()
+        ledger.close()
+    name = 'pipeline' if pipelined else 'synchronous'
+    print(f"{name:<12} {customer.completed} orders in {elapsed:5.2f} s, "
+          f"stall p50 {monitor.percentile(50) * 1e3:6.1f} ms  p99 {monitor.percentile(99) * 1e3:6.1f} ms  "
+          f"max {monitor.max_stall * 1e3:6.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=40)
+    parser.add_argument('--disk-ms', type=int, default=80, help='latency of each ticket reservation')
+    args = parser.parse_args()
+    run_mode(False, args.orders, args.disk_ms)
+    run_mode(True, args.orders, args.disk_ms)
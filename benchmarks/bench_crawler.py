@@ -0,0 +1,126 @@
+"""Crawl throughput and resume of crawler.PageCrawler against locally served fixture pages.
+
+A local server renders Hollys-style store list pages (with a configurable delay per page).
+The crawl runs once sequentially and once concurrently, then once more with a page that
+fails on the first attempt to show that a second run resumes from the checkpoint. The resumed
+file must keep numbering its rows 0, 1, 2, ... in the pandas index column holly.csv always had,
+and a page without a store table must parse to no rows.
+
+    python -m benchmarks.bench_crawler --pages 48 --delay 0.05 --concurrency 8
+"""
+import argparse
+import csv
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from crawler import crawl_hollys, parse_hollys_page
+
+ROWS_PER_PAGE = 10
+
+
+def fixture_page(page: int) -> bytes:
+    """
+    Render one store list page in the Hollys table layout
+    :param page: page number
+    :return: HTML bytes
+    """
+    rows = "".join(
+        f"<tr><td>{page}</td><td>매장 {page}-{k}</td><td>서울</td><td>인천 남구 {page}-{k}</td>"
+        f"<td>영업중</td><td>032-000-{page:02d}{k:02d}</td></tr>"
+        for k in range(ROWS_PER_PAGE)
+    )
+    return f"<html><body><table><tbody>{rows}</tbody></table></body></html>".encode('utf-8')
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves fixture pages; pages listed in fail_once answer 404 the first time they are asked for."""
+    protocol_version = 'HTTP/1.1'
+    wbufsize = -1
+    delay = 0.05
+    fail_once = set()
+
+    def do_GET(self) -> None:
+        page = int(parse_qs(urlparse(self.path).query)['pageNo'][0])
+        time.sleep(self.delay)
+        if page in FixtureHandler.fail_once:
+            FixtureHandler.fail_once.discard(page)
+            body, status = b'not found', 404
+        else:
+            body, status = fixture_page(page), 200
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def count_rows(path: str) -> int:
+    """
+    Count data rows in the output CSV
+    :param path: CSV path
+    :return: number of rows without the header
+    """
+    with open(path, newline='', encoding='cp949') as fp:
+        return sum(1 for _ in csv.reader(fp)) - 1
+
+
+def run(pages: int, delay: float, concurrency: int) -> None:
+    """
+    Run the sequential, concurrent and resume scenarios
+    :param pages: number of pages
+    :param delay: server delay per page in seconds
+    :param concurrency: concurrent fetches for the fast runs
+    :return: None
+    """
+    FixtureHandler.delay = delay
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/store/korea/korStore2.do?pageNo={{page}}&sido=&gugun=&store="
+    page_numbers = range(1, pages + 1)
+    expected = pages * ROWS_PER_PAGE
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'holly.csv')
+        for label, workers in (('sequential', 1), ('concurrent', concurrency)):
+            start = time.perf_counter()
+            rows = crawl_hollys(output, concurrency=workers, rate_limit=None, url_template=url, pages=page_numbers)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<11} x{workers:<3} {elapsed:6.2f} s  {rows} rows  ({count_rows(output)} in file)")
+
+        FixtureHandler.fail_once = {pages // 2}
+        os.remove(output)
+        try:
+            crawl_hollys(output, concurrency=concurrency, rate_limit=None, url_template=url, pages=page_numbers)
+        except Exception as err:
+            print(f"{'first run':<16} failed: {err.__class__.__name__} ({count_rows(output)} rows kept)")
+        rows = crawl_hollys(output, concurrency=concurrency, rate_limit=None, url_template=url, pages=page_numbers)
+        total = count_rows(output)
+        print(f"{'resumed run':<16} wrote {rows} more rows, {total} of {expected} in file")
+        if total < expected:
+            raise SystemExit("Resume lost pages.")
+        with open(output, newline='', encoding='cp949') as fp:
+            header, *rows = list(csv.reader(fp))
+        if header[0] != '' or [row[0] for row in rows] != [str(k) for k in range(total)]:
+            raise SystemExit("The index column is missing or not numbered 0..n-1 after the resume.")
+        print(f"{'index column':<16} rows numbered 0..{total - 1}")
+
+    if parse_hollys_page("<html><body><p>점검 중입니다</p></body></html>".encode('utf-8')) != []:
+        raise SystemExit("A page without a store table gave rows.")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=48)
+    parser.add_argument('--delay', type=float, default=0.05)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+    run(args.pages, args.delay, args.concurrency)
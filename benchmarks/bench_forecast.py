@@ -0,0 +1,121 @@
+"""Parse time and peak memory of forecast.parse_forecast against the old BeautifulSoup code.
+
+Writes a recorded-size mid-term feed (every city repeated to reach --cities locations) into a
+temp directory, then parses it both ways and checks they find the same first forecast per city.
+
+    python -m benchmarks.bench_forecast --cities 2000 --data 13
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import warnings
+from typing import Callable, List, Tuple
+
+from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+
+from forecast import parse_forecast
+
+CITIES = [('서울ㆍ인천ㆍ경기도', '서울'), ('서울ㆍ인천ㆍ경기도', '인천'), ('강원도영서', '춘천'),
+          ('강원도영동', '강릉'), ('충청북도', '청주'), ('대전ㆍ세종ㆍ충청남도', '대전')]
+SKY = ['맑음', '구름많음', '흐림', '흐리고 비', '구름많고 비']
+
+
+def recorded_feed(cities: int, data_per_city: int) -> str:
+    """
+    Build a feed in the layout of mid-term-rss3.jsp
+    :param cities: number of <location> elements
+    :param data_per_city: <data> children per location
+    :return: XML text
+    """
+    parts = ['<?xml version="1.0" encoding="utf-8" ?>\n<rss version="2.0"><channel><title>기상청 육상 중기예보</title>'
+             '<item><description><header><title>중기예보</title><tm>202610180600</tm>'
+             '<wf><![CDATA[기압골의 영향으로 21일은 비가 오겠습니다.]]></wf></header><body>']
+    for n in range(cities):
+        province, city = CITIES[n % len(CITIES)]
+        parts.append(f'<location wl_ver="3"><province>{province}</province><city>{city}{n}</city>')
+        for d in range(data_per_city):
+            parts.append(f'<data><mode>{"A02" if d < 8 else "A01"}</mode><tmEf>2026-10-{21 + d // 2} '
+                         f'{"00" if d % 2 == 0 else "12"}:00</tmEf><wf>{SKY[(n + d) % len(SKY)]}</wf>'
+                         f'<tmn>{n % 15}</tmn><tmx>{n % 15 + 9}</tmx><reliability></reliability>'
+                         f'<rnSt>{(n * 7 + d) % 100}</rnSt></data>')
+        parts.append('</location>')
+    parts.append('</body></description></item></channel></rss>')
+    return ''.join(parts)
+
+
+def old_bs4(path: str) -> List[Tuple[str, str]]:
+    """
+    The datacollection02.py code this replaces: whole DOM, then datas[i*13]
+    :param path: feed file
+    :return: (city, weather) of the first data node per city
+    """
+    with open(path, 'rb') as fp, warnings.catch_warnings():
+        warnings.simplefilter('ignore', XMLParsedAsHTMLWarning)
+        soup = BeautifulSoup(fp.read(), 'html.parser')
+    cities = soup.find_all("city")
+    datas = soup.find_all("data")
+    # past the end the old loop raised IndexError; report those cities as missing instead
+    return [(cities[i].text, datas[i * 13].find("wf").text if i * 13 < len(datas) else None)
+            for i in range(len(cities))]
+
+
+def new_iterparse(path: str) -> List[Tuple[str, str]]:
+    """
+    forecast.parse_forecast over the same file
+    :param path: feed file
+    :return: (city, weather) of the first data node per city
+    """
+    return [(city.city, city.forecasts[0].weather) for city in parse_forecast(path)]
+
+
+def measure(fn: Callable[[str], list], path: str) -> Tuple[float, int, list]:
+    """
+    Time one parser, then run it again under tracemalloc (which slows it down) for the peak
+    :param fn: parser
+    :param path: feed file
+    :return: seconds, peak bytes, result
+    """
+    start = time.perf_counter()
+    result = fn(path)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    fn(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, result
+
+
+def run(cities: int, data_per_city: int) -> None:
+    """
+    Time both parsers on one synthetic feed
+    :param cities: number of locations
+    :param data_per_city: data nodes per location
+    :return: None
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'mid-term-rss3.xml')
+        with open(path, 'w', encoding='utf-8') as fp:
+            fp.write(recorded_feed(cities, data_per_city))
+        size = os.path.getsize(path)
+
+        new_s, new_peak, new = measure(new_iterparse, path)
+        old_s, old_peak, old = measure(old_bs4, path)
+
+    print(f"{cities} cities x {data_per_city} data nodes, {size / 1e6:.1f} MB feed")
+    print(f"{'beautifulsoup':<14} {old_s:8.2f} s  peak {old_peak / 1e6:8.1f} MB")
+    print(f"{'iterparse':<14} {new_s:8.2f} s  peak {new_peak / 1e6:8.1f} MB  ({old_s / new_s:.1f}x faster)")
+    if data_per_city == 13 and old != new:
+        raise SystemExit("Parsers disagree.")
+    if data_per_city != 13:
+        wrong = sum(a != b for a, b in zip(old, new))
+        print(f"datas[i*13] misreads {wrong} of {len(new)} cities when a city has {data_per_city} data nodes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cities', type=int, default=2000)
+    parser.add_argument('--data', type=int, default=13, help='data nodes per city (the old code assumes 13)')
+    args = parser.parse_args()
+    run(args.cities, args.data)
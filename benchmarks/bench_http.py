@@ -0,0 +1,95 @@
+"""Fresh connections and threads per fetch versus the shared http_client session and pool.
+
+Runs a local keep-alive HTTP/1.1 stand-in server and fetches from it in two ways:
+  old    - urllib.request.urlopen in a new thread per request (weather refresh / scraping scripts)
+  shared - http_client.fetch_bytes on the shared worker pool through the keep-alive session
+The server counts TCP connections, each of which would be a TLS handshake against a real host.
+
+    python -m benchmarks.bench_http --requests 500
+"""
+import argparse
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import http_client
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Keep-alive handler answering a small fixed page and counting connections."""
+    protocol_version = 'HTTP/1.1'
+    wbufsize = -1                  # send headers and body in one segment
+    disable_nagle_algorithm = True
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self) -> None:
+        super().setup()
+        with StandInHandler.lock:
+            StandInHandler.connections += 1
+
+    def do_GET(self) -> None:
+        body = b'<table><tbody><tr><td>1</td><td>store</td></tr></tbody></table>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def old_style(url: str, count: int) -> None:
+    """
+    One thread and one urlopen connection per request
+    :param url: URL to fetch
+    :param count: number of requests
+    :return: None
+    """
+    threads = [threading.Thread(target=lambda: urllib.request.urlopen(url, timeout=5).read(), daemon=True)
+               for _ in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def shared_style(url: str, count: int) -> None:
+    """
+    Requests on the shared worker pool through the keep-alive session
+    :param url: URL to fetch
+    :param count: number of requests
+    :return: None
+    """
+    futures = [http_client.submit(http_client.fetch_bytes, url) for _ in range(count)]
+    for future in futures:
+        future.result()
+
+
+def run(count: int) -> None:
+    """
+    Time both styles and report connections opened
+    :param count: requests per style
+    :return: None
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/store/korea/korStore2.do?pageNo=1"
+
+    for name, style in (('old', old_style), ('shared', shared_style)):
+        StandInHandler.connections = 0
+        start = time.perf_counter()
+        style(url, count)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<8} {count / elapsed:>9,.0f} req/s  {StandInHandler.connections:>5} connections opened")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+    run(args.requests)
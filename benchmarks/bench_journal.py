@@ -0,0 +1,160 @@
+"""Append and replay speed of journal.OrderJournal, against one SQLite transaction per event.
+
+Simulated orders of --items item events, a ticket and a checkout (plus a reset every tenth
+order) are appended to a journal in a temp directory. The journal is then replayed from the
+start (event by event, and with numpy) and from a snapshot, and a child process that dies without closing the journal checks
+crash recovery. Another child checks that a journal already open can't be opened by a second process.
+
+    python -m benchmarks.bench_journal --events 5000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from journal import OrderJournal, replay
+
+
+def fill(journal: OrderJournal, events: int, items: int, seed: int = 0) -> int:
+    """
+    Append simulated orders until about events events were written
+    :param journal: journal to append to
+    :param events: target event count
+    :param items: item events per order
+    :param seed: random seed
+    :return: orders checked out
+    """
+    rng = random.Random(seed)
+    slots = [rng.randrange(40) for _ in range(1024)]
+    orders = 0
+    ticket = 0
+    written = 0
+    while written < events:
+        session = journal.new_session()
+        for k in range(items):
+            journal.item_added(session, slots[(written + k) & 1023])
+        written += items
+        if orders % 10 == 9:
+            journal.reset(session)
+            written += 1
+        else:
+            ticket += 1
+            journal.ticket_issued(session, ticket)
+            journal.checkout(session, 3000 * items, 300 if items > 3 else 0)
+            written += 2
+        orders += 1
+    return orders - orders // 10
+
+
+def sqlite_per_event(path: str, events: int) -> float:
+    """
+    Insert events one transaction each, like writing them to the ledger database
+    :param path: database path
+    :param events: events to insert
+    :return: seconds
+    """
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute('pragma journal_mode=wal')
+    conn.execute('pragma synchronous=normal')
+    conn.execute('create table events (kind integer, session integer, stamp integer, a integer, b integer)')
+    start = time.perf_counter()
+    for n in range(events):
+        conn.execute('begin')
+        conn.execute('insert into events values (?, ?, ?, ?, ?)', (1, n // 5, time.time_ns() // 1000, n % 40, 1))
+        conn.execute('commit')
+    seconds = time.perf_counter() - start
+    conn.close()
+    return seconds
+
+
+CRASH_CHILD = """
+import os, sys
+from journal import OrderJournal
+journal = OrderJournal(sys.argv[1], snapshot_every=0)
+for n in range(int(sys.argv[2])):
+    session = journal.new_session()
+    journal.item_added(session, n % 40)
+    journal.ticket_issued(session, n + 1)
+    journal.checkout(session, 2000, 0)
+os._exit(1)  # no close(), no flush: the page cache must still hold every event
+"""
+
+LOCKED_CHILD = """
+import sys
+from journal import OrderJournal
+try:
+    OrderJournal(sys.argv[1], snapshot_every=0)
+except RuntimeError as err:
+    print(err)
+    sys.exit(0)
+sys.exit(1)
+"""
+
+
+def run(events: int, items: int, sqlite_events: int) -> None:
+    """
+    Measure append, replay and crash recovery
+    :param events: events to append
+    :param items: item events per order
+    :param sqlite_events: events for the SQLite comparison
+    :return: None
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.journal')
+        journal = OrderJournal(path, snapshot_every=0)
+        start = time.perf_counter()
+        orders = fill(journal, events, items)
+        append_s = time.perf_counter() - start
+        written = len(journal)
+        print(f"append        {written / append_s / 1e6:6.2f} M events/s  ({written} events, {orders} sales, "
+              f"{os.path.getsize(path) / 1e6:.0f} MB)")
+
+        seconds = sqlite_per_event(os.path.join(tmp, 'events.db'), sqlite_events)
+        print(f"sqlite        {sqlite_events / seconds / 1e6:6.2f} M events/s  (one transaction per event)")
+
+        states = {}
+        for name, vectorize in (('replay loop', False), ('replay numpy', True)):
+            start = time.perf_counter()
+            state = states[name] = replay(path, use_snapshot=False, vectorize=vectorize)
+            replay_s = time.perf_counter() - start
+            sold = sum(day['orders'] for day in state.sales.values())
+            print(f"{name:<13} {state.events / replay_s / 1e6:6.2f} M events/s  ({replay_s:.2f} s)")
+            if state.events != written or sold != orders or state.carts:
+                raise SystemExit(f"Replay mismatch: {state.events} events, {sold} sales, "
+                                 f"{len(state.carts)} open carts")
+        if states['replay loop'].to_dict() != states['replay numpy'].to_dict():
+            raise SystemExit("The numpy replay disagrees with the loop.")
+
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        second = subprocess.run([sys.executable, '-c', LOCKED_CHILD, path], cwd=root, capture_output=True, text=True)
+        print(f"second kiosk  {second.stdout.strip() or 'opened the journal'}")
+        if second.returncode != 0:
+            raise SystemExit("A second process opened a journal that was already open.")
+
+        journal.snapshot()
+        fill(journal, events // 100, items, seed=1)
+        start = time.perf_counter()
+        state = replay(path)
+        print(f"from snapshot {(time.perf_counter() - start) * 1e3:8.1f} ms to replay the last "
+              f"{len(journal) - written} events")
+        journal.close()
+
+        crash_path = os.path.join(tmp, 'crash.journal')
+        subprocess.run([sys.executable, '-c', CRASH_CHILD, crash_path, '10000'], cwd=root)
+        state = replay(crash_path)
+        print(f"crash         {state.events} events and last ticket {state.last_ticket} recovered after os._exit")
+        if state.events != 30000 or state.last_ticket != 10000:
+            raise SystemExit("Events were lost in the crash.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=5000000)
+    parser.add_argument('--items', type=int, default=3, help='item events per order')
+    parser.add_argument('--sqlite-events', type=int, default=20000)
+    args = parser.parse_args()
+    run(args.events, args.items, args.sqlite_events)
@@ -0,0 +1,156 @@
+"""Headless multi-lane check: --lanes lanes.Lane carts of one LaneHost taking orders at the same time.
+
+Every lane runs on its own thread, as its screen's event loop would, and serves --customers
+customers: random drinks with modifiers (some taken back out), the cart view flushed to an
+in-memory text widget after every click, checkout against the shared ticket allocator, ledger
+and journal, then reset for the next customer. Checked afterwards:
+  * every receipt has exactly the lines its lane's customer ordered
+  * every lane's screen shows what a full redraw of its cart would
+  * ticket numbers are unique, the ledger holds every order, the journal replays to the same sales
+The same work is then run on one lane alone. Lanes share no lock while taking an order; at
+checkout they meet at the ticket allocator (one database write per --ticket-block tickets) and
+the journal append, and the waits for the allocator are reported. On fewer cores than lanes
+these waits include lock holders descheduled by the GIL.
+
+    python -m benchmarks.bench_lanes --lanes 8 --customers 500 --ticket-block 1
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict, List
+
+from benchmarks.bench_cart_view import TextBuffer
+from cart import Modifiers
+from instrumentation import REGISTRY
+from journal import OrderJournal, replay
+from ledger import OrderLedger
+from lanes import Lane, LaneHost
+from loadgen import count_orders
+from order_core import Menu
+from storage import close_pools
+
+MODIFIERS = [Modifiers(), Modifiers(), Modifiers('large'), Modifiers(shots=1), Modifiers('large', 2)]
+
+
+def serve(lane: Lane, customers: int, seed: int, tickets: List[int], errors: List[str], sold: Counter) -> None:
+    """
+    One lane's thread: take customers' orders one after the other
+    :param lane: lane to drive
+    :param customers: orders to take
+    :param seed: random seed of this lane
+    :param tickets: receives every ticket issued
+    :param errors: receives a description of every mismatch
+    :param sold: receives the quantity sold per menu slot
+    :return: None
+    """
+    rng = random.Random(seed)
+    menu = lane.host.menu
+    text = TextBuffer()
+    for _ in range(customers):
+        expected: Dict[tuple, int] = {}
+        for _ in range(rng.randint(1, 6)):
+            idx, modifiers = rng.randrange(menu.get_menu_length()), rng.choice(MODIFIERS)
+            lane.add(idx, modifiers)
+            expected[(idx, modifiers)] = expected.get((idx, modifiers), 0) + 1
+            if rng.random() < 0.15:
+                lane.remove(idx, modifiers)
+                expected[(idx, modifiers)] -= 1
+                if not expected[(idx, modifiers)]:
+                    del expected[(idx, modifiers)]
+            lane.view.flush(text)
+        if not expected:
+            lane.reset()
+            continue
+
+        order = lane.checkout()
+        tickets.append(order.ticket)
+        for (idx, _), amount in expected.items():
+            sold[idx] += amount
+        wanted = sorted((lane.processor.cart.lines[(idx, m.size, m.shots)].name(menu), amount)
+                        for (idx, m), amount in expected.items())
+        if sorted((name, amount) for name, _, amount in order.lines) != wanted:
+            errors.append(f"{lane.name}: receipt {order.lines} differs from the order {wanted}")
+        if text.get() != lane.view.render_all():
+            errors.append(f"{lane.name}: screen differs from a full redraw")
+        lane.reset()
+        lane.view.flush(text)
+
+
+def run(lanes: int, customers: int, items: int, ticket_block: int) -> float:
+    """
+    Run lanes lanes at the same time against fresh shared resources and check the results
+    :param lanes: number of lanes
+    :param customers: customers per lane
+    :param items: menu size
+    :param ticket_block: ticket numbers reserved per database write
+    :return: seconds
+    """
+    menu = Menu([f"Drink {k:03d}" for k in range(items)], [1500 + 100 * (k % 30) for k in range(items)])
+    REGISTRY.reset()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'lanes.db')
+        journal_path = os.path.join(tmp, 'lanes.journal')
+        journal = OrderJournal(journal_path, snapshot_every=0)
+        ledger = OrderLedger(db_path, durable=False)
+        host = LaneHost(menu, lanes, db_path=db_path, journal=journal, ledger=ledger, ticket_block=ticket_block)
+        opened = [host.open_lane() for _ in range(lanes)]
+        tickets: List[List[int]] = [[] for _ in opened]
+        errors: List[str] = []
+        sold = [Counter() for _ in opened]
+        threads = [threading.Thread(target=serve, args=(lane, customers, k, tickets[k], errors, sold[k]))
+                   for k, lane in enumerate(opened)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        for lane in opened:
+            lane.close()
+        ledger.close()
+        journal.close()
+
+        issued = [ticket for lane_tickets in tickets for ticket in lane_tickets]
+        state = replay(journal_path)
+        journal_items = Counter()
+        for day_sales in state.sales.values():
+            journal_items.update(day_sales['items'])
+        ledger_orders = count_orders(db_path)
+        close_pools()
+
+    total_sold = sum(sold, Counter())
+    if len(set(issued)) != len(issued):
+        errors.append(f"{len(issued) - len(set(issued))} duplicate tickets")
+    if ledger_orders != len(issued):
+        errors.append(f"ledger holds {ledger_orders} orders, {len(issued)} were checked out")
+    if journal_items != total_sold or state.carts:
+        errors.append(f"journal replay differs: {sum(journal_items.values())} items sold, {len(state.carts)} open carts")
+    for error in errors[:10]:
+        print("  " + error)
+    if errors:
+        raise SystemExit(f"{len(errors)} problems with {lanes} lanes.")
+
+    print(f"{lanes} lanes x {customers} customers: {len(issued)} orders in {elapsed:.2f} s "
+          f"({len(issued) / elapsed:,.0f} orders/s); tickets unique, ledger and journal agree")
+    wait = REGISTRY.histograms['ticket_lock_wait'].summary()
+    pool_wait = REGISTRY.histograms.get('db_pool_wait')
+    print(f"  allocator lock waits: {wait['count']}, p50 {wait['p50_ms']:.3f} ms, p99 {wait['p99_ms']:.3f} ms, "
+          f"max {wait['max_ms']:.3f} ms; connection pool waits: {pool_wait.count if pool_wait else 0}")
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lanes', type=int, default=8)
+    parser.add_argument('--customers', type=int, default=500, help='customers per lane')
+    parser.add_argument('--items', type=int, default=40, help='menu size')
+    parser.add_argument('--ticket-block', type=int, default=1, help='ticket numbers reserved per database write')
+    args = parser.parse_args()
+    together = run(args.lanes, args.customers, args.items, args.ticket_block)
+    alone = run(1, args.customers, args.items, args.ticket_block)
+    print(f"{args.lanes} lanes together took {together / alone:.1f}x the time of one lane alone "
+          f"for {args.lanes}x the orders")
@@ -0,0 +1,136 @@
+"""Leak check: --cycles whole orders through pooled, reused OrderProcessors must not grow memory or FDs.
+
+Every cycle takes a processor from an order_core.OrderProcessorPool, adds 1-5 items (a few with
+modifiers, some taken back out), checks out against a real ticket table, ledger and journal in a
+temporary directory, and releases the processor (reset, not rebuilt). After --warmup cycles the
+anonymous resident memory (RssAnon; the journal's mmap pages and SQLite's file pages don't count)
+and the open file descriptors are sampled every --sample cycles, with the ledger flushed first so
+its queue is empty. Fails (exit 1) when memory grows more than --max-growth-mb over the measured
+cycles or the FD count changes. Also times one reset() against building a new processor.
+
+    python -m benchmarks.bench_leaks --cycles 100000 --lanes 4 --warmup 10000 --sample 10000
+"""
+import argparse
+import gc
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+from cart import Modifiers
+from journal import OrderJournal
+from ledger import OrderLedger
+from order_core import Menu, OrderProcessor, OrderProcessorPool, default_pricing_engine
+from storage import close_pools
+from ticket import TicketAllocator
+
+MODIFIERS = [Modifiers(), Modifiers(), Modifiers(), Modifiers('large'), Modifiers(shots=1)]
+
+
+def rss_kib() -> int:
+    """
+    Anonymous resident memory of this process
+    :return: KiB; the peak RSS where /proc is not available
+    """
+    try:
+        with open('/proc/self/status') as fp:
+            for line in fp:
+                if line.startswith('RssAnon:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def open_fds() -> Optional[int]:
+    """
+    Open file descriptors of this process
+    :return: count, None where it can't be listed
+    """
+    for path in ('/proc/self/fd', '/dev/fd'):
+        if os.path.isdir(path):
+            return len(os.listdir(path))
+    return None
+
+
+def order_cycle(pool: OrderProcessorPool, ledger: OrderLedger, rng: random.Random, items: int) -> None:
+    with pool.session() as processor:
+        for _ in range(rng.randint(1, 5)):
+            processor.process_order(rng.randrange(items), rng.choice(MODIFIERS))
+        if rng.random() < 0.2:
+            line = next(iter(processor.cart))
+            processor.remove_order(line.slot, line.modifiers)
+        if len(processor.cart):
+            processor.checkout(ledger)
+
+
+def reuse_vs_rebuild(menu: Menu, allocator: TicketAllocator, journal: OrderJournal, repeats: int = 20000) -> None:
+    engine = default_pricing_engine(menu)
+    processor = OrderProcessor(menu, allocator, engine, journal)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        processor.process_order(0)
+        processor.reset()
+    reset = (time.perf_counter() - start) / repeats
+    start = time.perf_counter()
+    for _ in range(repeats):
+        OrderProcessor(menu, allocator, engine, journal).process_order(0)
+    rebuild = (time.perf_counter() - start) / repeats
+    print(f"one item then reset(): {reset * 1e6:.2f} us   new processor + one item: {rebuild * 1e6:.2f} us")
+
+
+def run(cycles: int, lanes: int, warmup: int, sample: int, items: int, max_growth_mb: float) -> bool:
+    menu = Menu([f"Drink {k:03d}" for k in range(items)], [1500 + 100 * (k % 30) for k in range(items)])
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'leaks.db')
+        allocator = TicketAllocator(db_path)
+        ledger = OrderLedger(db_path, durable=False)
+        journal = OrderJournal(os.path.join(tmp, 'leaks.journal'), snapshot_every=0)
+        engine = default_pricing_engine(menu)
+        pool = OrderProcessorPool(lambda: OrderProcessor(menu, allocator, engine, journal), size=lanes)
+        rng = random.Random(0)
+        try:
+            reuse_vs_rebuild(menu, allocator, journal)
+            samples: List[tuple] = []
+            start = time.perf_counter()
+            for cycle in range(1, cycles + 1):
+                order_cycle(pool, ledger, rng, items)
+                if cycle >= warmup and (cycle - warmup) % sample == 0:
+                    ledger.flush()
+                    gc.collect()
+                    samples.append((cycle, rss_kib(), open_fds()))
+                    print(f"cycle {cycle:>8}: rss {samples[-1][1] / 1024:8.1f} MiB   fds {samples[-1][2]}")
+            elapsed = time.perf_counter() - start
+        finally:
+            ledger.close()
+            journal.close()
+            close_pools()
+
+    print(f"{cycles} order cycles in {elapsed:.1f} s ({cycles / elapsed:,.0f}/s), "
+          f"{pool.created} processors built for {lanes} lanes")
+    if len(samples) < 2:
+        print("not enough samples after the warm-up to judge")
+        return True
+    growth = (samples[-1][1] - samples[0][1]) / 1024
+    fds = {fd for _, _, fd in samples}
+    ok = growth <= max_growth_mb and len(fds) == 1 and pool.created <= lanes
+    print(f"rss growth over cycles {samples[0][0]}-{samples[-1][0]}: {growth:+.1f} MiB (limit {max_growth_mb} MiB); "
+          f"fds {'stable at ' + str(fds.pop()) if len(fds) == 1 else 'CHANGED: ' + str(sorted(fds, key=str))}")
+    print("no leak" if ok else "LEAK")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cycles', type=int, default=100000)
+    parser.add_argument('--lanes', type=int, default=4, help='pool size')
+    parser.add_argument('--warmup', type=int, default=10000, help='cycles before the first sample')
+    parser.add_argument('--sample', type=int, default=10000, help='cycles between samples')
+    parser.add_argument('--items', type=int, default=50, help='menu size')
+    parser.add_argument('--max-growth-mb', type=float, default=4.0)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.cycles, args.lanes, args.warmup, args.sample, args.items, args.max_growth_mb) else 1)
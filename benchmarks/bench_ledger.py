@@ -0,0 +1,97 @@
+"""Throughput of ledger.OrderLedger with 1, 10 and 100 simulated kiosks.
+
+Every kiosk is a thread recording completed orders as fast as it can; the clock stops
+once the ledger has committed all of them. For reference the same orders are also
+written with one durable transaction per order, the way a synchronous writer would.
+
+    python -m benchmarks.bench_ledger --orders 20000
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from ledger import CompletedOrder, OrderLedger
+from storage import ConnectionPool
+
+KIOSK_COUNTS = [1, 10, 100]
+
+
+def sample_order(ticket: int) -> CompletedOrder:
+    """
+    Build a typical three-line order
+    :param ticket: ticket number
+    :return: completed order
+    """
+    lines = [("Ice Americano", 2000, 2), ("Cafe Latte", 3000, 1), ("Watermelon Juice", 4900, 1)]
+    total_price = sum(price * amount for _, price, amount in lines)
+    return CompletedOrder(ticket, lines, total_price, 1090, total_price - 1090,
+                          datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def run_ledger(db_path: str, kiosks: int, orders: int) -> float:
+    """
+    Record orders from several kiosk threads through one ledger
+    :param db_path: database to write to
+    :param kiosks: number of concurrent kiosk threads
+    :param orders: total orders across all kiosks
+    :return: orders per second
+    """
+    ledger = OrderLedger(db_path)
+    per_kiosk = orders // kiosks
+
+    def kiosk(offset: int) -> None:
+        for k in range(per_kiosk):
+            ledger.record(sample_order(offset + k))
+
+    threads = [threading.Thread(target=kiosk, args=(n * per_kiosk,)) for n in range(kiosks)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ledger.flush()
+    elapsed = time.perf_counter() - start
+    ledger.close()
+    print(f"{kiosks:>4} kiosks: {per_kiosk * kiosks / elapsed:>10,.0f} orders/s "
+          f"({ledger.batches_written} commits for {ledger.orders_written} orders)")
+    return per_kiosk * kiosks / elapsed
+
+
+def run_per_order(db_path: str, orders: int) -> float:
+    """
+    Write orders with one synchronous transaction each
+    :param db_path: database to write to
+    :param orders: number of orders
+    :return: orders per second
+    """
+    pool = ConnectionPool(db_path, size=1)
+    with pool.connection() as conn:
+        conn.execute('pragma synchronous = FULL')  # same durability as the ledger's default
+    start = time.perf_counter()
+    for k in range(orders):
+        order = sample_order(k)
+        with pool.transaction() as conn:
+            order_id = conn.execute(
+                'insert into orders (ticket, total_price, discount, final_price, created_at) values (?, ?, ?, ?, ?)',
+                (order.ticket, order.total_price, order.discount, order.final_price, order.created_at)
+            ).lastrowid
+            conn.executemany('insert into order_lines (order_id, drink_name, price, amount) values (?, ?, ?, ?)',
+                             [(order_id, name, price, amount) for name, price, amount in order.lines])
+    elapsed = time.perf_counter() - start
+    pool.close()
+    print(f"{'per-order commit:':<12} {orders / elapsed:>10,.0f} orders/s")
+    return orders / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=20000, help='orders per run')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        run_per_order(os.path.join(tmp, 'per_order.db'), min(args.orders, 2000))
+        for count in KIOSK_COUNTS:
+            run_ledger(os.path.join(tmp, f'ledger_{count}.db'), count, args.orders)
@@ -0,0 +1,53 @@
+"""Ledger check for loadgen workers: no order may be lost when a process runs several tasks.
+
+multiprocessing pools reuse worker processes, so one process can run loadgen.run_worker more than
+once. This runs --tasks workers one after the other in this process, then a --processes run_load,
+each on a throw-away database, and compares the orders committed to the ledger with the tickets
+that were issued and the customers served. Exits non-zero if they differ.
+
+    python -m benchmarks.bench_loadgen --tasks 2 --processes 2 --customers 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+from typing import List
+
+from loadgen import LoadConfig, count_orders, run_load, run_worker
+
+
+def run(tasks: int, processes: int, customers: int) -> bool:
+    errors: List[str] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        config = LoadConfig(db_path=os.path.join(tmp, 'same_process.db'), customers=customers, threads=2)
+        issued = 0
+        for task in range(tasks):
+            issued += len(run_worker(config, task)['tickets'])
+            committed = count_orders(config.db_path)
+            print(f"task {task + 1} in this process: {issued} tickets issued, {committed} orders in the ledger")
+            if committed != issued:
+                errors.append(f"after task {task + 1}: {issued} tickets but {committed} orders")
+            if issued != (task + 1) * config.threads * customers:  # a customer thread died in checkout
+                errors.append(f"after task {task + 1}: {issued} of {(task + 1) * config.threads * customers} "
+                              f"customers checked out")
+
+        config = LoadConfig(db_path=os.path.join(tmp, 'pool.db'), customers=customers, threads=2)
+        result = run_load(config, processes)
+        print(f"{processes} processes: {result['orders']} tickets issued, {result['ledger_orders']} orders in the ledger")
+        if result['ledger_orders'] != result['orders'] or result['duplicate_tickets']:
+            errors.append(f"run_load: {result['orders']} tickets ({result['duplicate_tickets']} duplicates) "
+                          f"but {result['ledger_orders']} orders")
+
+    for error in errors:
+        print("  " + error)
+    print(f"{len(errors)} problems" if errors else "all checks passed")
+    return not errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=2, help='run_worker calls in this process')
+    parser.add_argument('--processes', type=int, default=2, help='worker processes of the run_load check')
+    parser.add_argument('--customers', type=int, default=20, help='customers per thread')
+    args = parser.parse_args()
+    sys.exit(0 if run(args.tasks, args.processes, args.customers) else 1)
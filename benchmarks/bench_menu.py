@@ -0,0 +1,108 @@
+"""Memory per item and lookup latency of order_core.Menu versus the list-based week09.Menu.
+
+Memory is reported twice for the array Menu: as built, and after a lookup by name has built its
+name/SKU index. With the index the array Menu takes more memory per item than the list Menu, the
+price of O(1) lookups by name or SKU; menus that are only used by slot never build it.
+
+    python -m benchmarks.bench_menu --items 5000
+"""
+import argparse
+import random
+import timeit
+import tracemalloc
+
+import week09
+from order_core import Menu
+
+
+def measure_memory(build, items: int) -> float:
+    """
+    Bytes allocated per item while building and holding a menu
+    :param build: callable taking the item count and returning a menu
+    :param items: number of menu items
+    :return: bytes per item
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    menu = build(items)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del menu
+    return (after - before) / items
+
+
+def build_legacy(items: int) -> week09.Menu:
+    """
+    Build a list-based menu the way the old class was fed
+    :param items: number of menu items
+    :return: legacy menu
+    """
+    return week09.Menu([f"Drink {k:05d}" for k in range(items)], [1000 + k * 100 for k in range(items)])
+
+
+def build_compact(items: int) -> Menu:
+    """
+    Build an array-backed menu with the same data (no SKUs); its name index isn't built yet
+    :param items: number of menu items
+    :return: compact menu
+    """
+    return Menu.from_rows((f"Drink {k:05d}", 1000 + k * 100, None) for k in range(items))
+
+
+def build_indexed(items: int) -> Menu:
+    """
+    Build an array-backed menu and look a name up, which builds the name index
+    :param items: number of menu items
+    :return: compact menu with its index
+    """
+    menu = build_compact(items)
+    menu.find("Drink 00000")
+    return menu
+
+
+def time_lookup(stmt, number: int) -> float:
+    """
+    Nanoseconds per call of a lookup
+    :param stmt: zero-argument callable
+    :param number: number of calls
+    :return: ns per call
+    """
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e9
+
+
+def run(items: int, number: int) -> None:
+    """
+    Print the memory and latency comparison
+    :param items: number of menu items
+    :param number: lookups per timing run
+    :return: None
+    """
+    legacy = build_legacy(items)
+    compact = build_compact(items)
+    idx = random.Random(0).randrange(items)
+    name = legacy.get_drink_name(idx)
+
+    rows = [
+        ("memory (bytes/item)", measure_memory(build_legacy, items), measure_memory(build_compact, items)),
+        ("  with name index", measure_memory(build_legacy, items), measure_memory(build_indexed, items)),
+        ("get_price (ns)", time_lookup(lambda: legacy.get_price(idx), number),
+         time_lookup(lambda: compact.get_price(idx), number)),
+        ("get_drink_name (ns)", time_lookup(lambda: legacy.get_drink_name(idx), number),
+         time_lookup(lambda: compact.get_drink_name(idx), number)),
+        ("lookup by name (ns)", time_lookup(lambda: legacy.drinks.index(name), number // 100 or 1),
+         time_lookup(lambda: compact.index_of(name), number)),
+    ]
+
+    print(f"{items} items")
+    print(f"{'':<22} {'list Menu':>12} {'array Menu':>12}")
+    print("-" * 48)
+    for label, old, new in rows:
+        print(f"{label:<22} {old:>12,.1f} {new:>12,.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=5000)
+    parser.add_argument('--number', type=int, default=100000, help='lookups per timing run')
+    args = parser.parse_args()
+    run(args.items, args.number)
@@ -0,0 +1,164 @@
+"""Menu catalog hot reload: how long a catalog.MenuCatalog takes to notice and swap in a changed menu.
+
+A --items item catalog is written to a temporary kiosk database. For each kind of change (one
+price, --batch prices, every price, --batch items added, --batch items removed), a writer commits
+the change through the connection pool and the watcher's poll() is timed: data_version check,
+revision check, loading the rows and building the new Menu snapshot. Every reload is checked
+against the database and changed_slots() must name exactly the buttons the change touched. Also
+measured: a poll with nothing changed, a poll after an unrelated commit (an order), and the
+end-to-end delay from commit to listener with the poll running as a scheduler job every
+--poll-interval seconds. A cart opened before a change keeps its snapshot and prices.
+
+    python -m benchmarks.bench_menu_reload --items 5000 --repeats 20 --batch 50 --poll-interval 0.05
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, List, Set, Tuple
+
+from catalog import MenuCatalog, changed_slots, load_menu, save_menu
+from instrumentation import REGISTRY
+from order_core import OrderProcessor
+from scheduler import Scheduler
+from storage import close_pools, get_pool
+
+
+def percentiles(seconds: List[float]) -> str:
+    ordered = sorted(seconds)
+    return (f"p50 {ordered[len(ordered) // 2] * 1e3:7.2f} ms   "
+            f"p99 {ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e3:7.2f} ms")
+
+
+def catalog_rows(items: int) -> List[Tuple[str, int, str]]:
+    return [(f"Drink {k:05d}", 1500 + 100 * (k % 30), f"SKU-{k:05d}") for k in range(items)]
+
+
+def change_prices(db_path: str, slots: List[int]) -> Set[int]:
+    with get_pool(db_path).transaction() as conn:
+        conn.executemany('update menu set price = price + 100 where id = ?', ((slot,) for slot in slots))
+    return set(slots)
+
+
+def add_items(db_path: str, count: int) -> Set[int]:
+    with get_pool(db_path).transaction() as conn:
+        start = conn.execute('select max(id) + 1 from menu').fetchone()[0]
+        conn.executemany('insert into menu (id, name, price, sku) values (?, ?, 2500, ?)',
+                         ((k, f"New {k}", f"NEW-{k}") for k in range(start, start + count)))
+    return set(range(start, start + count))
+
+
+def remove_items(db_path: str, count: int) -> Set[int]:
+    with get_pool(db_path).transaction() as conn:
+        end = conn.execute('select max(id) + 1 from menu').fetchone()[0]
+        conn.execute('delete from menu where id >= ?', (end - count,))
+    return set(range(end - count, end))
+
+
+def run(items: int, repeats: int, batch: int, poll_interval: float) -> bool:
+    errors: List[str] = []
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'kiosk.db')
+        save_menu(db_path, catalog_rows(items))
+        catalog = MenuCatalog(db_path)
+
+        start = time.perf_counter()
+        for _ in range(10000):
+            catalog.poll()
+        print(f"{items} items; poll with nothing changed: {(time.perf_counter() - start) / 10000 * 1e6:.1f} us")
+        with get_pool(db_path).transaction() as conn:
+            conn.execute('update ticket set number = number + 1')
+        start = time.perf_counter()
+        unrelated = catalog.poll()
+        print(f"poll after an unrelated commit: {(time.perf_counter() - start) * 1e6:.1f} us "
+              f"({'reloaded!' if unrelated else 'no reload'})")
+        if unrelated is not None:
+            errors.append("an order commit reloaded the menu")
+
+        # a customer in the middle of an order when the prices change
+        processor = OrderProcessor(catalog.menu)
+        processor.process_order(0, count=2)
+        before = processor.total_price
+
+        changes: List[Tuple[str, Callable[[], Set[int]]]] = [
+            ("1 price", lambda: change_prices(db_path, [rng.randrange(catalog.menu.get_menu_length())])),
+            (f"{batch} prices", lambda: change_prices(db_path, rng.sample(range(catalog.menu.get_menu_length()), batch))),
+            ("every price", lambda: change_prices(db_path, list(range(catalog.menu.get_menu_length())))),
+            (f"{batch} items added", lambda: add_items(db_path, batch)),
+            (f"{batch} items removed", lambda: remove_items(db_path, batch)),
+        ]
+        for label, change in changes:
+            seconds: List[float] = []
+            for _ in range(repeats):
+                old = catalog.menu
+                expected = change()
+                start = time.perf_counter()
+                new = catalog.poll()
+                seconds.append(time.perf_counter() - start)
+                if new is None or catalog.menu is not new:
+                    errors.append(f"{label}: change not picked up")
+                    continue
+                slots = changed_slots(old, new)
+                fresh = load_menu(db_path)
+                if set(slots) != expected or new.drinks != fresh.drinks or new.prices.tolist() != fresh.prices.tolist():
+                    errors.append(f"{label}: {len(slots)} slots changed, expected {len(expected)}")
+            print(f"  {label:<18} reload {percentiles(seconds)}   buttons rebuilt {len(expected):>5} of "
+                  f"{catalog.menu.get_menu_length()}")
+
+        if processor.menu.get_price(0) * 2 != before or processor.total_price != before:
+            errors.append("the open cart's prices changed")
+        try:
+            processor.set_menu(catalog.menu)
+            errors.append("a cart with items switched menus")
+        except ValueError:
+            pass
+        processor.reset()
+        processor.set_menu(catalog.menu)
+        processor.process_order(0, count=2)
+        if processor.total_price != 2 * catalog.menu.get_price(0):
+            errors.append("the reset cart doesn't use the new prices")
+        print(f"open cart kept {before} won through {catalog.reloads} reloads; after reset: {processor.total_price} won")
+
+        # watched the way the kiosk does it: poll() as a scheduler job, commit -> listener delay
+        seen = threading.Event()
+        catalog.subscribe(lambda old, new: seen.set())
+        scheduler = Scheduler(seed=0).start()
+        scheduler.every('menu', catalog.poll, poll_interval)
+        delays: List[float] = []
+        try:
+            for _ in range(repeats):
+                time.sleep(rng.uniform(0, poll_interval))
+                seen.clear()
+                change_prices(db_path, [rng.randrange(catalog.menu.get_menu_length())])
+                committed = time.perf_counter()
+                if not seen.wait(10 * poll_interval + 1):
+                    errors.append("the watcher missed a change")
+                    continue
+                delays.append(time.perf_counter() - committed)
+        finally:
+            scheduler.stop()
+            catalog.close()
+            close_pools()
+        if delays:
+            print(f"commit -> listener, polling every {poll_interval * 1e3:.0f} ms: {percentiles(delays)}")
+
+    reload = REGISTRY.histograms['menu_reload'].summary()
+    print(f"menu_reload timer: p50 {reload['p50_ms']:.2f} ms, p99 {reload['p99_ms']:.2f} ms, max {reload['max_ms']:.2f} ms")
+    for error in errors[:10]:
+        print("  " + error)
+    print(f"{len(errors)} problems" if errors else "all checks passed")
+    return not errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=5000, help='catalog size')
+    parser.add_argument('--repeats', type=int, default=20, help='changes of each kind')
+    parser.add_argument('--batch', type=int, default=50, help='prices changed / items added or removed at once')
+    parser.add_argument('--poll-interval', type=float, default=0.05, help='seconds between polls of the watcher')
+    args = parser.parse_args()
+    sys.exit(0 if run(args.items, args.repeats, args.batch, args.poll_interval) else 1)
@@ -0,0 +1,226 @@
+"""Load test of order_service: hundreds of simulated kiosks ordering over keep-alive connections.
+
+Starts `python -m order_service` on a free port with a database in a temp directory (or uses
+--url), then every kiosk repeatedly opens a cart, adds a few drinks one request at a time and
+checks out. Reports checkout latency percentiles and order throughput, and checks that no
+ticket number was issued twice and that the ledger holds every order after the service stopped.
+A request with a negative or non-numeric Content-Length must get a 400, not a dropped connection.
+
+    python -m benchmarks.bench_order_service --kiosks 200 --orders 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class KioskConnection:
+    """One simulated kiosk's keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: Optional[dict] = None) -> Tuple[int, Any]:
+        """
+        Send one request, reconnecting if the server closed the connection
+        :param method: HTTP method
+        :param path: URL path
+        :param body: JSON body
+        :return: status code and decoded answer
+        """
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        data = json.dumps(body).encode('utf-8') if body is not None else b''
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                          f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        keep_alive = True
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+            elif name.lower() == 'connection' and value.strip().lower() == 'close':
+                keep_alive = False
+        payload = json.loads(await self.reader.readexactly(length)) if length else None
+        if not keep_alive:
+            await self.close()
+        return status, payload
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile
+    :param samples: sorted samples
+    :param pct: percentile from 0 to 100
+    :return: sample value
+    """
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+async def kiosk(host: str, port: int, orders: int, menu_size: int, seed: int,
+                checkout_times: List[float], order_times: List[float], tickets: List[int]) -> None:
+    """
+    Place orders one after another like a kiosk with a steady queue of customers
+    :param host: service host
+    :param port: service port
+    :param orders: orders to place
+    :param menu_size: number of menu items
+    :param seed: random seed of this kiosk
+    :param checkout_times: checkout latencies are appended here
+    :param order_times: whole-order latencies are appended here
+    :param tickets: issued tickets are appended here
+    :return: None
+    """
+    rng = random.Random(seed)
+    conn = KioskConnection(host, port)
+    try:
+        for _ in range(orders):
+            start = time.perf_counter()
+            status, cart = await conn.request('POST', '/carts', {})
+            if status != 201:
+                raise SystemExit(f"Opening a cart failed: {status} {cart}")
+            for _ in range(rng.randint(1, 4)):
+                status, answer = await conn.request('POST', f"/carts/{cart['cart_id']}/items",
+                                                    {'item': rng.randrange(menu_size), 'count': rng.randint(1, 3)})
+                if status != 200:
+                    raise SystemExit(f"Adding an item failed: {status} {answer}")
+            checkout_start = time.perf_counter()
+            status, answer = await conn.request('POST', f"/carts/{cart['cart_id']}/checkout")
+            end = time.perf_counter()
+            if status != 200:
+                raise SystemExit(f"Checkout failed: {status} {answer}")
+            checkout_times.append(end - checkout_start)
+            order_times.append(end - start)
+            tickets.append(answer['order']['ticket'])
+    finally:
+        await conn.close()
+
+
+async def bad_length(host: str, port: int, value: str) -> Optional[int]:
+    """
+    Send a request with a malformed Content-Length
+    :param host: service host
+    :param port: service port
+    :param value: Content-Length header value
+    :return: status code of the answer, None if the connection was dropped without one
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f"POST /carts HTTP/1.1\r\nHost: {host}\r\nContent-Length: {value}\r\n\r\n".encode())
+        await writer.drain()
+        status_line = await reader.readline()
+        return int(status_line.split()[1]) if status_line else None
+    finally:
+        writer.close()
+
+
+async def drive(host: str, port: int, kiosks: int, orders: int) -> None:
+    """
+    Run all kiosks concurrently and print the report
+    :param host: service host
+    :param port: service port
+    :param kiosks: concurrent kiosks
+    :param orders: orders per kiosk
+    :return: None
+    """
+    status, menu = await KioskConnection(host, port).request('GET', '/menu')
+    menu_size = len(menu['items'])
+    checkout_times: List[float] = []
+    order_times: List[float] = []
+    tickets: List[int] = []
+
+    start = time.perf_counter()
+    await asyncio.gather(*(kiosk(host, port, orders, menu_size, seed, checkout_times, order_times, tickets)
+                           for seed in range(kiosks)))
+    elapsed = time.perf_counter() - start
+
+    checkout_times.sort()
+    order_times.sort()
+    print(f"{kiosks} kiosks x {orders} orders: {len(tickets)} orders in {elapsed:.2f} s "
+          f"({len(tickets) / elapsed:.0f} orders/s)")
+    print(f"checkout  p50 {percentile(checkout_times, 50) * 1e3:7.2f} ms  p99 {percentile(checkout_times, 99) * 1e3:7.2f} ms"
+          f"  max {checkout_times[-1] * 1e3:7.2f} ms")
+    print(f"order     p50 {percentile(order_times, 50) * 1e3:7.2f} ms  p99 {percentile(order_times, 99) * 1e3:7.2f} ms")
+    if len(set(tickets)) != len(tickets):
+        raise SystemExit(f"{len(tickets) - len(set(tickets))} ticket numbers were issued twice.")
+    print(f"tickets {min(tickets)}..{max(tickets)}, all unique")
+
+    for value in ('-5', 'abc'):
+        status = await bad_length(host, port, value)
+        if status != 400:
+            raise SystemExit(f"Content-Length {value!r} got {status or 'no answer'}, expected 400.")
+    print("malformed Content-Length answered with 400")
+
+
+def start_service(db_path: str) -> Tuple[subprocess.Popen, str, int]:
+    """
+    Start order_service in a child process on a free port
+    :param db_path: database for tickets and the ledger
+    :return: process, host and port
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen([sys.executable, '-m', 'order_service', '--port', '0', '--db', db_path],
+                               cwd=root, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()  # "Order service listening on http://host:port"
+    if not line:
+        process.kill()
+        raise SystemExit("Order service did not start.")
+    address = urlsplit(line.split()[-1])
+    return process, address.hostname, address.port
+
+
+def run(kiosks: int, orders: int, url: Optional[str]) -> None:
+    """
+    Load-test an existing service or a freshly started one
+    :param kiosks: concurrent kiosks
+    :param orders: orders per kiosk
+    :param url: service address, None to start one
+    :return: None
+    """
+    if url:
+        address = urlsplit(url)
+        asyncio.run(drive(address.hostname, address.port, kiosks, orders))
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        process, host, port = start_service(os.path.join(tmp, 'service.db'))
+        try:
+            asyncio.run(drive(host, port, kiosks, orders))
+        finally:
+            process.terminate()
+            process.wait()
+        conn = sqlite3.connect(os.path.join(tmp, 'service.db'))
+        recorded = conn.execute('select count(*) from orders').fetchone()[0]
+        conn.close()
+        print(f"{recorded} orders in the ledger after shutdown")
+        if recorded != kiosks * orders:
+            raise SystemExit("The ledger lost orders.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--kiosks', type=int, default=200)
+    parser.add_argument('--orders', type=int, default=10, help='orders per kiosk')
+    parser.add_argument('--url', default=None, help='running service, e.g. http://127.0.0.1:8080')
+    args = parser.parse_args()
+    run(args.kiosks, args.orders, args.url)
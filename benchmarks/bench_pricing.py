@@ -0,0 +1,113 @@
+"""Discount evaluation cost of pricing.PricingEngine with 200 active rules on 50-line carts.
+
+Compares three ways to price a cart after one line changes:
+  uncompiled  - build the plan from the rule list for every evaluation
+  full        - reuse the compiled plan but re-price the whole cart
+  incremental - PricingSession.set_line on the changed line, then result()
+
+    python -m benchmarks.bench_pricing --rules 200 --lines 50
+"""
+import argparse
+import random
+import time
+from datetime import datetime, time as clock
+from typing import List
+
+from order_core import Menu
+from pricing import BuyXGetY, ComboDiscount, HappyHour, ItemDiscount, PricingEngine, Rule, ThresholdDiscount
+
+NOW = datetime(2026, 10, 18, 15, 0)
+
+
+def synthetic_rules(menu: Menu, count: int, rng: random.Random) -> List[Rule]:
+    """
+    Build a realistic mix of rule kinds
+    :param menu: menu the rules refer to
+    :param count: number of rules
+    :param rng: random source
+    :return: rules
+    """
+    names = list(menu.drinks)
+    rules: List[Rule] = [ThresholdDiscount(10000 * (k + 1), 5 * (k + 1)) for k in range(4)]
+    while len(rules) < count:
+        kind = rng.random()
+        if kind < 0.5:
+            rules.append(ItemDiscount(rng.choice(names), amount_off=rng.choice([0, 100, 300]),
+                                      percent=rng.choice([0, 5, '7.5'])))
+        elif kind < 0.7:
+            rules.append(BuyXGetY(rng.choice(names), buy=rng.randint(1, 3)))
+        elif kind < 0.9:
+            rules.append(ComboDiscount(tuple(rng.sample(names, rng.randint(2, 3))), rng.choice([300, 500, 1000])))
+        else:
+            start = rng.randint(8, 20)
+            rules.append(HappyHour(clock(start), clock(start + 2), rng.choice([5, 10]),
+                                   tuple(rng.sample(names, 10))))
+    return rules
+
+
+def run(items: int, rules_count: int, lines: int, changes: int) -> None:
+    """
+    Time the three strategies on the same random line changes
+    :param items: menu size
+    :param rules_count: number of active rules
+    :param lines: cart lines
+    :param changes: number of line changes
+    :return: None
+    """
+    rng = random.Random(0)
+    menu = Menu([f"Drink {k:04d}" for k in range(items)], [1000 + 100 * (k % 40) for k in range(items)])
+    rules = synthetic_rules(menu, rules_count, rng)
+    engine = PricingEngine(menu, rules)
+
+    cart = {idx: rng.randint(1, 4) for idx in rng.sample(range(items), lines)}
+    steps = [(idx, rng.randint(1, 6)) for idx in (rng.choice(list(cart)) for _ in range(changes))]
+
+    results = {}
+    timings = {}
+
+    amounts = dict(cart)
+    start = time.perf_counter()
+    out = []
+    for idx, amount in steps[:max(changes // 50, 1)]:
+        amounts[idx] = amount
+        out.append(PricingEngine(menu, rules).price(amounts, NOW))
+    timings['uncompiled'] = (time.perf_counter() - start) / len(out)
+    results['uncompiled'] = out
+
+    amounts = dict(cart)
+    start = time.perf_counter()
+    out = []
+    for idx, amount in steps:
+        amounts[idx] = amount
+        out.append(engine.price(amounts, NOW))
+    timings['full'] = (time.perf_counter() - start) / len(out)
+    results['full'] = out
+
+    session = engine.session()
+    for idx, amount in cart.items():
+        session.set_line(idx, amount)
+    start = time.perf_counter()
+    out = []
+    for idx, amount in steps:
+        session.set_line(idx, amount)
+        out.append(session.result(NOW))
+    timings['incremental'] = (time.perf_counter() - start) / len(out)
+    results['incremental'] = out
+
+    uncompiled = results['uncompiled']
+    if results['full'][:len(uncompiled)] != uncompiled or results['incremental'] != results['full']:
+        raise SystemExit("Pricing strategies disagree.")
+
+    print(f"{rules_count} rules, {lines}-line cart, {items}-item menu")
+    for name, seconds in timings.items():
+        print(f"{name:<12} {seconds * 1e6:10.1f} us per line change")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--rules', type=int, default=200)
+    parser.add_argument('--lines', type=int, default=50)
+    parser.add_argument('--changes', type=int, default=5000)
+    args = parser.parse_args()
+    run(args.items, args.rules, args.lines, args.changes)
@@ -0,0 +1,86 @@
+"""Receipt rendering throughput of receipt.ReceiptRenderer for every output format.
+
+Renders a day's worth of synthetic orders (2-4 lines each) in one batch, the way the
+end-of-day reprint does, and compares plain text against the old string-concatenation
+get_receipt_text body.
+
+    python -m benchmarks.bench_receipt --orders 100000
+"""
+import argparse
+import random
+import time
+from typing import List
+
+from ledger import CompletedOrder
+from receipt import ReceiptRenderer
+
+DRINKS = [("Ice Americano", 2000), ("Cafe Latte", 3000), ("Watermelon Juice", 4900), ("Ice tea", 3500),
+          ("Vanilla Latte", 3800), ("Green Tea Latte", 4200)]
+
+
+def synthetic_orders(count: int) -> List[CompletedOrder]:
+    """
+    Build random orders
+    :param count: number of orders
+    :return: orders
+    """
+    rng = random.Random(0)
+    orders = []
+    for k in range(count):
+        lines = [(name, price, rng.randint(1, 3)) for name, price in rng.sample(DRINKS, rng.randint(2, 4))]
+        total_price = sum(price * amount for _, price, amount in lines)
+        discount = total_price // 10 if total_price >= 10000 else 0
+        orders.append(CompletedOrder(k + 1, lines, total_price, discount, total_price - discount,
+                                     "2026-10-18 12:00:00"))
+    return orders
+
+
+def concat_receipt(order: CompletedOrder) -> str:
+    """
+    The pre-renderer get_receipt_text body, fed from a CompletedOrder
+    :param order: order to render
+    :return: receipt text
+    """
+    receipt_text = f"{'Product':<15} {'Price':<10} {'Amount':<10} {'Subtotal':<10}\n"
+    receipt_text += "-" * 50 + "\n"
+    for drink_name, drink_price, amount in order.lines:
+        receipt_text += f"{drink_name:<15} {drink_price:<10} {amount:<10} {drink_price * amount} won\n"
+    receipt_text += "-" * 50 + "\n"
+    receipt_text += f"{'Total price before discount:':<30} {order.total_price} won\n"
+    if order.discount > 0:
+        receipt_text += f"{'Discount amount:':<30} {order.discount} won\n"
+        receipt_text += f"{'Total price after discount:':<30} {order.final_price} won\n"
+    else:
+        receipt_text += f"{'No discount applied.':<30}\n"
+        receipt_text += f"{'Total price:':<30} {order.total_price:>5} won\n"
+    return receipt_text + '\t' + order.created_at
+
+
+def run(count: int) -> None:
+    """
+    Time every format over the same batch
+    :param count: number of orders
+    :return: None
+    """
+    orders = synthetic_orders(count)
+    renderer = ReceiptRenderer()
+
+    start = time.perf_counter()
+    legacy = [concat_receipt(order) for order in orders]
+    elapsed = time.perf_counter() - start
+    print(f"{'concat (old)':<14} {elapsed:7.3f} s  {count / elapsed:>12,.0f} receipts/s")
+
+    for fmt in ReceiptRenderer.FORMATS:
+        start = time.perf_counter()
+        receipts = renderer.render_many(orders, fmt)
+        elapsed = time.perf_counter() - start
+        print(f"{fmt:<14} {elapsed:7.3f} s  {count / elapsed:>12,.0f} receipts/s")
+        if fmt == 'text' and receipts != legacy:
+            raise SystemExit("Text renderer output differs from the old layout.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=100000)
+    args = parser.parse_args()
+    run(args.orders)
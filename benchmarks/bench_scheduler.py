@@ -0,0 +1,223 @@
+"""Headless check of scheduler.Scheduler, the asyncio thread running the kiosk's side jobs.
+
+Checked, each against a fresh scheduler:
+  * jitter: --samples delays of Job.next_delay stay within interval x (1 +- jitter) and spread over it,
+    and real runs of a short job start on time (lateness p50/p99 reported)
+  * backoff: a failing job waits interval x 2^failures up to max_backoff, and drops back to the
+    interval after its first success
+  * cancellation: a cancelled blocking job never runs again, a cancelled coroutine job is
+    interrupted mid-run, run_now() starts a job at once
+  * bounded concurrency: --jobs blocking jobs all due at once never run more than --concurrency at a
+    time, and the process never has more than the scheduler's thread and its workers extra
+  * Tk bridge: results reach a fake root's after() queue and run on the "Tk" thread; a destroyed
+    window doesn't stop the job
+
+    python -m benchmarks.bench_scheduler --jobs 20 --concurrency 2 --samples 100000
+"""
+import argparse
+import asyncio
+import queue
+import random
+import statistics
+import sys
+import threading
+import time
+from typing import List
+
+from scheduler import Job, Scheduler, TkBridge
+
+
+def check(ok: bool, message: str, errors: List[str]) -> None:
+    print(("  ok    " if ok else "  FAIL  ") + message)
+    if not ok:
+        errors.append(message)
+
+
+def gaps(times: List[float]) -> List[float]:
+    return [b - a for a, b in zip(times, times[1:])]
+
+
+def check_jitter(samples: int, errors: List[str]) -> None:
+    print("jitter")
+    job = Job('jitter', lambda: None, interval=30, jitter=0.2)
+    rng = random.Random(0)
+    delays = [job.next_delay(rng) for _ in range(samples)]
+    check(24 <= min(delays) and max(delays) <= 36,
+          f"{samples} delays of a 30 s job with 20% jitter within 24-36 s (got {min(delays):.2f}-{max(delays):.2f})",
+          errors)
+    check(min(delays) < 25 and max(delays) > 35, "delays spread over the whole jitter range", errors)
+
+    scheduler = Scheduler(seed=1).start()
+    starts: List[float] = []
+    job = scheduler.every('tick', lambda: starts.append(time.perf_counter()), interval=0.02, jitter=0.25)
+    try:
+        time.sleep(1.5)
+    finally:
+        scheduler.stop()
+    intervals = gaps(starts)
+    check(len(intervals) > 20 and statistics.pstdev(intervals) > 0.001,
+          f"{len(starts)} runs of a 20 ms job, gaps {min(intervals) * 1e3:.1f}-{max(intervals) * 1e3:.1f} ms", errors)
+    replay = random.Random(1)  # the same seed draws the same delays
+    late = sorted(gap - job.next_delay(replay) for gap in intervals)
+    print(f"  start lateness p50 {late[len(late) // 2] * 1e3:.2f} ms, p99 {late[int(len(late) * 0.99)] * 1e3:.2f} ms")
+
+
+def check_backoff(errors: List[str]) -> None:
+    print("backoff")
+    scheduler = Scheduler().start()
+    starts: List[float] = []
+    outcomes: List[str] = []
+
+    def flaky() -> str:
+        starts.append(time.monotonic())
+        if len(starts) <= 5:
+            raise ConnectionError("endpoint down")
+        return 'up'
+
+    job = scheduler.every('flaky', flaky, interval=0.02, jitter=0, max_backoff=0.16,
+                          on_result=outcomes.append, on_error=lambda err: outcomes.append(type(err).__name__))
+    try:
+        deadline = time.monotonic() + 3
+        while len(starts) < 8 and time.monotonic() < deadline:
+            time.sleep(0.005)
+    finally:
+        scheduler.stop()
+    expected = [0.04, 0.08, 0.16, 0.16, 0.16, 0.02, 0.02]  # after failure 1..5, then successes
+    got = gaps(starts)[:7]
+    within = len(got) == len(expected) and all(e * 0.9 <= g <= e + 0.03 for g, e in zip(got, expected))
+    check(within, "gaps " + " ".join(f"{g * 1e3:.0f}" for g in got) + " ms, expected "
+          + " ".join(f"{e * 1e3:.0f}" for e in expected), errors)
+    check(outcomes[:6] == ['ConnectionError'] * 5 + ['up'], "errors and results reach the callbacks", errors)
+    check(job.stats.failures == 5 and job.stats.consecutive_failures == 0,
+          f"stats: {job.stats.to_dict()}", errors)
+
+
+def check_cancel(errors: List[str]) -> None:
+    print("cancellation")
+    scheduler = Scheduler().start()
+    try:
+        runs: List[float] = []
+        scheduler.every('blocking', lambda: runs.append(time.monotonic()), interval=0.01, jitter=0)
+        time.sleep(0.1)
+        check(scheduler.cancel('blocking') and not scheduler.cancel('blocking'), "cancel() once per job", errors)
+        time.sleep(0.01)  # let a run already handed to a worker finish
+        seen = len(runs)
+        time.sleep(0.1)
+        check(len(runs) == seen and seen > 0, f"blocking job stopped after {seen} runs", errors)
+
+        stages: List[str] = []
+
+        async def long_job() -> None:
+            stages.append('started')
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                stages.append('cancelled')
+                raise
+            stages.append('finished')
+
+        scheduler.every('coroutine', long_job, interval=60)
+        time.sleep(0.05)
+        start = time.perf_counter()
+        scheduler.cancel('coroutine')
+        time.sleep(0.01)
+        check(stages == ['started', 'cancelled'],
+              f"coroutine job interrupted mid-run ({(time.perf_counter() - start) * 1e3:.1f} ms)", errors)
+
+        woken: List[float] = []
+        scheduler.every('later', lambda: woken.append(time.monotonic()), interval=60, first_delay=60)
+        start = time.monotonic()
+        scheduler.run_now('later')
+        while not woken and time.monotonic() - start < 1:
+            time.sleep(0.001)
+        check(bool(woken), f"run_now() ran a job due in 60 s after {(woken[0] - start) * 1e3 if woken else 0:.1f} ms",
+              errors)
+    finally:
+        scheduler.stop()
+
+
+def check_concurrency(jobs: int, concurrency: int, errors: List[str]) -> None:
+    print("bounded concurrency")
+    baseline = threading.active_count()
+    scheduler = Scheduler(max_concurrency=concurrency).start()
+    lock = threading.Lock()
+    running = [0, 0]  # now, most at once
+    thread_peak = [0]
+
+    def slow() -> None:
+        with lock:
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+            thread_peak[0] = max(thread_peak[0], threading.active_count())
+        time.sleep(0.005)
+        with lock:
+            running[0] -= 1
+
+    try:
+        for k in range(jobs):
+            scheduler.every(f'slow {k}', slow, interval=0.001, jitter=0)
+        time.sleep(1.0)
+        runs = sum(job.stats.runs for job in scheduler.jobs.values())
+    finally:
+        scheduler.stop()
+    check(running[1] <= concurrency, f"{jobs} jobs always due, {runs} runs, at most {running[1]} at once "
+          f"(limit {concurrency})", errors)
+    extra = thread_peak[0] - baseline
+    check(extra <= concurrency + 1, f"{extra} threads added (at most the scheduler thread + {concurrency} workers)", errors)
+
+
+class FakeRoot:
+    """Stands in for tk.Tk: after() queues the callback for the thread running mainloop()."""
+
+    def __init__(self) -> None:
+        self.calls: "queue.Queue" = queue.Queue()
+        self.destroyed = False
+
+    def after(self, ms: int, fn) -> None:
+        if self.destroyed:
+            raise RuntimeError("main thread is not in main loop")
+        self.calls.put(fn)
+
+    def mainloop(self, seconds: float) -> None:
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            try:
+                self.calls.get(timeout=0.005)()
+            except queue.Empty:
+                pass
+
+
+def check_bridge(errors: List[str]) -> None:
+    print("Tk bridge")
+    root = FakeRoot()
+    bridge = TkBridge(root)
+    label: List[tuple] = []
+    scheduler = Scheduler().start()
+    try:
+        job = scheduler.every('weather', lambda: 'Incheon: +18C', interval=0.02,
+                              on_result=bridge.wrap(lambda text: label.append((text, threading.current_thread()))))
+        root.mainloop(0.2)
+        check(bool(label) and all(thread is threading.main_thread() for _, thread in label),
+              f"{len(label)} results shown on the Tk thread", errors)
+        root.destroyed = True
+        runs = job.stats.runs
+        time.sleep(0.1)
+        check(job.stats.runs > runs and root.calls.empty(), "job keeps running after the window is gone", errors)
+    finally:
+        scheduler.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=20, help='jobs due at once in the concurrency check')
+    parser.add_argument('--concurrency', type=int, default=2, help='scheduler max_concurrency')
+    parser.add_argument('--samples', type=int, default=100000, help='jitter samples')
+    args = parser.parse_args()
+    problems: List[str] = []
+    check_jitter(args.samples, problems)
+    check_backoff(problems)
+    check_cancel(problems)
+    check_concurrency(args.jobs, args.concurrency, problems)
+    check_bridge(problems)
+    print(f"{len(problems)} problems" if problems else "all checks passed")
+    sys.exit(1 if problems else 0)
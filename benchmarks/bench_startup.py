@@ -0,0 +1,128 @@
+"""Start-up cost of the kiosk: import time per module and cold start to the first painted frame.
+
+Every measurement runs in a fresh interpreter, like a kiosk that was just rebooted.
+  imports     python -X importtime -c "import <module>" for each --modules entry; the best run's
+              tree is summed per top-level package and its slowest imports are listed
+  cold start  from spawning python until KioskGUI is built and Tk has painted its first frame
+              (root.update()), against a bare interpreter; needs a display, skipped without one
+
+    python -m benchmarks.bench_startup --runs 5 --modules order_core,kiosk,order_service
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+FIRST_FRAME = """
+import os, sys
+from kiosk import KioskGUI
+import tkinter as tk
+try:
+    root = tk.Tk()
+except tk.TclError as err:
+    print('no display:', err, flush=True)
+    sys.exit(0)
+KioskGUI(root, ["Ice Americano", "Cafe Latte", "Watermelon Juice", "Ice tea"], [2000, 3000, 4900, 3500])
+root.update()
+print('painted', flush=True)
+os._exit(0)  # don't wait for the weather fetch or the ledger thread
+"""
+
+
+def child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return env
+
+
+def parse_importtime(stderr: str, module: str) -> List[Tuple[int, int, str, int]]:
+    """
+    Import tree of one module from -X importtime output
+    :param stderr: output of python -X importtime -c "import module"
+    :param module: top-level module that was imported
+    :return: (self us, cumulative us, name, depth) of the module and everything it imported, module last
+    """
+    entries = []
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            entries.append((int(match.group(1)), int(match.group(2)), match.group(4), len(match.group(3)) // 2))
+    # children are printed before their parent: the module's tree is everything after the previous top-level line
+    end = max(k for k, entry in enumerate(entries) if entry[2] == module and entry[3] == 0)
+    start = end
+    while start > 0 and entries[start - 1][3] > 0:
+        start -= 1
+    return entries[start:end + 1]
+
+
+def import_report(module: str, runs: int, top: int) -> None:
+    trees = []
+    for _ in range(runs):
+        done = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=ROOT,
+                              env=child_env(), capture_output=True, text=True, check=True)
+        trees.append(parse_importtime(done.stderr, module))
+    tree = min(trees, key=lambda entries: entries[-1][1])
+    total = tree[-1][1]
+    print(f"import {module}: best {total / 1e3:.1f} ms, median "
+          f"{statistics.median(t[-1][1] for t in trees) / 1e3:.1f} ms over {runs} runs")
+
+    packages: Dict[str, int] = defaultdict(int)
+    for self_us, _, name, _ in tree:
+        packages[name.split('.')[0]] += self_us
+    print("  by package: " + ", ".join(f"{name} {us / 1e3:.1f} ms" for name, us in
+                                        sorted(packages.items(), key=lambda item: -item[1])[:top]))
+    direct = [entry for entry in tree if entry[3] == 1]
+    print("  direct imports: " + ", ".join(f"{name} {cumulative / 1e3:.1f} ms" for _, cumulative, name, _ in
+                                            sorted(direct, key=lambda entry: -entry[1])[:top]))
+
+
+def time_to_line(args: List[str], cwd: str) -> Tuple[float, str]:
+    """
+    Seconds from spawning a process until it prints its first line
+    :param args: command line
+    :param cwd: working directory
+    :return: seconds and the line
+    """
+    start = time.perf_counter()
+    with subprocess.Popen(args, cwd=cwd, env=child_env(), stdout=subprocess.PIPE, text=True) as proc:
+        line = proc.stdout.readline().strip()
+        elapsed = time.perf_counter() - start
+        proc.wait()
+    return elapsed, line
+
+
+def cold_start(runs: int) -> None:
+    bare = [time_to_line([sys.executable, '-c', 'print("up", flush=True)'], ROOT)[0] for _ in range(runs)]
+    print(f"bare interpreter: median {statistics.median(bare) * 1e3:.1f} ms")
+    frames = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as tmp:  # journal, ledger and weather cache start empty
+            elapsed, line = time_to_line([sys.executable, '-c', FIRST_FRAME], tmp)
+        if line != 'painted':
+            print(f"cold start to first frame: skipped ({line or 'no output'})")
+            return
+        frames.append(elapsed)
+    print(f"cold start to first frame: median {statistics.median(frames) * 1e3:.1f} ms, "
+          f"best {min(frames) * 1e3:.1f} ms ({(statistics.median(frames) - statistics.median(bare)) * 1e3:.1f} ms "
+          f"above the bare interpreter)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--modules', default='order_core,kiosk,order_service', help='comma-separated modules')
+    parser.add_argument('--top', type=int, default=6, help='entries listed per summary line')
+    args = parser.parse_args()
+    for name in args.modules.split(','):
+        import_report(name, args.runs, args.top)
+    cold_start(args.runs)
@@ -0,0 +1,96 @@
+"""Orders/second with the old per-order connection versus the shared pool.
+
+"before" replays what OrderProcessor used to do for every order: open queue_number.db,
+run the create table DDL, read-then-update the ticket counter, commit and close.
+"after" builds an OrderProcessor per order the way KioskGUI.reset_order does,
+which now only borrows a pooled connection for the ticket.
+
+    python -m benchmarks.bench_storage --orders 2000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from order_core import Menu, OrderProcessor
+from ticket import TicketAllocator
+
+MENU_DRINKS = ["Ice Americano", "Cafe Latte", "Watermelon Juice", "Ice tea"]
+MENU_PRICES = [2000, 3000, 4900, 3500]
+
+
+def legacy_order(db_path: str) -> int:
+    """
+    One order with the pre-pool storage pattern
+    :param db_path: database to use
+    :return: ticket number
+    """
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+    cur.execute('''
+        create table if not exists ticket (
+        id integer primary key autoincrement,
+        number integer not null
+        )
+    ''')
+    conn.commit()
+
+    cur.execute('select number from ticket order by number desc limit 1')
+    result = cur.fetchone()
+    if result is None:
+        number = 1
+        cur.execute('insert into ticket (number) values (?)', (number,))
+    else:
+        number = result[0] + 1
+        cur.execute('update ticket set number = ? where id = (select id from ticket order by id desc limit 1)',
+                    (number,))
+    conn.commit()
+    conn.close()
+    return number
+
+
+def pooled_order(menu: Menu, allocator: TicketAllocator) -> int:
+    """
+    One order through OrderProcessor backed by the shared pool
+    :param menu: menu to order from
+    :param allocator: ticket allocator on the benchmark database
+    :return: ticket number
+    """
+    order_processor = OrderProcessor(menu, allocator)
+    order_processor.process_order(0)
+    order_processor.process_order(1)
+    return order_processor.get_next_ticket_number()
+
+
+def run(orders: int) -> None:
+    """
+    Time both variants and print orders/second
+    :param orders: number of orders per variant
+    :return: None
+    """
+    menu = Menu(MENU_DRINKS, MENU_PRICES)
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = os.path.join(tmp, 'legacy.db')
+        start = time.perf_counter()
+        for _ in range(orders):
+            legacy_order(legacy_db)
+        before = orders / (time.perf_counter() - start)
+
+        allocator = TicketAllocator(os.path.join(tmp, 'pooled.db'))
+        start = time.perf_counter()
+        for _ in range(orders):
+            pooled_order(menu, allocator)
+        after = orders / (time.perf_counter() - start)
+
+    print(f"{'Orders per variant:':<25} {orders}")
+    print(f"{'Before (connect/order):':<25} {before:,.0f} orders/s")
+    print(f"{'After (shared pool):':<25} {after:,.0f} orders/s")
+    print(f"{'Speed-up:':<25} {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=2000)
+    args = parser.parse_args()
+    run(args.orders)
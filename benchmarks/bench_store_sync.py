@@ -0,0 +1,171 @@
+"""Daily store list crawls: full CSV rewrite versus store_sync.StoreSyncSink writing only the diff.
+
+Synthetic crawls of --stores stores split over --pages pages are fed straight to the sinks (no
+HTTP), as crawler.PageCrawler would. Day 1 fills an empty index, day 2 repeats the same list, day
+3 changes, adds and removes --churn of the stores, day 4 gets an empty page (an error page or a
+new layout) and must delete nothing. Branches sharing a name must be kept apart, and new stores
+must not raise the deletion limit. The counts and the exported store list are
+checked against what was generated. Finally the first --parse-stores stores are rendered as
+--pages HTML pages, then parsed and hashed on the calling thread and on --parse-workers
+processes, the way sync_hollys(parse_workers) spreads them.
+
+    python -m benchmarks.bench_store_sync --stores 200000 --pages 40 --churn 0.01 --parse-stores 20000 --parse-workers 4
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from crawler import HOLLYS_COLUMNS, CsvSink, Row
+from store_sync import CHANGED, DELETED, INSERTED, StoreIndex, StoreSyncSink, parse_hashed_hollys_page
+
+
+def synthetic_stores(count: int) -> Dict[str, Row]:
+    return {f"매장 {k:06d}": [f"매장 {k:06d}", f"인천 남구 {k // 100}-{k % 100}", f"032-{k // 10000:03d}-{k % 10000:04d}",
+                             "2026-10-18 09:00:00"] for k in range(count)}
+
+
+def churn(stores: Dict[str, Row], fraction: float, rng: random.Random) -> Dict[str, int]:
+    """
+    Change, add and remove fraction of the stores each, in place
+    :param stores: name -> row
+    :param fraction: share of the stores touched by each kind of change
+    :param rng: random source
+    :return: expected change counts
+    """
+    n = int(len(stores) * fraction)
+    names = rng.sample(sorted(stores), 2 * n)
+    for name in names[:n]:
+        stores[name] = [name, stores[name][1], "032-999-" + name[-4:], "2026-10-20 09:00:00"]
+    for name in names[n:]:
+        del stores[name]
+    for k in range(n):
+        name = f"신규 {k:06d}"
+        stores[name] = [name, f"서울 중구 {k}", f"02-000-{k:04d}", "2026-10-20 09:00:00"]
+    return {INSERTED: n, CHANGED: n, DELETED: n}
+
+
+def paged(stores: Dict[str, Row], pages: int) -> List[List[Row]]:
+    rows = list(stores.values())
+    size = -(-len(rows) // pages)
+    return [rows[k:k + size] for k in range(0, len(rows), size)]
+
+
+def full_rewrite(path: str, pages: List[List[Row]]) -> float:
+    start = time.perf_counter()
+    if os.path.exists(path):
+        os.remove(path)
+    sink = CsvSink(path, HOLLYS_COLUMNS)
+    for page, rows in enumerate(pages):
+        sink.write(page, rows)
+    sink.close()
+    return time.perf_counter() - start
+
+
+def html_page(rows: List[Row]) -> bytes:
+    cells = "".join(f"<tr><td>0</td><td>{name}</td><td>인천</td><td>{address}</td><td>영업중</td><td>{phone}</td></tr>"
+                    for name, address, phone, _ in rows)
+    return f"<html><body><table><tbody>{cells}</tbody></table></body></html>".encode('utf-8')
+
+
+def sync(index_path: str, changes_path: str, pages: List[List[Row]]) -> tuple:
+    start = time.perf_counter()
+    sink = StoreSyncSink(index_path, changes_path)
+    try:
+        for page, rows in enumerate(pages):
+            sink.write(page, rows)
+        sink.finish()
+    finally:
+        sink.close()
+    return time.perf_counter() - start, sink.counts
+
+
+def run(stores_count: int, pages_count: int, fraction: float, parse_stores: int, parse_workers: int) -> None:
+    rng = random.Random(0)
+    stores = synthetic_stores(stores_count)
+    with tempfile.TemporaryDirectory() as tmp:
+        index_path = os.path.join(tmp, 'holly.index.db')
+        changes_path = os.path.join(tmp, 'holly.changes.csv')
+        csv_path = os.path.join(tmp, 'holly.csv')
+
+        expected = {INSERTED: stores_count, CHANGED: 0, DELETED: 0}
+        for day in (1, 2, 3):
+            if day == 2:
+                expected = {INSERTED: 0, CHANGED: 0, DELETED: 0}
+            if day == 3:
+                expected = churn(stores, fraction, rng)
+            pages = paged(stores, pages_count)
+            rewrite = full_rewrite(csv_path, pages)
+            elapsed, counts = sync(index_path, changes_path, pages)
+            written = counts[INSERTED] + counts[CHANGED] + counts[DELETED]
+            print(f"day {day}: full rewrite {rewrite:6.2f} s ({len(stores)} rows)   "
+                  f"sync {elapsed:6.2f} s ({written} rows written: {counts[INSERTED]} inserted, "
+                  f"{counts[CHANGED]} changed, {counts[DELETED]} deleted)")
+            if {key: counts[key] for key in expected} != expected:
+                raise SystemExit(f"Day {day}: expected {expected}, got {counts}.")
+
+        pages = paged(stores, pages_count)
+        lost = len(pages[-1])
+        pages[-1] = []
+        _, counts = sync(index_path, changes_path, pages)
+        if counts[DELETED] or counts.get('deletions_skipped') != lost:
+            raise SystemExit(f"Day 4: an empty page deleted stores: {counts}.")
+        print(f"day 4: last page empty, {lost} deletions skipped")
+
+        branches = [["매장 A", "인천 남구 1", "032-1", "t"], ["매장 A", "서울 중구 2", "02-2", "t"], ["매장 A", "인천 남구 1", "032-1", "t"]]
+        _, counts = sync(os.path.join(tmp, 'branches.db'), None, [branches])
+        if counts[INSERTED] != 2 or counts['duplicate'] != 1:
+            raise SystemExit(f"Branches sharing a name were not kept apart: {counts}.")
+        print("two branches of one name kept, the repeated row counted as a duplicate")
+
+        # half of 10 known stores gone, 100 new ones: the limit applies to the 10 known before the crawl
+        small_path = os.path.join(tmp, 'small.db')
+        old = [[f"기존 {k}", f"인천 {k}", "032", "t"] for k in range(10)]
+        sync(small_path, None, [old])
+        _, counts = sync(small_path, None, [old[:5] + [[f"신규 {k}", f"서울 {k}", "02", "t"] for k in range(100)]])
+        if counts[DELETED] or counts.get('deletions_skipped') != 5:
+            raise SystemExit(f"New stores raised the deletion limit: {counts}.")
+        print("5 of 10 known stores missing next to 100 new ones: deletions skipped")
+
+        export_path = os.path.join(tmp, 'export.csv')
+        index = StoreIndex(index_path)
+        index.export_csv(export_path, HOLLYS_COLUMNS)
+        index.close()
+        with open(export_path, newline='', encoding='cp949') as fp:
+            exported = {row[0]: row[:3] for row in list(csv.reader(fp))[1:]}
+        if exported != {name: row[:3] for name, row in stores.items()}:
+            raise SystemExit("Exported store list differs from the last crawl.")
+        print(f"index export matches the last crawl ({len(exported)} stores)")
+
+    sample = dict(list(stores.items())[:parse_stores])
+    html = [html_page(rows) for rows in paged(sample, pages_count)]
+    start = time.perf_counter()
+    inline = [parse_hashed_hollys_page(page) for page in html]
+    print(f"parse + hash {len(sample)} stores in {len(html)} pages: inline {time.perf_counter() - start:.2f} s", end='')
+    if parse_workers:
+        with ProcessPoolExecutor(parse_workers) as pool:
+            list(pool.map(abs, range(parse_workers)))  # start the workers outside the timing
+            start = time.perf_counter()
+            pooled = list(pool.map(parse_hashed_hollys_page, html))
+            print(f", {parse_workers} processes {time.perf_counter() - start:.2f} s", end='')
+        def stable(pages: List[List[Row]]) -> List[Row]:
+            return [row[:3] + row[4:] for rows in pages for row in rows]  # without the crawl time
+
+        if stable(pooled) != stable(inline):
+            raise SystemExit("Pooled parsing and hashing disagree.")
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stores', type=int, default=200000)
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--churn', type=float, default=0.01, help='share of stores changed, added and removed')
+    parser.add_argument('--parse-stores', type=int, default=20000, help='stores parsed from HTML in the last step')
+    parser.add_argument('--parse-workers', type=int, default=4)
+    args = parser.parse_args()
+    run(args.stores, args.pages, args.churn, args.parse_stores, args.parse_workers)
@@ -0,0 +1,80 @@
+"""Stress benchmark for ticket.TicketAllocator.
+
+Spawns concurrent writers, each with its own allocator, on a throw-away database.
+Thread writers share their process's connection pool; use --processes to give every
+writer its own connections. Afterwards it checks that no number was handed out twice.
+
+    python -m benchmarks.bench_ticket --writers 16 --tickets 2000 --block-size 1
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from typing import List
+
+from ticket import TicketAllocator
+
+
+def allocate(db_path: str, tickets: int, block_size: int) -> List[int]:
+    """
+    Draw tickets from a fresh allocator
+    :param db_path: database shared by all writers
+    :param tickets: how many numbers to draw
+    :param block_size: allocator block size
+    :return: the numbers that were handed out
+    """
+    allocator = TicketAllocator(db_path, block_size)
+    return [allocator.next_number() for _ in range(tickets)]
+
+
+def run(writers: int, tickets: int, block_size: int, use_processes: bool) -> None:
+    """
+    Run the stress test and print throughput and duplicate count
+    :param writers: number of concurrent writers
+    :param tickets: tickets drawn per writer
+    :param block_size: allocator block size
+    :param use_processes: use processes instead of threads as writers
+    :return: None
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'queue_number.db')
+
+        start = time.perf_counter()
+        if use_processes:
+            with multiprocessing.Pool(writers) as pool:
+                results = pool.starmap(allocate, [(db_path, tickets, block_size)] * writers)
+        else:
+            results = [[] for _ in range(writers)]
+
+            def worker(slot: int) -> None:
+                results[slot] = allocate(db_path, tickets, block_size)
+
+            threads = [threading.Thread(target=worker, args=(k,)) for k in range(writers)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        elapsed = time.perf_counter() - start
+
+    numbers = [n for result in results for n in result]
+    duplicates = len(numbers) - len(set(numbers))
+    print(f"{'Writers:':<20} {writers} ({'processes' if use_processes else 'threads'})")
+    print(f"{'Block size:':<20} {block_size}")
+    print(f"{'Tickets issued:':<20} {len(numbers)}")
+    print(f"{'Elapsed:':<20} {elapsed:.3f} s")
+    print(f"{'Throughput:':<20} {len(numbers) / elapsed:,.0f} tickets/s")
+    print(f"{'Duplicates:':<20} {duplicates}")
+    if duplicates:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=16)
+    parser.add_argument('--tickets', type=int, default=2000, help='tickets per writer')
+    parser.add_argument('--block-size', type=int, default=1)
+    parser.add_argument('--processes', action='store_true', help='use processes instead of threads')
+    args = parser.parse_args()
+    run(args.writers, args.tickets, args.block_size, args.processes)
@@ -0,0 +1,198 @@
+"""Single-flight check for the weather cache against a local stub server.
+
+Starts an HTTP server on localhost that answers like wttr.in (slowly), then has many
+threads hammer the add_to_order weather path (should_update + update_weather_async)
+and reports how many requests actually reached the server. Works offline.
+
+Then checks weather_cache.WeatherCache directly with a controllable fetch: a stale value is served
+while a refresh is in flight (stale-while-revalidate), concurrent refresh() calls share one fetch
+(single-flight), a failed fetch keeps the last value, a new cache reloads the snapshot from disk
+and ignores a damaged one, and a fetch interrupted by a BaseException doesn't leave the cache
+stuck as refreshing. Exits non-zero if any check fails.
+
+    python -m benchmarks.bench_weather --threads 16 --clicks 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+from weather import WeatherManager
+from weather_cache import WeatherCache
+
+
+class StubWeatherHandler(BaseHTTPRequestHandler):
+    """Answers every GET with a fixed one-line forecast after a short delay."""
+    hits = 0
+    hits_lock = threading.Lock()
+    delay = 0.2
+
+    def do_GET(self) -> None:
+        with StubWeatherHandler.hits_lock:
+            StubWeatherHandler.hits += 1
+        time.sleep(self.delay)
+        body = "incheon: ☀️ +18°C".encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def run(threads: int, clicks: int) -> List[str]:
+    """
+    Hammer the weather path and count upstream requests
+    :param threads: concurrent clicking threads
+    :param clicks: clicks per thread
+    :return: problems found
+    """
+    errors: List[str] = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubWeatherHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/incheon?format=4"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = os.path.join(tmp, 'weather_cache.json')
+        manager = WeatherManager(url, update_interval=30, snapshot_path=snapshot)
+        updates = []
+
+        def click() -> None:
+            for _ in range(clicks):
+                if manager.should_update():
+                    manager.update_weather_async(updates.append)
+
+        start = time.perf_counter()
+        workers = [threading.Thread(target=click) for _ in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        manager.cache.wait()  # let the in-flight fetch finish
+        elapsed = time.perf_counter() - start
+
+        restarted = WeatherManager(url, update_interval=30, snapshot_path=snapshot)
+        server.shutdown()
+
+    print(f"{'Clicks:':<28} {threads * clicks} from {threads} threads in {elapsed:.2f} s")
+    print(f"{'Requests reaching server:':<28} {StubWeatherHandler.hits}")
+    print(f"{'Weather shown:':<28} {manager.current_weather}")
+    print(f"{'After restart (from disk):':<28} {restarted.current_weather} "
+          f"(refresh needed: {restarted.should_update()})")
+    if StubWeatherHandler.hits != 1:
+        errors.append(f"{StubWeatherHandler.hits} requests reached the server, expected 1")
+    if restarted.current_weather != manager.current_weather or restarted.should_update():
+        errors.append("the restarted manager didn't show the snapshot")
+    return errors
+
+
+class GatedFetch:
+    """Fetch stand-in that returns the next value only once the check opens the gate."""
+
+    def __init__(self) -> None:
+        self.value = 'v1'
+        self.calls = 0
+        self.error: Optional[BaseException] = None
+        self.started = threading.Event()
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self) -> str:
+        self.calls += 1
+        self.started.set()
+        self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def check_cache(threads: int) -> List[str]:
+    """
+    Check stale-while-revalidate, single-flight, snapshots and interrupted fetches
+    :param threads: concurrent refresh() callers in the single-flight check
+    :return: problems found
+    """
+    errors: List[str] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = os.path.join(tmp, 'weather_cache.json')
+        fetch = GatedFetch()
+        cache = WeatherCache(fetch, ttl=0.05, stale_ttl=60, snapshot_path=snapshot, retry_interval=0)
+        if cache.refresh() != 'v1' or not cache.is_fresh():
+            errors.append("first refresh didn't store the value")
+
+        # stale-while-revalidate: the old value stays up while the new one is fetched
+        time.sleep(0.1)
+        fetch.value, fetch.calls = 'v2', 0
+        fetch.gate.clear()
+        fetch.started.clear()
+        if not cache.needs_refresh() or not cache.refresh_async():
+            errors.append("an expired value didn't start a refresh")
+        fetch.started.wait(5)
+        if cache.value != 'v1' or cache.is_fresh() or not cache.is_usable():
+            errors.append(f"stale value not served during the refresh (got {cache.value!r})")
+        if cache.needs_refresh() or cache.refresh_async():
+            errors.append("a second refresh started while one was in flight")
+
+        # single-flight: blocking refresh() callers wait for the fetch already running
+        results: List[str] = []
+        callers = [threading.Thread(target=lambda: results.append(cache.refresh())) for _ in range(threads)]
+        for t in callers:
+            t.start()
+        time.sleep(0.05)
+        fetch.gate.set()
+        for t in callers:
+            t.join(5)
+        if not cache.wait(5) or fetch.calls != 1:
+            errors.append(f"{fetch.calls} fetches for one refresh and {threads} waiting callers")
+        if results != ['v2'] * threads or cache.value != 'v2':
+            errors.append(f"waiting callers got {sorted(set(results))}, expected ['v2']")
+        print(f"{'Stale while revalidating:':<28} {threads} callers shared {fetch.calls} fetch")
+
+        # a failed fetch keeps the last value and records the error
+        time.sleep(0.1)
+        fetch.error = OSError("upstream down")
+        cache.refresh()
+        if cache.value != 'v2' or not isinstance(cache.last_error, OSError) or not cache.is_usable():
+            errors.append("a failed fetch dropped the cached value")
+
+        # snapshot: a new cache on the same file starts with the last successful value
+        reloaded = WeatherCache(fetch, ttl=30, snapshot_path=snapshot)
+        if reloaded.value != 'v2' or reloaded.fetched_at != cache.fetched_at or reloaded.needs_refresh():
+            errors.append(f"snapshot reloaded as {reloaded.value!r}, expected 'v2'")
+        with open(snapshot, 'w', encoding='utf-8') as fp:
+            fp.write('{"value": "v')
+        if WeatherCache(fetch, snapshot_path=snapshot).value is not None:
+            errors.append("a damaged snapshot was loaded")
+        print(f"{'Snapshot after restart:':<28} {reloaded.value} (refresh needed: {reloaded.needs_refresh()})")
+
+        # a BaseException out of fetch must not leave the cache marked as refreshing
+        fetch.error = KeyboardInterrupt()
+        try:
+            cache.refresh()
+            errors.append("KeyboardInterrupt from fetch was swallowed")
+        except KeyboardInterrupt:
+            pass
+        fetch.error = None
+        fetch.value = 'v3'
+        if not cache.wait(0) or cache.refresh() != 'v3':
+            errors.append("the cache stayed stuck refreshing after an interrupted fetch")
+        print(f"{'After interrupted fetch:':<28} {cache.value}")
+    return errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--clicks', type=int, default=500)
+    args = parser.parse_args()
+    problems = run(args.threads, args.clicks) + check_cache(args.threads)
+    for problem in problems:
+        print("  " + problem)
+    print(f"{len(problems)} problems" if problems else "all checks passed")
+    sys.exit(1 if problems else 0)
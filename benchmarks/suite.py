@@ -0,0 +1,316 @@
+"""Benchmark suite of the kiosk hot paths, with saved results and regression comparison.
+
+Every case runs at each menu size and cart size (where they matter) and reports nanoseconds
+per operation: the best and the median of --repeats timing runs, each long enough to last at
+least --min-time seconds. The best run is compared, as it is the least disturbed by noise.
+
+Cases:
+  menu_lookup           Menu.get_price + get_drink_name of a random item
+  menu_index_of         Menu.index_of of a random name
+  process_order         OrderProcessor.process_order over the cart lines
+  receipt_text          OrderProcessor.get_receipt_text of a filled cart
+  discount_eval         PricingSession.set_line + result with 200 rules
+  ticket_concurrent     TicketAllocator.next_number from 8 threads on a temporary database
+  update_order_display  KioskGUI.update_order_display after one click, on a headless text widget
+
+    python -m benchmarks.suite run --output before.json
+    python -m benchmarks.suite run --output after.json --filter process_order,receipt
+    python -m benchmarks.suite compare before.json after.json --threshold 10
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from benchmarks.bench_cart_view import TextBuffer
+from benchmarks.bench_pricing import NOW, synthetic_rules
+from cart_view import CartViewModel
+from kiosk import KioskGUI
+from order_core import Menu, OrderProcessor
+from pricing import PricingEngine
+from ticket import TicketAllocator
+
+MENU_SIZES = [4, 100, 1000]
+CART_SIZES = [1, 10, 50]
+TICKET_WRITERS = 8
+TICKETS_PER_WRITER = 50
+
+# case name -> (factory, size parameters it depends on, smallest menu); a factory is a generator yielding
+# (operation, operations per call) once the case is set up, and cleaning up when closed
+CASES: Dict[str, Tuple[Callable[..., Iterator[Tuple[Callable[[], None], int]]], Tuple[str, ...], int]] = {}
+
+
+def case(*params: str, min_items: int = 1):
+    """
+    Register a benchmark case
+    :param params: size parameters of the case, among 'items' and 'lines'
+    :param min_items: smallest menu the case can run on
+    :return: decorator
+    """
+    def register(factory):
+        CASES[factory.__name__] = (factory, params, min_items)
+        return factory
+    return register
+
+
+def build_menu(items: int) -> Menu:
+    return Menu([f"Drink {k:05d}" for k in range(items)], [1000 + 100 * (k % 40) for k in range(items)])
+
+
+def filled_processor(items: int, lines: int) -> OrderProcessor:
+    processor = OrderProcessor(build_menu(items))
+    for idx in random.Random(0).sample(range(items), min(lines, items)):
+        processor.process_order(idx)
+    return processor
+
+
+@case('items')
+def menu_lookup(items: int):
+    menu = build_menu(items)
+    rng = random.Random(1)
+    picks = [rng.randrange(items) for _ in range(1000)]
+
+    def op():
+        for idx in picks:
+            menu.get_price(idx)
+            menu.get_drink_name(idx)
+    yield op, len(picks)
+
+
+@case('items')
+def menu_index_of(items: int):
+    menu = build_menu(items)
+    rng = random.Random(1)
+    names = [menu.get_drink_name(rng.randrange(items)) for _ in range(1000)]
+
+    def op():
+        for name in names:
+            menu.index_of(name)
+    yield op, len(names)
+
+
+@case('items', 'lines')
+def process_order(items: int, lines: int):
+    processor = OrderProcessor(build_menu(items))
+    rng = random.Random(1)
+    cart = rng.sample(range(items), min(lines, items))
+    picks = [rng.choice(cart) for _ in range(1000)]
+
+    def op():
+        processor.reset()
+        for idx in picks:
+            processor.process_order(idx)
+    yield op, len(picks)
+
+
+@case('items', 'lines')
+def receipt_text(items: int, lines: int):
+    processor = filled_processor(items, lines)
+    yield processor.get_receipt_text, 1
+
+
+@case('items', 'lines', min_items=10)  # the synthetic happy hours cover 10 drinks
+def discount_eval(items: int, lines: int):
+    menu = build_menu(items)
+    engine = PricingEngine(menu, synthetic_rules(menu, 200, random.Random(0)))
+    rng = random.Random(1)
+    cart = rng.sample(range(items), min(lines, items))
+    session = engine.session()
+    for idx in cart:
+        session.set_line(idx, 1)
+    steps = [(rng.choice(cart), rng.randint(1, 6)) for _ in range(100)]
+
+    def op():
+        for idx, amount in steps:
+            session.set_line(idx, amount)
+            session.result(NOW)
+    yield op, len(steps)
+
+
+@case()
+def ticket_concurrent():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'queue_number.db')
+        TicketAllocator(db_path).next_number()  # create the schema outside the timed runs
+
+        def writer():
+            allocator = TicketAllocator(db_path)
+            for _ in range(TICKETS_PER_WRITER):
+                allocator.next_number()
+
+        def op():
+            threads = [threading.Thread(target=writer) for _ in range(TICKET_WRITERS)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        yield op, TICKET_WRITERS * TICKETS_PER_WRITER
+
+
+class HeadlessText(TextBuffer):
+    """tk.Text stand-in accepting the state toggling of update_order_display"""
+
+    def config(self, **options) -> None:
+        pass
+
+
+@case('items', 'lines')
+def update_order_display(items: int, lines: int):
+    processor = filled_processor(items, lines)
+    view = CartViewModel(processor)
+    gui = SimpleNamespace(order_text=HeadlessText(), cart_view=view)
+    KioskGUI.update_order_display(gui)
+    picks = list(processor.amounts)
+    rng = random.Random(1)
+    clicks = [rng.choice(picks) for _ in range(100)]
+
+    def op():
+        for idx in clicks:
+            view.mark_dirty(processor.process_order(idx))
+            KioskGUI.update_order_display(gui)
+    yield op, len(clicks)
+
+
+def parameter_grid(params: Tuple[str, ...], min_items: int, menu_sizes: List[int],
+                   cart_sizes: List[int]) -> List[Dict[str, int]]:
+    grid = [{}]
+    if 'items' in params:
+        grid = [dict(g, items=n) for g in grid for n in menu_sizes if n >= min_items]
+    if 'lines' in params:
+        grid = [dict(g, lines=n) for g in grid for n in cart_sizes if n <= g.get('items', n)]
+    return grid
+
+
+def case_id(name: str, sizes: Dict[str, int]) -> str:
+    return name + (f"[{','.join(f'{k}={v}' for k, v in sizes.items())}]" if sizes else '')
+
+
+def measure(op: Callable[[], None], per_call: int, repeats: int, min_time: float) -> Dict[str, float]:
+    """
+    Time an operation
+    :param op: operation to call
+    :param per_call: operations done by one call
+    :param repeats: timing runs
+    :param min_time: shortest duration of a timing run, seconds
+    :return: best and median ns per operation, calls per run
+    """
+    number = 1
+    while True:  # calibrate (doubles as warm-up)
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        if time.perf_counter() - start >= min_time:
+            break
+        number *= 2
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            op()
+        runs.append((time.perf_counter_ns() - start) / (number * per_call))
+    return {'best_ns': min(runs), 'median_ns': statistics.median(runs), 'calls': number, 'repeats': repeats}
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run(args: argparse.Namespace) -> None:
+    wanted = [f for f in args.filter.split(',') if f] if args.filter else []
+    results = {}
+    for name, (factory, params, min_items) in CASES.items():
+        if wanted and not any(f in name for f in wanted):
+            continue
+        for sizes in parameter_grid(params, min_items, args.menu_sizes, args.cart_sizes):
+            setup = factory(**sizes)
+            try:
+                op, per_call = next(setup)
+                result = measure(op, per_call, args.repeats, args.min_time)
+            finally:
+                setup.close()
+            key = case_id(name, sizes)
+            results[key] = result
+            print(f"{key:<44} {result['best_ns']:>12,.0f} ns/op  (median {result['median_ns']:,.0f})")
+
+    report = {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            json.dump(report, fp, indent=2)
+        print(f"Saved {len(results)} results to {args.output}")
+
+
+def compare(args: argparse.Namespace) -> None:
+    with open(args.baseline, encoding='utf-8') as fp:
+        baseline = json.load(fp)
+    with open(args.current, encoding='utf-8') as fp:
+        current = json.load(fp)
+    print(f"baseline {baseline['meta']['revision']} ({baseline['meta']['created_at']}) vs "
+          f"current {current['meta']['revision']} ({current['meta']['created_at']})")
+    regressions = 0
+    for key in sorted(set(baseline['results']) | set(current['results'])):
+        old, new = baseline['results'].get(key), current['results'].get(key)
+        if old is None or new is None:
+            print(f"{key:<44} {'only in ' + ('current' if old is None else 'baseline'):>40}")
+            continue
+        change = (new[args.metric] - old[args.metric]) / old[args.metric] * 100
+        flag = ''
+        if change > args.threshold:
+            flag = 'REGRESSION'
+            regressions += 1
+        elif change < -args.threshold:
+            flag = 'faster'
+        print(f"{key:<44} {old[args.metric]:>12,.0f} {new[args.metric]:>12,.0f} ns/op {change:+7.1f}%  {flag}")
+    print(f"{regressions} regression(s) above {args.threshold:g}%")
+    if regressions:
+        sys.exit(1)
+
+
+def sizes(text: str) -> List[int]:
+    return [int(n) for n in text.split(',') if n]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the suite')
+    run_parser.add_argument('--output', '-o', help='JSON file to save the results to')
+    run_parser.add_argument('--filter', help='comma-separated substrings of the case names to run')
+    run_parser.add_argument('--menu-sizes', type=sizes, default=MENU_SIZES, help='e.g. 4,100,1000')
+    run_parser.add_argument('--cart-sizes', type=sizes, default=CART_SIZES, help='e.g. 1,10,50')
+    run_parser.add_argument('--repeats', type=int, default=5)
+    run_parser.add_argument('--min-time', type=float, default=0.05, help='seconds per timing run')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser('compare', help='compare two saved runs')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=10.0, help='slowdown in percent to flag')
+    compare_parser.add_argument('--metric', choices=['best_ns', 'median_ns'], default='best_ns')
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
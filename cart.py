@@ -0,0 +1,180 @@
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional, Tuple
+
+SIZE_UPCHARGES = {'regular': 0, 'large': 500}  # won added to the unit price per size
+SHOT_PRICE = 500                               # won per extra espresso shot
+
+
+@dataclass(frozen=True)
+class Modifiers:
+    """How one cart line is made; lines of the same drink with different modifiers are kept apart."""
+    size: str = 'regular'
+    shots: int = 0  # extra espresso shots
+
+    def label(self) -> str:
+        """
+        Short description for receipts and the cart display
+        :return: e.g. "large, +2 shots", empty for the defaults
+        """
+        parts = []
+        if self.size != 'regular':
+            parts.append(self.size)
+        if self.shots:
+            parts.append(f"+{self.shots} shot" + ("s" if self.shots > 1 else ""))
+        return ", ".join(parts)
+
+
+REGULAR = Modifiers()
+LineKey = Tuple[int, str, int]  # (menu slot, size, shots); plain tuples hash in C, dataclasses don't
+
+
+def line_key(slot: int, modifiers: Modifiers = REGULAR) -> LineKey:
+    """
+    Key of the cart line holding a drink made a given way
+    :param slot: menu slot
+    :param modifiers: size and extra shots
+    :return: key into Cart.lines
+    """
+    return slot, modifiers.size, modifiers.shots
+
+
+class CartLine:
+    """One line of a cart: a drink made one way, its unit price with upcharges and its quantity."""
+    __slots__ = ('slot', 'modifiers', 'unit_price', 'upcharge', 'quantity')
+
+    def __init__(self, slot: int, modifiers: Modifiers, unit_price: int, upcharge: int) -> None:
+        """
+        Initialization method for the CartLine class.
+        :param slot: menu slot
+        :param modifiers: size and extra shots
+        :param unit_price: menu price plus upcharge
+        :param upcharge: won the modifiers add to each unit
+        :return: None
+        """
+        self.slot = slot
+        self.modifiers = modifiers
+        self.unit_price = unit_price
+        self.upcharge = upcharge
+        self.quantity = 0
+
+    @property
+    def key(self) -> LineKey:
+        return self.slot, self.modifiers.size, self.modifiers.shots
+
+    def name(self, menu) -> str:
+        """
+        Drink name with its modifiers, as printed on the receipt
+        :param menu: menu the slot refers to
+        :return: e.g. "Cafe Latte (large, +1 shot)"
+        """
+        label = self.modifiers.label()
+        drink = menu.get_drink_name(self.slot)
+        return f"{drink} ({label})" if label else drink
+
+
+class Cart:
+    """
+    Sparse cart: only the lines ordered are stored, in a dict keyed by line_key(), so lines
+    keep the order they were first added in and adding or removing items is O(1) whatever the menu
+    size. Quantities per slot and the subtotal are kept up to date on every change.
+    """
+
+    def __init__(self, menu, size_upcharges: Optional[Dict[str, int]] = None, shot_price: int = SHOT_PRICE) -> None:
+        """
+        Initialization method for the Cart class.
+        :param menu: menu snapshot the slots refer to
+        :param size_upcharges: size -> won added per unit, SIZE_UPCHARGES by default
+        :param shot_price: won per extra shot
+        :return: None
+        """
+        self.menu = menu
+        self.size_upcharges = size_upcharges if size_upcharges is not None else SIZE_UPCHARGES
+        self.shot_price = shot_price
+        self.lines: Dict[LineKey, CartLine] = {}
+        self.amounts: Dict[int, int] = {}  # menu slot -> quantity over all its lines
+        self.subtotal = 0
+        self.quantity = 0
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def __iter__(self) -> Iterator[CartLine]:
+        return iter(self.lines.values())
+
+    def upcharge(self, modifiers: Modifiers) -> int:
+        """
+        Won the modifiers add to one unit
+        :param modifiers: size and extra shots
+        :return: upcharge
+        """
+        try:
+            size = self.size_upcharges[modifiers.size]
+        except KeyError:
+            raise ValueError(f"Unknown size {modifiers.size!r}, choose from {', '.join(self.size_upcharges)}.") from None
+        if modifiers.shots < 0:
+            raise ValueError("Extra shots can't be negative.")
+        return size + modifiers.shots * self.shot_price
+
+    def add(self, slot: int, count: int = 1, modifiers: Modifiers = REGULAR) -> CartLine:
+        """
+        Put items into the cart, on a new line for a drink/modifiers combination not ordered yet
+        :param slot: menu slot
+        :param count: number of items, at least 1
+        :param modifiers: size and extra shots
+        :return: the line afterwards
+        """
+        if count < 1:
+            raise ValueError("Count must be at least 1.")
+        key = (slot, modifiers.size, modifiers.shots)
+        line = self.lines.get(key)
+        if line is None:
+            upcharge = self.upcharge(modifiers)
+            line = CartLine(slot, modifiers, self.menu.get_price(slot) + upcharge, upcharge)
+            self.lines[key] = line
+        self._change(line, count)
+        return line
+
+    def remove(self, slot: int, count: int = 1, modifiers: Modifiers = REGULAR) -> CartLine:
+        """
+        Take items out of the cart; the line is dropped when its quantity reaches 0
+        :param slot: menu slot
+        :param count: number of items, at least 1 and at most the line's quantity
+        :param modifiers: size and extra shots
+        :return: the line afterwards (quantity 0 if it was dropped)
+        """
+        line = self.lines.get((slot, modifiers.size, modifiers.shots))
+        if line is None:
+            raise KeyError(f"No {modifiers.label() or 'regular'} line for menu slot {slot} in the cart.")
+        if not 1 <= count <= line.quantity:
+            raise ValueError(f"Count must be from 1 to {line.quantity}.")
+        self._change(line, -count)
+        if not line.quantity:
+            del self.lines[line.key]
+        return line
+
+    def _change(self, line: CartLine, delta: int) -> None:
+        """
+        Apply a quantity change to a line and the running totals
+        :param line: cart line
+        :param delta: quantity change
+        :return: None
+        """
+        slot = line.slot
+        line.quantity += delta
+        self.quantity += delta
+        self.subtotal += delta * line.unit_price
+        amount = self.amounts.get(slot, 0) + delta
+        if amount:
+            self.amounts[slot] = amount
+        else:
+            del self.amounts[slot]
+
+    def clear(self) -> None:
+        """
+        Empty the cart
+        :return: None
+        """
+        self.lines.clear()
+        self.amounts.clear()
+        self.subtotal = 0
+        self.quantity = 0
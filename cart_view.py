@@ -0,0 +1,118 @@
+from typing import List, Set
+
+from cart import LineKey
+
+
+class CartViewModel:
+    """
+    Keeps the "Current Order" text widget in sync with an OrderProcessor line by line.
+    Callers mark the cart lines they changed; flush() rewrites only those lines and the totals block.
+    Lines are shown in the order they were first added, so a new line is always appended, and
+    nothing here depends on the menu size.
+    """
+    HEADER = "Current Order:\n\n"
+    HEADER_LINES = 2  # "Current Order:" and the empty line below it
+
+    def __init__(self, order_processor) -> None:
+        """
+        Initialization method for the CartViewModel class.
+        :param order_processor: the OrderProcessor whose cart is displayed
+        :return: None
+        """
+        self.order_processor = order_processor
+        self.keys: List[LineKey] = []  # cart lines currently shown, top to bottom
+        self.dirty: Set[LineKey] = set()
+        self.needs_full_redraw = True
+
+    def bind(self, order_processor) -> None:
+        """
+        Display another order (e.g. after a reset); the next flush redraws everything
+        :param order_processor: the new OrderProcessor
+        :return: None
+        """
+        self.order_processor = order_processor
+        self.keys = []
+        self.dirty.clear()
+        self.needs_full_redraw = True
+
+    def mark_dirty(self, key: LineKey) -> None:
+        """
+        Record that the quantity of one cart line changed
+        :param key: line key returned by process_order/remove_order
+        :return: None
+        """
+        self.dirty.add(key)
+
+    def render_line(self, key: LineKey) -> str:
+        """
+        Format one cart line
+        :param key: line key
+        :return: line text without the trailing newline
+        """
+        line = self.order_processor.cart.lines[key]
+        return (f"{line.name(self.order_processor.menu)}: {line.quantity} × {line.unit_price} = "
+                f"{line.unit_price * line.quantity} won")
+
+    def render_totals(self) -> str:
+        """
+        Format the totals block shown under the cart lines
+        :return: totals text, starting with an empty line
+        """
+        price = self.order_processor.get_price_result()
+        if price.discount > 0:
+            totals = f"\nTotal before discount: {price.subtotal} won"
+            for label, discount in price.applied:
+                totals += f"\nDiscount ({label}): {discount} won"
+            totals += f"\nTotal after discount: {price.total} won"
+        else:
+            totals = f"\nTotal: {price.total} won"
+            # Show how much more to spend for discount
+            next_tier = self.order_processor.pricing_engine.next_threshold(price.subtotal)
+            if price.subtotal > 0 and next_tier is not None:
+                remaining, label = next_tier
+                totals += f"\n(Spend {remaining} won more for {label} discount)"
+        return totals
+
+    def render_all(self) -> str:
+        """
+        Format the whole summary and remember which lines it shows
+        :return: full widget text
+        """
+        self.keys = list(self.order_processor.cart.lines)
+        lines = "".join(self.render_line(key) + "\n" for key in self.keys)
+        return self.HEADER + lines + self.render_totals()
+
+    def flush(self, text) -> None:
+        """
+        Apply pending changes to a text widget (tk.Text or anything with the same insert/delete indexes)
+        :param text: widget to update, must already be editable
+        :return: None
+        """
+        if self.needs_full_redraw:
+            text.delete("1.0", "end")
+            text.insert("end", self.render_all())
+            self.dirty.clear()
+            self.needs_full_redraw = False
+            return
+
+        lines = self.order_processor.cart.lines
+        shown = {key: pos for pos, key in enumerate(self.keys) if key in self.dirty}
+        # bottom up, so a deleted row never shifts a row still to be updated
+        for key, pos in sorted(shown.items(), key=lambda item: -item[1]):
+            row = self.HEADER_LINES + 1 + pos
+            if key in lines:
+                text.delete(f"{row}.0", f"{row}.end")
+                text.insert(f"{row}.0", self.render_line(key))
+            else:
+                text.delete(f"{row}.0", f"{row + 1}.0")
+                del self.keys[pos]
+        for key in lines:  # new lines come last in the cart as on screen
+            if key in self.dirty and key not in shown:
+                row = self.HEADER_LINES + 1 + len(self.keys)
+                text.insert(f"{row}.0", self.render_line(key) + "\n")
+                self.keys.append(key)
+        self.dirty.clear()
+
+        totals_row = self.HEADER_LINES + 1 + len(self.keys)
+        text.delete(f"{totals_row}.0", "end")
+        text.insert(f"{totals_row}.0", self.render_totals())
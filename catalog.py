@@ -0,0 +1,208 @@
+import argparse
+import sqlite3
+import threading
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from instrumentation import timer
+from order_core import Menu
+from storage import get_pool
+
+# The menu lives in the kiosk database (table menu, see storage.SCHEMA) instead of lists in the
+# code. Triggers bump menu_revision on every change, so a watcher can tell a menu change from the
+# orders and tickets written to the same file. MenuCatalog polls with pragma data_version, which
+# only moves when another connection commits and costs no disk read; only then does it look at
+# the revision, and only a new revision loads a new Menu snapshot. Open carts keep the snapshot
+# they were started with.
+
+MenuListener = Callable[[Menu, Menu], None]
+
+
+def _read(conn: sqlite3.Connection) -> Tuple[int, List[tuple]]:
+    """
+    Read the catalog revision and rows from one consistent snapshot
+    :param conn: autocommit connection
+    :return: (revision, [(name, price, sku), ...] in slot order)
+    """
+    conn.execute('begin')
+    try:
+        revision = conn.execute('select revision from menu_revision').fetchone()[0]
+        rows = conn.execute('select name, price, sku from menu order by id').fetchall()
+    finally:
+        conn.execute('commit')
+    return revision, rows
+
+
+def load_menu(db_path: str = 'queue_number.db') -> Menu:
+    """
+    Load the current catalog once
+    :param db_path: kiosk database
+    :return: Menu whose version is the catalog revision
+    """
+    with get_pool(db_path).connection() as conn:
+        revision, rows = _read(conn)
+    return Menu.from_rows(rows, revision)
+
+
+def save_menu(db_path: str, rows: Iterable[Tuple[str, int, Optional[str]]]) -> int:
+    """
+    Replace the whole catalog in one transaction; watchers see the old or the new menu, never a mix
+    :param db_path: kiosk database
+    :param rows: (name, price, sku) in slot order, sku may be None
+    :return: catalog revision afterwards
+    """
+    with get_pool(db_path).transaction() as conn:
+        conn.execute('delete from menu')
+        conn.executemany('insert into menu (id, name, price, sku) values (?, ?, ?, ?)',
+                         ((slot, name, int(price), sku or None) for slot, (name, price, sku) in enumerate(rows)))
+        return conn.execute('select revision from menu_revision').fetchone()[0]
+
+
+def seed_menu(db_path: str, drinks: Sequence[str], prices: Sequence[int]) -> bool:
+    """
+    Fill an empty catalog, e.g. with a script's built-in menu on its first run
+    :param db_path: kiosk database
+    :param drinks: beverage name list
+    :param prices: beverage price list
+    :return: True if the catalog was empty and has been filled
+    """
+    if len(drinks) != len(prices):
+        raise ValueError("Drinks and prices lists must have the same length.")
+    with get_pool(db_path).transaction() as conn:
+        if conn.execute('select 1 from menu limit 1').fetchone() is not None:
+            return False
+        conn.executemany('insert into menu (id, name, price) values (?, ?, ?)',
+                         ((slot, name, int(price)) for slot, (name, price) in enumerate(zip(drinks, prices))))
+    return True
+
+
+def set_price(db_path: str, key: str, price: int) -> int:
+    """
+    Change the price of one drink
+    :param db_path: kiosk database
+    :param key: drink name or SKU
+    :param price: new price in won
+    :return: catalog revision afterwards
+    """
+    if price < 0:
+        raise ValueError("Price can't be negative.")
+    with get_pool(db_path).transaction() as conn:
+        row = (conn.execute('select id from menu where sku = ?', (key,)).fetchone()
+               or conn.execute('select min(id) from menu where name = ?', (key,)).fetchone())
+        if row[0] is None:
+            raise KeyError(f"No menu item named or with SKU {key!r}.")
+        conn.execute('update menu set price = ? where id = ?', (price, row[0]))
+        return conn.execute('select revision from menu_revision').fetchone()[0]
+
+
+def changed_slots(old: Menu, new: Menu) -> List[int]:
+    """
+    Slots whose drink or price differ between two snapshots, added and removed slots included
+    :param old: previous snapshot
+    :param new: next snapshot
+    :return: sorted slots
+    """
+    common = min(old.get_menu_length(), new.get_menu_length())
+    old_drinks, new_drinks, old_prices, new_prices = old.drinks, new.drinks, old.prices, new.prices
+    changed = [slot for slot in range(common)
+               if old_drinks[slot] != new_drinks[slot] or old_prices[slot] != new_prices[slot]]
+    changed.extend(range(common, max(old.get_menu_length(), new.get_menu_length())))
+    return changed
+
+
+class MenuCatalog:
+    """Watches the catalog of a kiosk database and swaps in a new immutable Menu when it changes."""
+
+    def __init__(self, db_path: str = 'queue_number.db') -> None:
+        """
+        Initialization method for the MenuCatalog class.
+        :param db_path: kiosk database
+        :return: None
+        """
+        self.db_path = db_path
+        get_pool(db_path)  # creates the schema
+        # a connection of its own: data_version only moves for commits made on other connections,
+        # and every write (catalog functions, the order ledger) goes through the pool
+        self._conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()  # one poll at a time
+        self._listeners: List[MenuListener] = []
+        self.reloads = 0
+        self._data_version = self._conn.execute('pragma data_version').fetchone()[0]
+        revision, rows = _read(self._conn)
+        self.menu = Menu.from_rows(rows, revision)  # replaced, never modified; reading it needs no lock
+
+    def subscribe(self, listener: MenuListener) -> None:
+        """
+        Call listener(old, new) after every swap, on the thread that polled
+        :param listener: callable
+        :return: None
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: MenuListener) -> None:
+        """
+        Stop calling a listener
+        :param listener: callable given to subscribe()
+        :return: None
+        """
+        self._listeners.remove(listener)
+
+    def poll(self) -> Optional[Menu]:
+        """
+        Check for a change and swap in the new menu if there is one
+        :return: the new Menu, None if the catalog didn't change
+        """
+        with self._lock:
+            data_version = self._conn.execute('pragma data_version').fetchone()[0]
+            if data_version == self._data_version:
+                return None
+            self._data_version = data_version
+            if self._conn.execute('select revision from menu_revision').fetchone()[0] == self.menu.version:
+                return None  # something else in the database changed
+            return self._reload()
+
+    @timer('menu_reload', 'Loading and swapping in a changed menu catalog')
+    def _reload(self) -> Menu:
+        """
+        Load the catalog and swap it in; caller holds the lock
+        :return: the new Menu
+        """
+        revision, rows = _read(self._conn)
+        old, new = self.menu, Menu.from_rows(rows, revision)
+        self.menu = new
+        self.reloads += 1
+        for listener in list(self._listeners):
+            try:
+                listener(old, new)
+            except Exception as err:
+                print(f"Menu listener failed: {err}")
+        return new
+
+    def close(self) -> None:
+        """
+        Close the watcher's connection
+        :return: None
+        """
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show or edit the menu catalog of a kiosk database.")
+    parser.add_argument('--db', default='queue_number.db', help='kiosk database')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('show', help='print the menu')
+    price_parser = commands.add_parser('set-price', help='change the price of one drink')
+    price_parser.add_argument('key', help='drink name or SKU')
+    price_parser.add_argument('price', type=int)
+    import_parser = commands.add_parser('import', help='replace the menu with a CSV file (name, price[, sku])')
+    import_parser.add_argument('csv')
+    args = parser.parse_args()
+    if args.command == 'set-price':
+        print(f"catalog revision {set_price(args.db, args.key, args.price)}")
+    elif args.command == 'import':
+        menu = Menu.from_csv(args.csv)
+        print(f"catalog revision {save_menu(args.db, zip(menu.drinks, menu.prices, menu.skus))}")
+    else:
+        catalog_menu = load_menu(args.db)
+        print(f"catalog revision {catalog_menu.version}, {catalog_menu.get_menu_length()} items")
+        print(catalog_menu.display_menu().rsplit('\n', 1)[0])
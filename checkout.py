@@ -0,0 +1,115 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from ledger import CompletedOrder, OrderLedger
+from receipt import ReceiptRenderer
+
+
+class CheckoutPipeline:
+    """
+    Runs checkouts (ticket numbering, ledger hand-off, receipt rendering and printing) on worker
+    threads and hands the results back to the UI thread, so a slow disk or printer never blocks it.
+    Once the order has its ticket and is in the ledger the checkout counts as done: a receipt that
+    fails to render or print is kept in self.unprinted for reprint(), never retried as a new order.
+    """
+
+    def __init__(self, call_soon: Callable[[Callable[[], None]], object], ledger: Optional[OrderLedger] = None,
+                 printer: Optional[Callable[[bytes], None]] = None, renderer: Optional[ReceiptRenderer] = None,
+                 workers: int = 2) -> None:
+        """
+        Initialization method for the CheckoutPipeline class.
+        :param call_soon: runs a callable on the UI thread, e.g. lambda fn: root.after(0, fn)
+        :param ledger: ledger completed orders are recorded in, None to not record them
+        :param printer: receives the ESC/POS bytes of every receipt, None when there is no printer
+        :param renderer: receipt renderer, a default one by default
+        :param workers: worker threads
+        :return: None
+        """
+        self.call_soon = call_soon
+        self.ledger = ledger
+        self.printer = printer
+        self.renderer = renderer if renderer is not None else ReceiptRenderer()
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='checkout')
+        self.unprinted: List[CompletedOrder] = []  # completed orders whose receipt failed, for reprint()
+        self._unprinted_lock = threading.Lock()
+
+    def _print(self, order: CompletedOrder) -> str:
+        """
+        Render a receipt and send it to the printer
+        :param order: completed order
+        :return: receipt text
+        """
+        receipt_text = self.renderer.render_text(order)
+        if self.printer is not None:
+            self.printer(self.renderer.render_escpos(order))
+        return receipt_text
+
+    def _run(self, order_processor) -> Tuple[CompletedOrder, str, Optional[Exception]]:
+        """
+        The blocking part of a checkout, on a worker thread
+        :param order_processor: cart to check out; the caller must not change it until the result is back
+        :return: completed order, its receipt text and the receipt error (None if it printed)
+        """
+        order = order_processor.checkout(self.ledger)  # an error up to here fails the checkout
+        try:
+            return order, self._print(order), None
+        except Exception as err:  # ticket and ledger are done; only the receipt is missing
+            with self._unprinted_lock:
+                self.unprinted.append(order)
+            return order, f"Ticket {order.ticket}, {order.final_price} won (receipt not printed)", err
+
+    def reprint(self) -> int:
+        """
+        Try the receipts that failed again, on the calling thread
+        :return: receipts still not printed
+        """
+        with self._unprinted_lock:
+            pending, self.unprinted = self.unprinted, []
+        for order in pending:
+            try:
+                self._print(order)
+            except Exception as err:
+                print(f"Receipt of ticket {order.ticket} still not printed: {err}")
+                with self._unprinted_lock:
+                    self.unprinted.append(order)
+        return len(self.unprinted)
+
+    def submit(self, order_processor, on_done: Callable[[CompletedOrder, str], None],
+               on_error: Optional[Callable[[Exception], None]] = None,
+               on_print_error: Optional[Callable[[CompletedOrder, Exception], None]] = None) -> Future:
+        """
+        Check an order out in the background
+        :param order_processor: cart to check out (OrderProcessor or RemoteOrderProcessor)
+        :param on_done: called on the UI thread with the completed order and its receipt text
+        :param on_error: called on the UI thread with the exception if the checkout failed
+        :param on_print_error: called on the UI thread after on_done if the order completed but its
+            receipt could not be rendered or printed
+        :return: future of (order, receipt text, receipt error)
+        """
+        future = self.executor.submit(self._run, order_processor)
+
+        def deliver(done: Future) -> None:
+            err = done.exception()
+            if err is None:
+                order, receipt_text, print_err = done.result()
+                self.call_soon(lambda: on_done(order, receipt_text))
+                if print_err is not None:
+                    if on_print_error is not None:
+                        self.call_soon(lambda: on_print_error(order, print_err))
+                    else:
+                        print(f"Receipt of ticket {order.ticket} not printed: {print_err}")
+            elif on_error is not None:
+                self.call_soon(lambda: on_error(err))
+            else:
+                print(f"Checkout failed: {err}")
+
+        future.add_done_callback(deliver)
+        return future
+
+    def close(self) -> None:
+        """
+        Wait for running checkouts and stop the workers
+        :return: None
+        """
+        self.executor.shutdown(wait=True)
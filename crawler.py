@@ -0,0 +1,380 @@
+import argparse
+import csv
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set
+
+import http_client
+from bs4 import BeautifulSoup
+
+Row = List[Optional[str]]
+
+HOLLYS_URL = "https://www.hollys.co.kr/store/korea/korStore2.do?pageNo={page}&sido=&gugun=&store="
+HOLLYS_PAGES = range(1, 49)
+HOLLYS_COLUMNS = ('매장명', '주소', '전화번호', '일시')
+
+
+class RateLimiter:
+    """Token bucket shared by the fetch threads: at most rate requests per second, bursts up to burst."""
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        """
+        Initialization method for the RateLimiter class.
+        :param rate: requests per second
+        :param burst: requests allowed back to back
+        :return: None
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive.")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Block until a request may be sent
+        :return: None
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+class CsvSink:
+    """Appends rows to a CSV file, writing the header only when the file is new."""
+
+    def __init__(self, path: str, columns: Sequence[str], encoding: str = 'cp949', index: bool = False) -> None:
+        """
+        Initialization method for the CsvSink class.
+        :param path: CSV file path
+        :param columns: header names
+        :param encoding: file encoding (cp949 so Excel opens Korean text correctly)
+        :param index: write the layout of pandas to_csv(index=True): every row starts with its number from 0 under
+            an empty header, lines end in LF
+        :return: None
+        """
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.index = index
+        self._next_row = 0
+        if index and not new_file:  # resuming: keep numbering after the rows already written
+            with open(path, newline='', encoding=encoding, errors='replace') as fp:
+                self._next_row = max(sum(1 for _ in csv.reader(fp)) - 1, 0)
+        self._fp = open(path, 'a', newline='', encoding=encoding, errors='replace')
+        self._writer = csv.writer(self._fp, lineterminator='\n') if index else csv.writer(self._fp)
+        if new_file:
+            self._writer.writerow(['', *columns] if index else columns)
+
+    def write(self, page: int, rows: List[Row]) -> None:
+        """
+        Write one page's rows
+        :param page: page number
+        :param rows: parsed rows
+        :return: None
+        """
+        if self.index:
+            start = self._next_row
+            self._next_row += len(rows)
+            rows = [[number, *row] for number, row in enumerate(rows, start)]
+        self._writer.writerows(rows)
+        self._fp.flush()
+
+    def close(self) -> None:
+        """
+        Flush and release the output
+        :return: None
+        """
+        self._fp.close()
+
+
+class SqliteSink:
+    """Inserts rows into a SQLite table, one transaction per page."""
+
+    def __init__(self, path: str, table: str, columns: Sequence[str]) -> None:
+        """
+        Initialization method for the SqliteSink class.
+        :param path: database path
+        :param table: table name, created if missing (text columns plus the page number)
+        :param columns: column names
+        :return: None
+        """
+        self.conn = sqlite3.connect(path)
+        quoted = ", ".join(f'"{c}" text' for c in columns)
+        self.conn.execute(f'create table if not exists "{table}" (page integer not null, {quoted})')
+        self._insert = (f'insert into "{table}" values (?, {", ".join("?" * len(columns))})')
+
+    def write(self, page: int, rows: List[Row]) -> None:
+        """
+        Write one page's rows
+        :param page: page number
+        :param rows: parsed rows
+        :return: None
+        """
+        with self.conn:
+            self.conn.executemany(self._insert, [(page, *row) for row in rows])
+
+    def close(self) -> None:
+        """
+        Flush and release the output
+        :return: None
+        """
+        self.conn.close()
+
+
+class ParquetSink:
+    """Writes each page as a row group of a Parquet file (needs pyarrow)."""
+
+    def __init__(self, path: str, columns: Sequence[str]) -> None:
+        """
+        Initialization method for the ParquetSink class.
+        :param path: Parquet file path (rewritten, Parquet files can't be appended to)
+        :param columns: column names, all stored as strings
+        :return: None
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("ParquetSink needs pyarrow: pip install pyarrow") from None
+        self._pa = pa
+        self.columns = list(columns)
+        self._schema = pa.schema([(c, pa.string()) for c in self.columns])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, page: int, rows: List[Row]) -> None:
+        """
+        Write one page's rows
+        :param page: page number
+        :param rows: parsed rows
+        :return: None
+        """
+        table = self._pa.Table.from_pylist([dict(zip(self.columns, row)) for row in rows], schema=self._schema)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        """
+        Flush and release the output
+        :return: None
+        """
+        self._writer.close()
+
+
+class Checkpoint:
+    """Remembers which pages were fully written, so a crawl can resume after a failure."""
+
+    def __init__(self, path: Optional[str]) -> None:
+        """
+        Initialization method for the Checkpoint class.
+        :param path: JSON file path, None to keep nothing between runs
+        :return: None
+        """
+        self.path = path
+        self.done: Set[int] = set()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as fp:
+                self.done = set(json.load(fp)['done'])
+
+    def mark(self, page: int) -> None:
+        """
+        Record a page as written and persist the set atomically
+        :param page: page number
+        :return: None
+        """
+        self.done.add(page)
+        if self.path:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as fp:
+                json.dump({'done': sorted(self.done)}, fp)
+            os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        """
+        Forget the checkpoint after a complete crawl
+        :return: None
+        """
+        self.done.clear()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class PageCrawler:
+    """
+    Fetches numbered pages concurrently (capped and rate limited), parses them on a worker pool
+    and streams each page's rows to a sink as soon as it is parsed. Pages are written in completion
+    order; a page is checkpointed right after its rows reach the sink, so a page interrupted between
+    the two may be written twice after a resume.
+    """
+
+    def __init__(self, url_template: str, parse: Callable[[bytes], List[Row]], sink,
+                 concurrency: int = 4, rate_limit: Optional[float] = None, parse_workers: int = 0,
+                 checkpoint_path: Optional[str] = None,
+                 fetch: Callable[[str], bytes] = http_client.fetch_bytes) -> None:
+        """
+        Initialization method for the PageCrawler class.
+        :param url_template: URL with a {page} placeholder
+        :param parse: module-level function turning a page body into rows (picklable for parse_workers > 0)
+        :param sink: object with write(page, rows) and close()
+        :param concurrency: pages fetched at the same time
+        :param rate_limit: requests per second across all fetch threads, None for no limit
+        :param parse_workers: processes for parsing, 0 to parse on the fetch threads
+        :param checkpoint_path: JSON file for resuming, None to always start over
+        :param fetch: callable returning the body of a URL
+        :return: None
+        """
+        self.url_template = url_template
+        self.parse = parse
+        self.sink = sink
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate_limit, burst=concurrency) if rate_limit else None
+        self.parse_workers = parse_workers
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.fetch = fetch
+        self.rows_written = 0
+        self.pages_written = 0
+
+    def _fetch_page(self, page: int) -> bytes:
+        """
+        Fetch one page, honouring the rate limit
+        :param page: page number
+        :return: page body
+        """
+        if self.limiter:
+            self.limiter.acquire()
+        return self.fetch(self.url_template.format(page=page))
+
+    def _fetch_and_parse(self, page: int) -> List[Row]:
+        """
+        Fetch and parse one page on a fetch thread
+        :param page: page number
+        :return: parsed rows
+        """
+        return self.parse(self._fetch_page(page))
+
+    def crawl(self, pages: Iterable[int]) -> int:
+        """
+        Crawl the given pages, skipping those a previous run already wrote
+        :param pages: page numbers
+        :return: number of rows written in this run
+        """
+        todo = [page for page in pages if page not in self.checkpoint.done]
+        parse_pool: Optional[Executor] = ProcessPoolExecutor(self.parse_workers) if self.parse_workers else None
+        fetch_pool = ThreadPoolExecutor(self.concurrency, thread_name_prefix='crawl')
+        pending: Dict[Future, tuple] = {}
+
+        try:
+            for page in todo:
+                if parse_pool:
+                    pending[fetch_pool.submit(self._fetch_page, page)] = ('fetched', page)
+                else:
+                    pending[fetch_pool.submit(self._fetch_and_parse, page)] = ('parsed', page)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, page = pending.pop(future)
+                    result = future.result()  # a failed page stops the crawl; the checkpoint keeps the rest
+                    if stage == 'fetched':
+                        pending[parse_pool.submit(self.parse, result)] = ('parsed', page)
+                    else:
+                        self.sink.write(page, result)
+                        self.checkpoint.mark(page)
+                        self.rows_written += len(result)
+                        self.pages_written += 1
+        finally:
+            # on failure drop the queued pages instead of fetching them for nothing
+            fetch_pool.shutdown(wait=True, cancel_futures=True)
+            if parse_pool:
+                parse_pool.shutdown(wait=True, cancel_futures=True)
+        return self.rows_written
+
+
+def parse_hollys_page(page: bytes) -> List[Row]:
+    """
+    Extract (name, address, phone, crawl time) rows from one Hollys store list page
+    :param page: page HTML
+    :return: store rows
+    """
+    soup = BeautifulSoup(page, "html.parser")
+    tbody = soup.find('tbody')
+    if tbody is None:  # an error page or a changed layout: no stores rather than a crash
+        return []
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    shops = []
+    for tr in tbody.find_all('tr'):
+        tds = tr.find_all('td')
+        if len(tds) < 6:
+            continue
+        # plain str: a bs4 string drags its whole tree along when the row is pickled back from a parse worker
+        shops.append([None if td.string is None else str(td.string) for td in (tds[1], tds[3], tds[5])] + [now])  # 매장명, 주소, 전화번호, 일시
+    return shops
+
+
+def open_sink(path: str, columns: Sequence[str], index: bool = False):
+    """
+    Pick a sink from the file extension (.csv, .parquet, .db/.sqlite)
+    :param path: output path
+    :param columns: column names
+    :param index: number the rows in a CSV file (see CsvSink)
+    :return: sink
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.parquet':
+        return ParquetSink(path, columns)
+    if ext in ('.db', '.sqlite', '.sqlite3'):
+        return SqliteSink(path, 'stores', columns)
+    return CsvSink(path, columns, index=index)
+
+
+def crawl_hollys(output: str = 'holly.csv', concurrency: int = 4, rate_limit: Optional[float] = 8,
+                 parse_workers: int = 0, url_template: str = HOLLYS_URL,
+                 pages: Iterable[int] = HOLLYS_PAGES) -> int:
+    """
+    Crawl the Hollys store list into a CSV, Parquet or SQLite file, resuming an interrupted run
+    (CSV and SQLite only; a Parquet file is always crawled from the first page)
+    :param output: output path
+    :param concurrency: pages fetched at the same time
+    :param rate_limit: requests per second
+    :param parse_workers: parser processes, 0 to parse on the fetch threads
+    :param url_template: store list URL with a {page} placeholder
+    :param pages: page numbers to crawl
+    :return: rows written
+    """
+    checkpoint_path = output + '.checkpoint.json'
+    if os.path.splitext(output)[1].lower() == '.parquet' and os.path.exists(checkpoint_path):
+        # ParquetSink rewrites the file, so the pages of the interrupted run would be lost: start over
+        print(f"{output} can't be appended to, crawling every page again")
+        os.remove(checkpoint_path)
+    if not os.path.exists(checkpoint_path) and os.path.exists(output):
+        os.remove(output)  # nothing to resume: start a fresh file like the old mode='w' export
+    sink = open_sink(output, HOLLYS_COLUMNS, index=True)  # holly.csv keeps the pandas index column it always had
+    crawler = PageCrawler(url_template, parse_hollys_page, sink, concurrency=concurrency, rate_limit=rate_limit,
+                          parse_workers=parse_workers, checkpoint_path=checkpoint_path)
+    try:
+        rows = crawler.crawl(pages)
+    finally:
+        sink.close()
+    crawler.checkpoint.clear()
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl the Hollys store list.")
+    parser.add_argument('--output', default='holly.csv', help='.csv, .parquet or .db')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rate-limit', type=float, default=8, help='requests per second')
+    parser.add_argument('--parse-workers', type=int, default=0)
+    args = parser.parse_args()
+    print(f"{crawl_hollys(args.output, args.concurrency, args.rate_limit, args.parse_workers)} stores written")
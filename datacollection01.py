@@ -36,8 +36,8 @@ Original file is located at
 #   fp.write(logo)
 #   print("saved!")
 
-import urllib.request
 import urllib.parse
+import http_client
 
 api = 'https://www.kma.go.kr/weather/forecast/mid-term-rss3.jsp'
 id = input('Input local code : ')  # 108, 109, 105
@@ -45,7 +45,7 @@ values = {'stnId' : id}
 parameters = urllib.parse.urlencode(values)
 url = api + '?' + parameters
 #print(url)
-urls = urllib.request.urlopen(url).read()
+urls = http_client.fetch_bytes(url)
 texts = urls.decode('utf-8')
 #print(texts)
 
@@ -0,0 +1,141 @@
+import argparse
+import threading
+import time
+from dataclasses import dataclass
+from io import BytesIO
+from typing import IO, Dict, Iterator, List, Optional, Tuple, Union
+
+import http_client
+
+try:  # lxml's iterparse is faster, the standard library one is always there
+    from lxml.etree import iterparse
+except ImportError:
+    from xml.etree.ElementTree import iterparse
+
+KMA_MID_TERM_URL = 'https://www.kma.go.kr/weather/forecast/mid-term-rss3.jsp'
+STATIONS = {'108': '전국', '109': '서울ㆍ인천ㆍ경기도', '105': '강원도'}
+
+
+@dataclass(frozen=True)
+class DailyForecast:
+    """One <data> entry of a location: a half-day or day forecast."""
+    mode: str               # A01 (whole day) or A02 (AM/PM)
+    time: str               # tmEf, e.g. "2026-10-21 00:00"
+    weather: str            # wf, e.g. "구름많음"
+    min_temp: Optional[int]
+    max_temp: Optional[int]
+    rain_chance: Optional[int]
+
+
+@dataclass(frozen=True)
+class CityForecast:
+    """All forecasts of one <location> of the feed."""
+    province: str
+    city: str
+    forecasts: Tuple[DailyForecast, ...]
+
+
+def _to_int(text: Optional[str]) -> Optional[int]:
+    """
+    Parse an optional integer field
+    :param text: element text
+    :return: integer or None if missing or not a number
+    """
+    try:
+        return int(text) if text is not None else None
+    except ValueError:
+        return None
+
+
+def parse_forecast(source: Union[str, bytes, IO[bytes]]) -> Iterator[CityForecast]:
+    """
+    Stream-parse a mid-term forecast feed, yielding each location as soon as its closing tag is read.
+    Finished elements are cleared, so memory stays at one location regardless of the feed size,
+    and every <data> child is read, however many there are per city.
+    :param source: file path, raw XML bytes or a binary file object
+    :return: iterator of city forecasts in feed order
+    """
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+
+    forecasts: List[DailyForecast] = []
+    for _, elem in iterparse(source, events=('end',)):
+        tag = elem.tag
+        if tag == 'data':
+            forecasts.append(DailyForecast(
+                mode=elem.findtext('mode', ''),
+                time=elem.findtext('tmEf', ''),
+                weather=elem.findtext('wf', ''),
+                min_temp=_to_int(elem.findtext('tmn')),
+                max_temp=_to_int(elem.findtext('tmx')),
+                rain_chance=_to_int(elem.findtext('rnSt')),
+            ))
+        elif tag == 'location':
+            yield CityForecast(elem.findtext('province', ''), elem.findtext('city', ''), tuple(forecasts))
+            forecasts = []
+            elem.clear()
+
+
+class ForecastService:
+    """Fetches and parses the KMA feed per station ID (stnId), caching each station's result for ttl seconds."""
+
+    def __init__(self, url: str = KMA_MID_TERM_URL, ttl: float = 3600) -> None:
+        """
+        Initialization method for the ForecastService class.
+        :param url: feed endpoint (a local stub server works too)
+        :param ttl: seconds a station's forecast is reused
+        :return: None
+        """
+        self.url = url
+        self.ttl = ttl
+        self._cache: Dict[str, Tuple[float, Tuple[CityForecast, ...]]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, stn_id: str) -> threading.Lock:
+        """
+        Per-station lock, so concurrent callers for one station share a single fetch
+        :param stn_id: station ID
+        :return: lock
+        """
+        with self._locks_guard:
+            return self._locks.setdefault(stn_id, threading.Lock())
+
+    def fetch(self, stn_id: Optional[str] = None) -> Tuple[CityForecast, ...]:
+        """
+        Download and parse the feed, streaming the response body into the parser
+        :param stn_id: station ID (105, 108, 109 ...) or None for the feed's default
+        :return: city forecasts
+        """
+        params = {'stnId': stn_id} if stn_id else None
+        response = http_client.get(self.url, params=params, stream=True)
+        try:
+            response.raise_for_status()
+            response.raw.decode_content = True  # undo gzip transfer encoding before parsing
+            return tuple(parse_forecast(response.raw))
+        finally:
+            response.close()
+
+    def get(self, stn_id: Optional[str] = None) -> Tuple[CityForecast, ...]:
+        """
+        Return the cached forecast of a station, fetching it when missing or older than ttl
+        :param stn_id: station ID or None for the feed's default
+        :return: city forecasts
+        """
+        key = stn_id or ''
+        with self._lock_for(key):
+            cached = self._cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.ttl:
+                return cached[1]
+            cities = self.fetch(stn_id)
+            self._cache[key] = (time.monotonic(), cities)
+            return cities
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the KMA mid-term forecast of a station.")
+    parser.add_argument('stn_id', nargs='?', default=None, help='108, 109, 105 ...')
+    args = parser.parse_args()
+    for city in ForecastService().get(args.stn_id):
+        first = city.forecasts[0].weather if city.forecasts else '-'
+        print(f"{city.city}의 날씨는 {first}입니다")
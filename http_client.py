@@ -0,0 +1,122 @@
+import atexit
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    import requests
+# requests (and urllib3 under it) is imported by build_session(): it takes longer to import than the
+# rest of the kiosk together, and the first request is made on a worker thread after the window is up
+
+DEFAULT_TIMEOUT = 5            # seconds, for both connect and read
+MAX_CONNECTIONS_PER_HOST = 4   # keep-alive connections kept (and allowed) per host
+MAX_HOSTS = 10                 # hosts whose connection pools are kept alive
+MAX_WORKERS = 4                # background fetch threads shared by the whole process
+USER_AGENT = 'cafe-kiosk/1.0'
+
+_session: Optional['requests.Session'] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def build_session(max_per_host: int = MAX_CONNECTIONS_PER_HOST, retries: int = 3,
+                  backoff_factor: float = 0.3) -> 'requests.Session':
+    """
+    Create a keep-alive session with bounded per-host pools and retries with exponential backoff
+    :param max_per_host: connections per host; extra requests wait for a free one instead of opening more
+    :param retries: retries for connection errors and 429/5xx answers
+    :param backoff_factor: backoff base in seconds (0.3 -> 0.3, 0.6, 1.2 ...)
+    :return: configured session
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({'GET', 'HEAD'}),
+        raise_on_status=False,  # hand the last response back so callers can show its status code
+    )
+    adapter = HTTPAdapter(pool_connections=MAX_HOSTS, pool_maxsize=max_per_host, pool_block=True,
+                          max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+
+def get_session() -> 'requests.Session':
+    """
+    Return the process-wide session, creating it on first use
+    :return: shared session
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            _session = build_session()
+        return _session
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Return the process-wide worker pool for background fetches, creating it on first use
+    :return: shared executor
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='http')
+        return _executor
+
+
+def get(url: str, timeout: float = DEFAULT_TIMEOUT, **kwargs) -> 'requests.Response':
+    """
+    GET through the shared session
+    :param url: URL to fetch
+    :param timeout: seconds before giving up
+    :return: response
+    """
+    return get_session().get(url, timeout=timeout, **kwargs)
+
+
+def fetch_bytes(url: str, timeout: float = DEFAULT_TIMEOUT, **kwargs) -> bytes:
+    """
+    GET a URL and return its body, raising for error statuses (drop-in for urlopen(url).read())
+    :param url: URL to fetch
+    :param timeout: seconds before giving up
+    :return: response body
+    """
+    response = get(url, timeout=timeout, **kwargs)
+    response.raise_for_status()
+    return response.content
+
+
+def submit(fn: Callable, *args, **kwargs) -> Future:
+    """
+    Run a blocking call on the shared worker pool
+    :param fn: callable to run
+    :return: future of its result
+    """
+    return get_executor().submit(fn, *args, **kwargs)
+
+
+@atexit.register
+def close() -> None:
+    """
+    Close pooled connections and stop the worker pool
+    :return: None
+    """
+    global _session, _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+        if _session is not None:
+            _session.close()
+            _session = None
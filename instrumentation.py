@@ -0,0 +1,355 @@
+import functools
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+SUB_BITS = 3          # 8 buckets per power of two: percentiles are exact to within 12.5%
+SUB = 1 << SUB_BITS
+BUCKETS = 64 * SUB    # enough for any 64-bit nanosecond count
+PROMETHEUS_BOUNDS = [1 << k for k in range(10, 37)]  # 1.024 us .. 68.7 s, powers of two in ns
+
+
+def _bucket(ns: int) -> int:
+    """
+    Log-linear bucket of a duration
+    :param ns: nanoseconds
+    :return: bucket index
+    """
+    if ns < SUB:
+        return max(ns, 0)
+    shift = ns.bit_length() - 1 - SUB_BITS
+    return (shift + 1) * SUB + ((ns >> shift) & (SUB - 1))
+
+
+def _bucket_bounds(bucket: int) -> tuple:
+    """
+    Smallest and largest duration falling into a bucket
+    :param bucket: bucket index
+    :return: (low, high) in nanoseconds
+    """
+    if bucket < SUB:
+        return bucket, bucket
+    shift = bucket // SUB - 1
+    low = (SUB + bucket % SUB) << shift
+    return low, low + (1 << shift) - 1
+
+
+class Histogram:
+    """Counts durations in log-linear buckets: fixed memory, O(1) record, percentiles from the buckets."""
+
+    def __init__(self, name: str, help_text: str = '', sample_every: int = 1) -> None:
+        """
+        Initialization method for the Histogram class.
+        :param name: metric name
+        :param help_text: description for the Prometheus HELP line
+        :param sample_every: 1 when every call is recorded, n when only every n-th is
+        :return: None
+        """
+        self.name = name
+        self.help_text = help_text
+        self.sample_every = sample_every
+        self.counts: List[int] = [0] * BUCKETS
+        self.count = 0
+        self.total = 0  # ns
+        self.min = 0
+        self.max = 0
+        self._lock = threading.Lock()
+
+    def record(self, ns: int) -> None:
+        """
+        Add one duration
+        :param ns: nanoseconds
+        :return: None
+        """
+        bucket = _bucket(ns)
+        with self._lock:
+            self.counts[bucket] += 1
+            if self.count == 0 or ns < self.min:
+                self.min = ns
+            if ns > self.max:
+                self.max = ns
+            self.count += 1
+            self.total += ns
+
+    def merge(self, other: 'Histogram') -> None:
+        """
+        Add the durations recorded by another histogram, e.g. one sent back by a worker process
+        :param other: histogram to add
+        :return: None
+        """
+        with other._lock:
+            counts = list(other.counts)
+            count, total, low, high = other.count, other.total, other.min, other.max
+        if not count:
+            return
+        with self._lock:
+            self.counts = [a + b for a, b in zip(self.counts, counts)]
+            if self.count == 0 or low < self.min:
+                self.min = low
+            self.max = max(self.max, high)
+            self.count += count
+            self.total += total
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """
+        Forget every recorded duration
+        :return: None
+        """
+        with self._lock:
+            self.counts = [0] * BUCKETS
+            self.count = self.total = self.min = self.max = 0
+
+    def percentile(self, pct: float) -> float:
+        """
+        Approximate percentile (middle of the bucket it falls into, kept within min and max)
+        :param pct: percentile from 0 to 100
+        :return: nanoseconds, 0 when nothing was recorded
+        """
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            rank = max(1, int(self.count * pct / 100 + 0.5))
+            seen = 0
+            for bucket, bucket_count in enumerate(self.counts):
+                seen += bucket_count
+                if seen >= rank:
+                    low, high = _bucket_bounds(bucket)
+                    return float(min(max((low + high) / 2, self.min), self.max))
+            return float(self.max)
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Count and timings in milliseconds
+        :return: JSON-ready dictionary
+        """
+        count = self.count
+        return {
+            'count': count,
+            'sampled_1_in': self.sample_every,
+            'total_ms': self.total / 1e6,
+            'mean_ms': self.total / count / 1e6 if count else 0.0,
+            'min_ms': self.min / 1e6,
+            'p50_ms': self.percentile(50) / 1e6,
+            'p90_ms': self.percentile(90) / 1e6,
+            'p99_ms': self.percentile(99) / 1e6,
+            'max_ms': self.max / 1e6,
+        }
+
+    def prometheus(self, prefix: str) -> str:
+        """
+        Prometheus text format of the histogram, in seconds
+        :param prefix: prepended to the metric name
+        :return: HELP, TYPE, bucket, sum and count lines
+        """
+        name = f"{prefix}{self.name}_seconds"
+        with self._lock:
+            counts = list(self.counts)
+            count, total = self.count, self.total
+        out = [f"# HELP {name} {self.help_text or self.name} (1 in {self.sample_every} calls recorded)",
+               f"# TYPE {name} histogram"]
+        cumulative = 0
+        bucket = 0
+        for bound in PROMETHEUS_BOUNDS:
+            while bucket < BUCKETS and _bucket_bounds(bucket)[1] < bound:
+                cumulative += counts[bucket]
+                bucket += 1
+            out.append(f'{name}_bucket{{le="{bound / 1e9:.9g}"}} {cumulative}')
+        out.append(f'{name}_bucket{{le="+Inf"}} {count}')
+        out.append(f"{name}_sum {total / 1e9:.9g}")
+        out.append(f"{name}_count {count}")
+        return "\n".join(out)
+
+
+class Timer:
+    """
+    Times a block or function into a histogram with perf_counter_ns.
+    Use it as a decorator (@timer('name')) or a context manager (with timer('name'): ...).
+    """
+
+    def __init__(self, histogram: Histogram, registry: 'Registry') -> None:
+        """
+        Initialization method for the Timer class.
+        :param histogram: where durations are recorded
+        :param registry: registry whose enabled flag is honoured
+        :return: None
+        """
+        self.histogram = histogram
+        self.registry = registry
+        self._calls = 0
+        self._starts = threading.local()
+
+    def _sampled(self) -> bool:
+        """
+        Decide whether this call is recorded
+        :return: True if it should be timed
+        """
+        if not self.registry.enabled:
+            return False
+        every = self.histogram.sample_every
+        if every == 1:
+            return True
+        self._calls += 1  # unlocked on purpose: sampling only needs to be roughly every n-th call
+        return self._calls % every == 0
+
+    def __call__(self, func: Callable) -> Callable:
+        """
+        Decorate a function, keeping its name, docstring and signature
+        :param func: function to time
+        :return: wrapper
+        """
+        histogram = self.histogram
+        sampled = self._sampled
+        clock = time.perf_counter_ns
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not sampled():
+                return func(*args, **kwargs)
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.record(clock() - start)
+
+        return wrapper
+
+    def __enter__(self) -> 'Timer':
+        stack = getattr(self._starts, 'stack', None)
+        if stack is None:
+            stack = self._starts.stack = []
+        stack.append(time.perf_counter_ns() if self._sampled() else None)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        start = self._starts.stack.pop()
+        if start is not None:
+            self.histogram.record(time.perf_counter_ns() - start)
+
+
+class Registry:
+    """Named histograms of one process, exported together."""
+
+    def __init__(self, prefix: str = 'kiosk_', enabled: bool = True, sample_every: int = 1) -> None:
+        """
+        Initialization method for the Registry class.
+        :param prefix: prefix of exported metric names
+        :param enabled: record anything at all; disabled timers only cost a flag check
+        :param sample_every: default sampling of new timers, 1 to time every call
+        :return: None
+        """
+        self.prefix = prefix
+        self.enabled = enabled
+        self.sample_every = sample_every
+        self.histograms: Dict[str, Histogram] = {}
+        self.timers: Dict[str, Timer] = {}
+        self._lock = threading.Lock()
+
+    def timer(self, name: str, help_text: str = '', sample_every: Optional[int] = None) -> Timer:
+        """
+        Return the timer of a name, creating it on first use
+        :param name: metric name (letters, digits and underscores)
+        :param help_text: description
+        :param sample_every: record only every n-th call, the registry default by default
+        :return: timer
+        """
+        with self._lock:
+            found = self.timers.get(name)
+            if found is None:
+                histogram = Histogram(name, help_text, sample_every or self.sample_every)
+                found = self.timers[name] = Timer(histogram, self)
+                self.histograms[name] = histogram
+            return found
+
+    def merge(self, histograms: Dict[str, Histogram]) -> None:
+        """
+        Add histograms recorded elsewhere (another registry or process) to the ones of the same name
+        :param histograms: metric name -> histogram
+        :return: None
+        """
+        for name, histogram in histograms.items():
+            self.timer(name, histogram.help_text, histogram.sample_every).histogram.merge(histogram)
+
+    def reset(self) -> None:
+        """
+        Clear every histogram
+        :return: None
+        """
+        for histogram in list(self.histograms.values()):
+            histogram.reset()
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summary of every histogram
+        :return: metric name -> summary
+        """
+        return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def to_json(self) -> str:
+        """
+        JSON export
+        :return: JSON text
+        """
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        Prometheus text exposition format export
+        :return: text ending with a newline
+        """
+        return "\n".join(histogram.prometheus(self.prefix)
+                         for _, histogram in sorted(self.histograms.items())) + "\n"
+
+    def write(self, path: str) -> None:
+        """
+        Save the metrics atomically, as Prometheus text for .prom/.txt files and JSON otherwise
+        :param path: output file
+        :return: None
+        """
+        text = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json()
+        # write next to the file and rename over it, so a scraper never reads a half-written file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as fp:
+                fp.write(text)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def report(self) -> str:
+        """
+        One line per timer that recorded something
+        :return: text
+        """
+        lines = []
+        for name, summary in self.to_dict().items():
+            if summary['count']:
+                lines.append(f"{name:<24} {summary['count']:8d} calls  p50 {summary['p50_ms']:8.3f} ms  "
+                             f"p99 {summary['p99_ms']:8.3f} ms  max {summary['max_ms']:8.3f} ms")
+        return "\n".join(lines)
+
+
+REGISTRY = Registry()
+
+
+def timer(name: str, help_text: str = '', sample_every: Optional[int] = None) -> Timer:
+    """
+    Timer of the process-wide registry
+    :param name: metric name
+    :param help_text: description
+    :param sample_every: record only every n-th call
+    :return: timer usable as decorator or context manager
+    """
+    return REGISTRY.timer(name, help_text, sample_every)
@@ -1,251 +1,207 @@
-import threading
-import time
 import tkinter as tk
 from tkinter import messagebox
-import sqlite3
-from typing import List
-from datetime import datetime
-import requests
+from typing import TYPE_CHECKING, List, Optional, Sequence
+
+from cart_view import CartViewModel
+from catalog import MenuCatalog, changed_slots
+from checkout import CheckoutPipeline
+from instrumentation import REGISTRY, timer
+from journal import OrderJournal, get_journal
+from lanes import Lane, LaneHost
+from ledger import CompletedOrder, OrderLedger, get_ledger
+from order_core import Menu, OrderProcessor, default_pricing_engine
+from pricing import PricingEngine, Rule
+from scheduler import TkBridge, get_scheduler, job_names, stop_scheduler
+from stall_monitor import StallMonitor
+from weather import WeatherManager, WeatherStatusError
+
+if TYPE_CHECKING:
+    from order_client import OrderServiceClient
+
+# Only the Tk front end lives here; the order logic is in order_core, the network side in
+# order_client and weather, so scripts and the order service can use them without tkinter.
+# order_client is imported only when a service URL is given; a local kiosk never loads it.
+
+__all__ = ['KioskGUI', 'run_lanes', 'WeatherManager', 'WeatherStatusError']  # the weather names predate weather.py
+
+CHECKPOINT_INTERVAL = 60         # seconds between WAL checkpoints of the ticket/ledger database
+METRICS_INTERVAL = 60            # seconds between writes of the timing metrics
+METRICS_PATH = 'kiosk_metrics.prom'
+MENU_POLL_INTERVAL = 2           # seconds between checks of the menu catalog for changes
+
+
+def connect_service(service_url: Optional[str]) -> Optional['OrderServiceClient']:
+    """
+    Client of the order service, importing order_client only when there is one
+    :param service_url: order service address, None for a local kiosk
+    :return: OrderServiceClient, None without service_url
+    """
+    if not service_url:
+        return None
+    from order_client import OrderServiceClient
+    return OrderServiceClient(service_url)
 
-class Menu:
-    """Represents the cafe menu."""
 
-    def __init__(self, drinks: List[str], prices: List[int]):
-        """
-        Initialization method for the Menu class.
-        :param drinks: beverage name list
-        :param prices: beverage price list
-        """
-        if len(drinks) != len(prices):
-            raise ValueError("Drinks and prices lists must have the same length.")
-
-        self.drinks = drinks
-        self.prices = prices
-
-    def display_menu(self) -> str:
+class KioskGUI:
+    def __init__(self, root: tk.Tk, menu_drinks: List[str], menu_prices: List[int],
+                 ledger: Optional[OrderLedger] = None, pricing_rules: Optional[Sequence[Rule]] = None,
+                 service_url: Optional[str] = None, journal: Optional[OrderJournal] = None,
+                 lane: Optional[Lane] = None, catalog: Optional[MenuCatalog] = None) -> None:
         """
-        Generate a dynamic menu string
-        :return: formatted menu string
+        Initialization method for the KioskGUI class.
+        :param root: Tk root window
+        :param menu_drinks: beverage name list (ignored with service_url, the service's menu is used)
+        :param menu_prices: beverage price list (ignored with service_url)
+        :param ledger: order ledger, the shared one of 'queue_number.db' by default
+        :param pricing_rules: pricing rules, the threshold discount by default
+        :param service_url: order service address; when given, tickets and the ledger live on the service
+        :param journal: event journal of this kiosk, the shared one of 'kiosk.journal' by default
+        :param lane: one lane of a multi-lane kiosk (root is then this screen's Tk or Toplevel); menu,
+            pricing, journal, ledger and service come from the lane's host and the other arguments are ignored
+        :param catalog: menu catalog to show and watch instead of menu_drinks/menu_prices; changes are
+            picked up without a restart once the current cart is empty (ignored with service_url and lane)
         """
-        return "".join(
-            [f"{k + 1}) {self.drinks[k]} {self.prices[k]} won\n"
-             for k in range(len(self.drinks))]
-        ) + f"{len(self.drinks) + 1}) Exit : "
+        self.root = root
+        self.lane = lane
+        self.pricing_rules = pricing_rules
+        self.pending_menu: Optional[Menu] = None  # reloaded menu waiting for the cart to empty
+        self.root.title("Cafe Kiosk" if lane is None else f"Cafe Kiosk - {lane.name}")
+        self.root.geometry("900x700")
+        self.root.configure(bg="#FFFFFF")  # macOS 스타일의 깨끗한 흰색 배경
 
-    def get_price(self, idx: int) -> int:
-        """
-        Get the price of a drink at a given index.
-        :param idx: index of the drink
-        :return: price of the drink
-        """
-        if 0 <= idx < len(self.prices):
-            return self.prices[idx]
+        if lane is not None:
+            # Multi-lane mode: only the cart and its view belong to this screen, the rest is the host's
+            host = lane.host
+            self.service, self.menu, self.pricing_engine, self.journal = (host.service, host.menu,
+                                                                          host.pricing_engine, host.journal)
+            self.order_processor, self.cart_view = lane.processor, lane.view
+            ledger = host.ledger
+            catalog = None
         else:
-            raise IndexError("Invalid menu index.")
+            # Initialize menu and order processor
+            self.service = connect_service(service_url)
+            if self.service is not None:
+                drinks, prices, skus, version = self.service.menu()
+                self.menu = Menu(drinks, prices, skus, version)
+                catalog = None
+            elif catalog is not None:
+                self.menu = catalog.menu
+            else:
+                self.menu = Menu(menu_drinks, menu_prices)
+            # Pricing rules are compiled once per menu snapshot and shared by every order
+            self.pricing_engine = self.compile_pricing(self.menu)
+            # Every click, reset and checkout is appended to the kiosk's journal for audit and crash recovery
+            self.journal = journal if journal is not None else get_journal('kiosk.journal')
+            self.order_processor = self.new_order_processor()
+            self.cart_view = CartViewModel(self.order_processor)
+        # Completed orders are written by the ledger's background thread, never on the Tk thread
+        if ledger is None and self.service is None:
+            ledger = get_ledger('queue_number.db')
+        self.ledger = ledger
+        # Ticket numbering, receipt rendering and printing run on worker threads; results come back via root.after
+        self.checkout_pipeline = CheckoutPipeline(lambda fn: self.root.after(0, fn), self.ledger,
+                                                  renderer=OrderProcessor.receipt_renderer)
+        self.checkout_pending = False
+        self.catalog = catalog
+        self.menu_listener = None
+        # Initializer weather manager
+        self.weather_manager = WeatherManager()
+        
+        # Create GUI widgets
+        self.create_widgets()
 
-    def get_drink_name(self, idx: int) -> str:
+        # Watch how long the event loop is kept busy (reported on exit); lanes in Toplevels share the root's loop
+        self.stall_monitor = StallMonitor(self.root) if isinstance(self.root, tk.Tk) else None
+        if self.stall_monitor is not None:
+            self.stall_monitor.start()
+        
+        # Show the cached weather right away; side jobs run on the shared scheduler thread, whether or
+        # not anyone is ordering, and hand their results back to this window via root.after
+        self.weather_label.config(text=self.weather_manager.current_weather)
+        self.bridge = TkBridge(self.root)
+        self.scheduler = get_scheduler()
+        self.job_prefix = f"{lane.name if lane is not None else 'kiosk'}: "
+        self.schedule_jobs()
+        
+    def new_order_processor(self) -> OrderProcessor:
         """
-        Get the name of a drink at a given index.
-        :param idx: index of the drink
-        :return: name of the drink
+        Create an empty cart, checked out locally or on the order service
+        :return: order processor
         """
-        if 0 <= idx < len(self.drinks):
-            return self.drinks[idx]
-        else:
-            raise IndexError("Invalid menu index.")
+        if self.service is not None:
+            from order_client import RemoteOrderProcessor
+            return RemoteOrderProcessor(self.menu, self.service, pricing_engine=self.pricing_engine,
+                                        journal=self.journal)
+        return OrderProcessor(self.menu, pricing_engine=self.pricing_engine, journal=self.journal)
 
-    def get_menu_length(self) -> int:
+    def compile_pricing(self, menu: Menu) -> PricingEngine:
         """
-        Get the number of items on the menu.
-        :return: the length of the menu
+        Compile this kiosk's pricing rules for a menu snapshot
+        :param menu: menu snapshot
+        :return: pricing engine
         """
-        return len(self.drinks)
-
-
-class OrderProcessor:
-    """Processes cafe orders, applies discounts, and prints receipts."""
-    DISCOUNT_THRESHOLD = 10000
-    DISCOUNT_RATE = 0.1
-
-    def __init__(self, menu: Menu) -> None:
+        if self.pricing_rules is not None:
+            return PricingEngine(menu, self.pricing_rules)
+        return default_pricing_engine(menu)
+
+    def schedule_jobs(self) -> None:
+        """Register this window's periodic jobs; the main window also runs the process-wide ones"""
+        weather = self.weather_manager
+        show_weather = lambda _: self.update_weather_display(weather.current_weather)
+        self.scheduler.every(self.job_prefix + 'weather', weather.refresh, weather.update_interval,
+                             first_delay=0 if weather.should_update() else weather.update_interval,
+                             max_backoff=300, on_result=show_weather, on_error=show_weather)
+        if self.catalog is not None:
+            # every window listens; polling the catalog is cheap and only the first poll after a change reloads
+            self.menu_listener = self.bridge.wrap(lambda old, new: self.menu_changed(new))
+            self.catalog.subscribe(self.menu_listener)
+            self.scheduler.every(self.job_prefix + 'menu', self.catalog.poll, MENU_POLL_INTERVAL)
+        if not isinstance(self.root, tk.Tk):
+            return  # lanes in Toplevels leave the shared jobs to the main window
+        self.scheduler.every(self.job_prefix + 'checkpoint', self.checkpoint, CHECKPOINT_INTERVAL,
+                             first_delay=CHECKPOINT_INTERVAL)
+        self.scheduler.every(self.job_prefix + 'metrics', lambda: REGISTRY.write(METRICS_PATH), METRICS_INTERVAL,
+                             first_delay=METRICS_INTERVAL)
+
+    def checkpoint(self) -> None:
+        """Scheduler job: fold the database's WAL back into the file and sync the journal to disk"""
+        if self.ledger is not None:
+            self.ledger.pool.checkpoint()
+        self.journal.sync()
+
+    def menu_changed(self, menu: Menu) -> None:
         """
-        Initialization method for the OrderProcessor class.
-        :param menu: An instance of the Menu class.
-        :return: None
+        Take a reloaded menu; it is shown as soon as no customer is in the middle of an order
+        :param menu: new menu snapshot
         """
+        self.pending_menu = menu
+        self.apply_pending_menu()
+
+    def apply_pending_menu(self) -> None:
+        """Switch to the reloaded menu if the cart is empty, rebuilding only the buttons that changed"""
+        menu = self.pending_menu
+        if menu is None or self.checkout_pending or len(self.order_processor.cart):
+            return  # the customer keeps the menu (and prices) they started with
+        self.pending_menu = None
+        slots = changed_slots(self.menu, menu)
         self.menu = menu
-        self.amounts = [0] * menu.get_menu_length()
-        self.total_price = 0
-
-        self.conn = sqlite3.connect('queue_number.db')
-        self.cur = self.conn.cursor()
-
-        self.cur.execute('''
-            create table if not exists ticket (
-            id integer primary key autoincrement,
-            number integer not null
-            )
-        ''')
-
-        self.conn.commit()
-
-    def apply_discount(self, price: int) -> float:
-        """
-        Apply discount rate when the total amount exceeds a certain threshold
-        :param price: price before discount
-        :return: price after discount
-        """
-        if price >= self.DISCOUNT_THRESHOLD:
-            return price * (1 - self.DISCOUNT_RATE)
-        return price
-
-    def process_order(self, idx: int) -> None:
-        """
-        Process the order and accumulate the total price
-        :param idx: index of the ordered drink
-        :return: None
-        """
-        drink_name = self.menu.get_drink_name(idx)
-        drink_price = self.menu.get_price(idx)
-
-        # print(f"{drink_name} ordered. Price: {drink_price} won")
-        self.total_price += drink_price
-        self.amounts[idx] += 1
-
-    def get_receipt_text(self) -> str:
-        """
-        Return order summary and final price with formatted alignment
-        :return: formatted receipt text as string
-        """
-        receipt_text = f"{'Product':<15} {'Price':<10} {'Amount':<10} {'Subtotal':<10}\n"
-        receipt_text += "-" * 50 + "\n"
-
-        for i in range(self.menu.get_menu_length()):
-            if self.amounts[i] > 0:
-                drink_name = self.menu.get_drink_name(i)
-                drink_price = self.menu.get_price(i)
-
-                receipt_text += f"{drink_name:<15} {drink_price:<10} {self.amounts[i]:<10} {drink_price * self.amounts[i]} won\n"
-
-        discounted_price = self.apply_discount(self.total_price)
-        discount = self.total_price - discounted_price
-
-        receipt_text += "-" * 50 + "\n"
-        receipt_text += f"{'Total price before discount:':<30} {self.total_price} won\n"
-        if discount > 0:
-            receipt_text += f"{'Discount amount:':<30} {discount} won\n"
-            receipt_text += f"{'Total price after discount:':<30} {discounted_price} won\n"
-        else:
-            receipt_text += f"{'No discount applied.':<30}\n"
-            receipt_text += f"{'Total price:':<30} {self.total_price:>5} won\n"
-        receipt_text = receipt_text + '\t' + datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        return receipt_text
-
-    def get_next_ticket_number(self) -> int:
-        """
-        Function that Produce next ticket number (Database version)
-        :return: next ticket number
-        """
-        self.cur.execute('select number from ticket order by number desc limit 1')
-        result = self.cur.fetchone()
-
-        if result is None:
-            number = 1
-            self.cur.execute('insert into ticket (number) values (?)', (number,))
-        else:
-            number = result[0] + 1
-            # self.cur.execute('insert into ticket (number) values (?)', (number,))
-            self.cur.execute('update ticket set number = ? where id = (select id from ticket order by id desc limit 1)',
-                             (number,))
-
-        self.conn.commit()
-        return number
+        self.pricing_engine = self.compile_pricing(menu)
+        self.order_processor.set_menu(menu, self.pricing_engine)
+        self.cart_view.bind(self.order_processor)
+        for slot in slots:
+            if slot >= menu.get_menu_length():
+                self.menu_buttons.pop().destroy()  # removed slots are the tail of the old menu
+            elif slot < len(self.menu_buttons):
+                self.menu_buttons[slot].config(text=self.menu_button_text(slot))
+            else:
+                self.menu_buttons.append(self.make_menu_button(slot))
 
-    def __del__(self) -> None:
-        """
-        Destructor method for OrderProcessor - close database connection
-        :return: None
-        """
-        # print('End program')
-        self.conn.close()  # db connection close ....
-
-
-
-class WeatherManager:
-    def __init__(self):
-        self.current_weather = 'Loading weather information...'
-        self.last_update_time = 0
-        self.update_interval = 30 # 30 seconds
-        self.is_updating = False
-    
-    def should_update(self) -> bool:
-        """
-        Check if the weather information should be updated based on the last update time and interval.
-        :return: True if update is needed, False otherwise.
-        """
-        current_time = time.time()
-        return (current_time - self.last_update_time) > self.update_interval
-    
-    def update_weather_async(self, callback_func) -> None:
-        """Update weather information asynchronously"""
-        if self.is_updating:
-            return  # 이미 업데이트 중이면 중복 요청 방지
-
-        def fetch_weather():
-            self.is_updating = True
-            try:
-                url = "https://wttr.in/incheon?format=4"
-                response = requests.get(url, timeout=5)  # 타임아웃 설정
-
-                if response.status_code == 200:
-                    weather_text = response.text.strip()
-                    self.current_weather = f"Current weather ({weather_text})"
-                else:
-                    self.current_weather = f"Weather information cannot be loaded. (Status code : {response.status_code})"
-
-                self.last_update_time = time.time()
-
-            except requests.exceptions.Timeout:
-                self.current_weather = "Weather information timeout"
-            except requests.exceptions.RequestException as err:
-                self.current_weather = f"Weather information error: Connection failed"
-            except Exception as err:
-                self.current_weather = f"Weather information error: {str(err)}"
-            finally:
-                self.is_updating = False
-                # UI 업데이트를 위한 콜백 호출
-                if callback_func:
-                    callback_func(self.current_weather)
-
-        # 백그라운드 스레드에서 실행
-        thread = threading.Thread(target=fetch_weather, daemon=True)
-        thread.start()
-    
-class KioskGUI:
-    def __init__(self, root: tk.Tk, menu_drinks: List[str], menu_prices: List[int]) -> None:
-        self.root = root
-        self.root.title("Cafe Kiosk")
-        self.root.geometry("900x700")
-        self.root.configure(bg="#FFFFFF")  # macOS 스타일의 깨끗한 흰색 배경
-
-        # Initialize menu and order processor
-        self.menu = Menu(menu_drinks, menu_prices)
-        self.order_processor = OrderProcessor(self.menu)
-        # Initializer weather manager
-        self.weather_manager = WeatherManager()
-        
-        # Create GUI widgets
-        self.create_widgets()
-        
-        # Asynchronously update weather information
-        self.weather_manager.update_weather_async(self.update_weather_display)
-        
     def update_weather_display(self, weather_text: str) -> None:
         """
         Update the weather label with the latest weather information.
         :param weather_text: The latest weather information to display.
         """
-        self.root.after(0, lambda: self.weather_label.config(text=weather_text))
+        self.bridge.post(lambda: self.weather_label.config(text=weather_text))
 
     def create_widgets(self) -> None:
         """Create and initialize all GUI widgets"""
@@ -257,28 +213,14 @@ class KioskGUI:
         title_label.grid(row=0, column=0)
 
         # Menu buttons frame
-        menu_frame = tk.Frame(self.root, bg="#f0f0f0", padx=10, pady=10)
+        self.menu_frame = menu_frame = tk.Frame(self.root, bg="#f0f0f0", padx=10, pady=10)
         menu_frame.grid(row=1, column=0, sticky="nsew")
 
         menu_label = tk.Label(menu_frame, text="Menu", font=("SF Pro Display", 18, "bold"), bg="#f0f0f0", fg="#1d1d1f")  # Apple 다크 그레이
         menu_label.grid(row=0, column=0, columnspan=2, pady=(0, 10))
 
         # Create menu buttons
-        for i in range(self.menu.get_menu_length()):
-            drink_name = self.menu.get_drink_name(i)
-            drink_price = self.menu.get_price(i)
-
-            # Button with drink name and price
-            btn = tk.Button(
-                menu_frame,
-                text=f"{drink_name}\n{drink_price} won",
-                font=("SF Pro Display", 13),
-                width=15,
-                height=3,
-                bg="#F5F5F7",  # Apple 라이트 그레이
-                command=lambda idx=i: self.add_to_order(idx)
-            )
-            btn.grid(row=(i // 2) + 1, column=i % 2, padx=5, pady=5, sticky="nsew")
+        self.menu_buttons = [self.make_menu_button(i) for i in range(self.menu.get_menu_length())]
 
         # Order summary frame
         order_frame = tk.Frame(self.root, bg="#f0f0f0", padx=10, pady=10)
@@ -297,7 +239,7 @@ class KioskGUI:
         control_frame.grid(row=2, column=0, columnspan=2, sticky="ew")
 
         # Complete order button
-        complete_btn = tk.Button(
+        self.complete_btn = tk.Button(
             control_frame,
             text="Complete Order",
             font=("SF Pro Display", 12, "bold"),
@@ -307,7 +249,7 @@ class KioskGUI:
             pady=5,
             command=self.complete_order
         )
-        complete_btn.grid(row=0, column=0, padx=5, pady=5)
+        self.complete_btn.grid(row=0, column=0, padx=5, pady=5)
 
         # Reset order button
         reset_btn = tk.Button(
@@ -350,6 +292,33 @@ class KioskGUI:
         self.root.grid_columnconfigure(0, weight=1)
         self.root.grid_columnconfigure(1, weight=1)
 
+    def menu_button_text(self, idx: int) -> str:
+        """
+        Label of a menu button
+        :param idx: index of the drink in the menu
+        :return: drink name and price
+        """
+        return f"{self.menu.get_drink_name(idx)}\n{self.menu.get_price(idx)} won"
+
+    def make_menu_button(self, idx: int) -> tk.Button:
+        """
+        Create the button of one menu slot
+        :param idx: index of the drink in the menu
+        :return: the button, placed in the menu grid
+        """
+        # Button with drink name and price
+        btn = tk.Button(
+            self.menu_frame,
+            text=self.menu_button_text(idx),
+            font=("SF Pro Display", 13),
+            width=15,
+            height=3,
+            bg="#F5F5F7",  # Apple 라이트 그레이
+            command=lambda: self.add_to_order(idx)
+        )
+        btn.grid(row=(idx // 2) + 1, column=idx % 2, padx=5, pady=5, sticky="nsew")
+        return btn
+
     # def update_weather_info(self) -> None:
     #     """ Load weather data from 'wttr.in'"""
     #     # url = "https://wttr.in/incheon?&0&Q"
@@ -374,59 +343,66 @@ class KioskGUI:
         Add the selected drink to the order
         :param idx: index of the drink in the menu
         """
-        self.order_processor.process_order(idx)
+        if self.checkout_pending:
+            return  # the cart is being checked out on a worker thread
+        self.cart_view.mark_dirty(self.order_processor.process_order(idx))
         self.update_order_display()
-        # self.update_weather_info()  # Load weather data
-        if self.weather_manager.should_update():
-            self.weather_manager.update_weather_async(self.update_weather_display)
 
+    @timer('update_order_display', 'Redrawing the order summary')
     def update_order_display(self) -> None:
-        """Update the order summary in the text widget"""
+        """Update the order summary in the text widget (only the lines that changed and the totals)"""
         # Enable text widget for editing
         self.order_text.config(state=tk.NORMAL)
-        # Clear current content
-        self.order_text.delete(1.0, tk.END)
-
-        # Add current order information
-        order_info = "Current Order:\n\n"
-
-        for i in range(self.menu.get_menu_length()):
-            if self.order_processor.amounts[i] > 0:
-                drink_name = self.menu.get_drink_name(i)
-                drink_price = self.menu.get_price(i)
-                subtotal = drink_price * self.order_processor.amounts[i]
-
-                order_info += f"{drink_name}: {self.order_processor.amounts[i]} × {drink_price} = {subtotal} won\n"
-
-        # Check if discount should be applied and show in the display
-        total_price = self.order_processor.total_price
-        if total_price >= self.order_processor.DISCOUNT_THRESHOLD:
-            discounted_price = self.order_processor.apply_discount(total_price)
-            discount_amount = total_price - discounted_price
-
-            order_info += f"\nTotal before discount: {total_price} won"
-            order_info += f"\nDiscount ({int(self.order_processor.DISCOUNT_RATE * 100)}%): {discount_amount} won"
-            order_info += f"\nTotal after discount: {discounted_price} won"
-        else:
-            order_info += f"\nTotal: {total_price} won"
-            # Show how much more to spend for discount
-            if total_price > 0:
-                remaining = self.order_processor.DISCOUNT_THRESHOLD - total_price
-                order_info += f"\n(Spend {remaining} won more for {int(self.order_processor.DISCOUNT_RATE * 100)}% discount)"
-
-        self.order_text.insert(tk.END, order_info)
+        self.cart_view.flush(self.order_text)
         # Disable editing
         self.order_text.config(state=tk.DISABLED)
 
     def complete_order(self) -> None:
-        """Complete the current order and show receipt"""
+        """Start checking out the current order; the receipt is shown once the worker is done"""
+        if self.checkout_pending:
+            return
         if self.order_processor.total_price <= 0:
             messagebox.showinfo("Empty Order", "Please add items to your order first.")
             return
 
-        # Get receipt text and queue number
-        receipt_text = self.order_processor.get_receipt_text()
-        queue_number = self.order_processor.get_next_ticket_number()
+        # Get queue number and receipt text off the Tk thread; the ledger gets the very same order snapshot
+        self.checkout_pending = True
+        self.complete_btn.config(state=tk.DISABLED)
+        self.checkout_pipeline.submit(self.order_processor, self.show_receipt, self.checkout_failed,
+                                      self.receipt_not_printed)
+
+    def checkout_failed(self, err: Exception) -> None:
+        """
+        Report a failed checkout and let the customer try again
+        :param err: the error raised on the worker thread
+        """
+        self.checkout_pending = False
+        self.complete_btn.config(state=tk.NORMAL)
+        title = "Error"
+        if self.service is not None:
+            from order_client import OrderServiceError
+            if isinstance(err, OrderServiceError):
+                title = "Order Service"
+        messagebox.showerror(title, f"The order could not be completed.\n{err}")
+
+    def receipt_not_printed(self, completed_order: CompletedOrder, err: Exception) -> None:
+        """
+        Tell the customer the order went through although its receipt didn't print
+        :param completed_order: order as checked out, kept for reprint by the pipeline
+        :param err: the render or printer error
+        """
+        messagebox.showwarning("Printer", f"Order {completed_order.ticket} is complete, but the receipt "
+                                          f"could not be printed; please ask the staff for a reprint.\n{err}")
+
+    def show_receipt(self, completed_order: CompletedOrder, receipt_text: str) -> None:
+        """
+        Show the receipt of a completed order
+        :param completed_order: order as checked out
+        :param receipt_text: rendered receipt
+        """
+        self.checkout_pending = False
+        self.complete_btn.config(state=tk.NORMAL)
+        queue_number = completed_order.ticket
 
         # Create receipt window
         receipt_window = tk.Toplevel(self.root)
@@ -458,8 +434,12 @@ class KioskGUI:
 
     def reset_order(self) -> None:
         """Reset the current order"""
-        # Create a new OrderProcessor with the same menu
-        self.order_processor = OrderProcessor(self.menu)
+        if self.checkout_pending:
+            return
+        # Empty the cart in place (the journal records the reset) and redraw it
+        self.order_processor.reset()
+        self.cart_view.bind(self.order_processor)
+        self.apply_pending_menu()
         # Update display
         self.update_order_display()
         
@@ -467,4 +447,42 @@ class KioskGUI:
     def exit_program(self) -> None:
         """Exit the program"""
         if messagebox.askyesno("Exit", "Are you sure you want to exit?"):
-            self.root.destroy()
\ No newline at end of file
+            if self.stall_monitor is not None:
+                self.stall_monitor.stop()
+                print(self.stall_monitor.summary())
+                print(REGISTRY.report())
+            for name in job_names(self.scheduler, self.job_prefix):
+                self.scheduler.cancel(name)
+            if self.menu_listener is not None:
+                self.catalog.unsubscribe(self.menu_listener)
+            if isinstance(self.root, tk.Tk):
+                stop_scheduler()  # the other lanes' windows go with the main one
+            self.checkout_pipeline.close()
+            if self.lane is not None:
+                self.lane.close()
+            self.root.destroy()  # the main window takes the other lanes' Toplevels with it
+
+
+def run_lanes(lanes: int, menu_drinks: List[str], menu_prices: List[int],
+              pricing_rules: Optional[Sequence[Rule]] = None, service_url: Optional[str] = None) -> None:
+    """
+    Run a multi-lane kiosk: one window per lane (the first is the main window), one shared host
+    :param lanes: number of lanes
+    :param menu_drinks: beverage name list (ignored with service_url)
+    :param menu_prices: beverage price list (ignored with service_url)
+    :param pricing_rules: pricing rules, the threshold discount by default
+    :param service_url: order service address; when given, tickets and the ledger live on the service
+    :return: None
+    """
+    service = connect_service(service_url)
+    if service is not None:
+        drinks, prices, skus, version = service.menu()
+        menu = Menu(drinks, prices, skus, version)
+    else:
+        menu = Menu(menu_drinks, menu_prices)
+    engine = PricingEngine(menu, pricing_rules) if pricing_rules is not None else None
+    host = LaneHost(menu, lanes, engine, service=service)
+    root = tk.Tk()
+    for k in range(lanes):
+        KioskGUI(root if k == 0 else tk.Toplevel(root), menu_drinks, menu_prices, lane=host.open_lane())
+    root.mainloop()
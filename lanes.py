@@ -0,0 +1,159 @@
+import threading
+from typing import Dict, List, Optional
+
+from cart import REGULAR, LineKey, Modifiers
+from cart_view import CartViewModel
+from journal import OrderJournal, get_journal
+from ledger import CompletedOrder, OrderLedger, get_ledger
+from order_core import Menu, OrderProcessor, OrderProcessorPool, default_pricing_engine
+from pricing import PricingEngine
+from ticket import get_allocator
+
+# Multi-lane mode: one process drives several screens (touchscreens, a staff tablet), each with
+# its own cart. Everything expensive or stateful is shared once per process; a lane only owns its
+# cart. The shared parts lock for as short as they can:
+#   Menu, PricingEngine       immutable after construction, read without locks
+#   TicketAllocator           one lock around handing out a number (block reservation included)
+#   OrderJournal              one lock around the 32-byte append
+#   OrderLedger               a queue; the writer thread commits batches off every lane's thread
+# and a lane's cart, pricing session and cart view are touched by that lane only, so lanes never
+# wait on each other while taking orders.
+
+
+class LaneHost:
+    """The menu, pricing plan, ticket allocator, ledger writer, journal and cart pool shared by every lane."""
+
+    def __init__(self, menu: Menu, lanes: int = 4, pricing_engine: Optional[PricingEngine] = None,
+                 db_path: str = 'queue_number.db', journal: Optional[OrderJournal] = None,
+                 ledger: Optional[OrderLedger] = None, ticket_block: int = 1, service=None) -> None:
+        """
+        Initialization method for the LaneHost class.
+        :param menu: menu shown on every lane
+        :param lanes: most lanes open at the same time
+        :param pricing_engine: compiled pricing rules, the threshold discount by default
+        :param db_path: database of the ticket table and the ledger
+        :param journal: event journal of this kiosk, the shared one of 'kiosk.journal' by default
+        :param ledger: order ledger, the shared one of db_path by default (unused with service)
+        :param ticket_block: ticket numbers reserved per database write
+        :param service: OrderServiceClient; when given, tickets and the ledger live on the order service
+        :return: None
+        """
+        self.menu = menu
+        self.pricing_engine = pricing_engine if pricing_engine is not None else default_pricing_engine(menu)
+        self.journal = journal if journal is not None else get_journal('kiosk.journal')
+        self.service = service
+        if service is None:
+            self.allocator = get_allocator(db_path, ticket_block)
+            self.ledger = ledger if ledger is not None else get_ledger(db_path)
+        else:
+            self.allocator = None
+            self.ledger = None
+        self.pool = OrderProcessorPool(self.new_processor, size=lanes, timeout=0)
+        self.lanes: List['Lane'] = []
+        self._opened = 0  # lanes opened so far; numbers default names, never reused after a close
+        self._lock = threading.Lock()  # guards self.lanes and self._opened
+
+    def new_processor(self) -> OrderProcessor:
+        """
+        Build the cart of one lane, checked out locally or on the order service
+        :return: order processor
+        """
+        if self.service is not None:
+            from order_client import RemoteOrderProcessor
+            return RemoteOrderProcessor(self.menu, self.service, pricing_engine=self.pricing_engine,
+                                        journal=self.journal)
+        return OrderProcessor(self.menu, self.allocator, self.pricing_engine, self.journal)
+
+    def open_lane(self, name: Optional[str] = None) -> 'Lane':
+        """
+        Start a lane with an empty cart from the pool
+        :param name: lane name, "lane N" by default with N counting every lane opened
+        :return: new lane; TimeoutError when all lanes are open
+        """
+        processor = self.pool.acquire()
+        with self._lock:
+            self._opened += 1
+            lane = Lane(self, processor, name or f"lane {self._opened}")
+            self.lanes.append(lane)
+        return lane
+
+    def close_lane(self, lane: 'Lane') -> None:
+        """
+        Give a lane's cart back to the pool (emptied)
+        :param lane: lane from open_lane()
+        :return: None
+        """
+        with self._lock:
+            self.lanes.remove(lane)
+        self.pool.release(lane.processor)
+
+    def lane_names(self) -> Dict[str, 'Lane']:
+        """
+        Open lanes by name
+        :return: name -> lane
+        """
+        with self._lock:
+            return {lane.name: lane for lane in self.lanes}
+
+
+class Lane:
+    """One screen's cart and its display state. A lane is driven by one thread (its screen's) at a time."""
+
+    def __init__(self, host: LaneHost, processor: OrderProcessor, name: str) -> None:
+        """
+        Initialization method for the Lane class.
+        :param host: shared resources
+        :param processor: this lane's cart
+        :param name: lane name
+        :return: None
+        """
+        self.host = host
+        self.processor = processor
+        self.name = name
+        self.view = CartViewModel(processor)
+
+    def add(self, idx: int, modifiers: Modifiers = REGULAR, count: int = 1) -> LineKey:
+        """
+        Put drinks into this lane's cart and mark the line for the next redraw
+        :param idx: menu index
+        :param modifiers: size and extra shots
+        :param count: number of drinks
+        :return: key of the cart line
+        """
+        key = self.processor.process_order(idx, modifiers, count)
+        self.view.mark_dirty(key)
+        return key
+
+    def remove(self, idx: int, modifiers: Modifiers = REGULAR, count: int = 1) -> LineKey:
+        """
+        Take drinks out of this lane's cart and mark the line for the next redraw
+        :param idx: menu index
+        :param modifiers: size and extra shots
+        :param count: number of drinks
+        :return: key of the cart line
+        """
+        key = self.processor.remove_order(idx, modifiers, count)
+        self.view.mark_dirty(key)
+        return key
+
+    def checkout(self) -> CompletedOrder:
+        """
+        Issue a ticket from the shared allocator and queue the order to the shared ledger (blocking)
+        :return: completed order
+        """
+        return self.processor.checkout(self.host.ledger)
+
+    def reset(self) -> None:
+        """
+        Empty the cart for the next customer; the next flush of the view redraws everything
+        :return: None
+        """
+        self.processor.reset()
+        self.view.bind(self.processor)
+
+    def close(self) -> None:
+        """
+        Leave multi-lane mode for this screen
+        :return: None
+        """
+        self.host.close_lane(self)
@@ -0,0 +1,239 @@
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from storage import get_pool
+
+
+@dataclass(frozen=True)
+class CompletedOrder:
+    """A checked-out order as it is written to the ledger and rendered on receipts."""
+    ticket: Optional[int]  # None until a queue ticket has been issued
+    lines: List[Tuple[str, int, int]]  # (drink name, price, amount)
+    total_price: int
+    discount: int
+    final_price: int
+    created_at: str  # "%Y-%m-%d %H:%M:%S", same format as the receipt
+
+
+_STOP = object()
+
+
+class OrderLedger:
+    """Persists completed orders through a background writer that group-commits batches."""
+
+    def __init__(self, db_path: str = 'queue_number.db', flush_interval: float = 0.05,
+                 max_batch: int = 500, durable: bool = True, retry_timeout: float = 30.0) -> None:
+        """
+        Initialization method for the OrderLedger class.
+        :param db_path: path of the SQLite database holding the orders tables
+        :param flush_interval: longest time (seconds) an order waits for more orders to share its commit
+        :param max_batch: most orders written in one transaction
+        :param durable: fsync every batch (synchronous=FULL) instead of relying on the WAL checkpoint
+        :param retry_timeout: seconds a batch is retried while the database is busy or failing before it is
+            given up and kept in self.failed
+        :return: None
+        """
+        if max_batch < 1:
+            raise ValueError("Batch size must be at least 1.")
+
+        self.pool = get_pool(db_path)
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.durable = durable
+        self.orders_written = 0
+        self.batches_written = 0
+        self.retry_timeout = retry_timeout
+        self.failed: List[CompletedOrder] = []  # orders that could not be written, for the operator to re-record
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._closed_lock = threading.Lock()  # no order may be queued behind the stop marker
+        self._writer = threading.Thread(target=self._run, name='order-ledger', daemon=True)
+        self._writer.start()
+
+    def record(self, order: CompletedOrder) -> None:
+        """
+        Queue a completed order for writing. Returns immediately.
+        :param order: the order to persist
+        :return: None; RuntimeError once the ledger is closed
+        """
+        with self._closed_lock:
+            if self._closed:
+                raise RuntimeError("Order ledger is closed.")
+            self._queue.put(order)
+
+    def flush(self) -> None:
+        """
+        Block until every order recorded so far has been committed or given up
+        :return: None; RuntimeError if orders could not be written (they are kept in self.failed)
+        """
+        self._queue.join()
+        if self.failed:
+            raise RuntimeError(f"Order ledger could not write {len(self.failed)} orders.")
+
+    def close(self) -> None:
+        """
+        Write the remaining orders and stop the writer thread; record() fails afterwards
+        :return: None
+        """
+        with self._closed_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._writer.join()
+        if self.failed:
+            print(f"Order ledger closed with {len(self.failed)} orders not written")
+
+    def _run(self) -> None:
+        """
+        Writer loop: wait for one order, collect more until the batch is full or the interval ends, commit
+        :return: None
+        """
+        stopping = False
+        while not stopping:
+            batch = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    self._queue.task_done()
+                    break
+                batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    self._write_with_retry(batch)
+                except Exception as err:  # e.g. a malformed order; the writer must outlive it
+                    print(f"Order ledger could not write {len(batch)} orders: {err!r}")
+                    self.failed.extend(batch)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+
+    def _write_with_retry(self, batch: List[CompletedOrder]) -> None:
+        """
+        Write a batch, retrying with backoff while the database is busy or unavailable for up to
+        retry_timeout seconds; a batch that still fails is kept in self.failed
+        :param batch: orders to write
+        :return: None
+        """
+        delay = 0.05
+        deadline = time.monotonic() + self.retry_timeout
+        while True:
+            try:
+                self._write(batch)
+                return
+            except sqlite3.OperationalError as err:  # locked, busy, disk I/O -> keep the orders and try again
+                if time.monotonic() + delay > deadline:
+                    print(f"Order ledger gave up on {len(batch)} orders after {self.retry_timeout:g}s: {err}")
+                    break
+                print(f"Order ledger write failed, retrying in {delay:.2f}s: {err}")
+                time.sleep(delay)
+                delay = min(delay * 2, 2.0)
+            except sqlite3.Error as err:  # the batch itself is bad, retrying won't help
+                print(f"Order ledger could not write {len(batch)} orders: {err}")
+                break
+        self.failed.extend(batch)
+
+    def _write(self, batch: List[CompletedOrder]) -> None:
+        """
+        Write a batch of orders in a single transaction
+        :param batch: orders to write
+        :return: None
+        """
+        with self.pool.connection() as conn:
+            if self.durable:
+                conn.execute('pragma synchronous = FULL')
+            try:
+                conn.execute('begin immediate')
+                try:
+                    for order in batch:
+                        order_id = conn.execute(
+                            'insert into orders (ticket, total_price, discount, final_price, created_at) '
+                            'values (?, ?, ?, ?, ?)',
+                            (order.ticket, order.total_price, order.discount, order.final_price, order.created_at)
+                        ).lastrowid
+                        conn.executemany(
+                            'insert into order_lines (order_id, drink_name, price, amount) values (?, ?, ?, ?)',
+                            [(order_id, name, price, amount) for name, price, amount in order.lines]
+                        )
+                    conn.execute('commit')
+                except BaseException:
+                    conn.execute('rollback')
+                    raise
+            finally:
+                if self.durable:
+                    conn.execute('pragma synchronous = NORMAL')
+        self.orders_written += len(batch)
+        self.batches_written += 1
+
+
+def load_orders(db_path: str, day: str) -> List[CompletedOrder]:
+    """
+    Read back the orders of one day, oldest first
+    :param db_path: path of the SQLite database
+    :param day: date as "%Y-%m-%d"
+    :return: completed orders with their lines
+    """
+    with get_pool(db_path).connection() as conn:
+        rows = conn.execute(
+            'select id, ticket, total_price, discount, final_price, created_at from orders '
+            'where created_at >= ? and created_at < ? order by id',
+            (day, day + '~')  # '~' sorts after the ' HH:MM:SS' suffix
+        ).fetchall()
+        lines: Dict[int, List[Tuple[str, int, int]]] = {}
+        if rows:
+            for order_id, name, price, amount in conn.execute(
+                    'select order_id, drink_name, price, amount from order_lines '
+                    'where order_id between ? and ? order by rowid',
+                    (rows[0][0], rows[-1][0])):
+                lines.setdefault(order_id, []).append((name, price, amount))
+
+    return [CompletedOrder(ticket, lines.get(order_id, []), total_price, discount, final_price, created_at)
+            for order_id, ticket, total_price, discount, final_price, created_at in rows]
+
+
+_ledgers: Dict[str, OrderLedger] = {}
+_ledgers_lock = threading.Lock()
+
+
+def get_ledger(db_path: str = 'queue_number.db') -> OrderLedger:
+    """
+    Return the process-wide ledger for a database, starting its writer on first use
+    :param db_path: path of the SQLite database
+    :return: shared OrderLedger instance
+    """
+    with _ledgers_lock:
+        ledger = _ledgers.get(db_path)
+        if ledger is None:
+            ledger = OrderLedger(db_path)
+            _ledgers[db_path] = ledger
+        return ledger
+
+
+@atexit.register  # registered after storage's hook, so it runs before the pools close
+def close_ledgers() -> None:
+    """
+    Drain and stop every process-wide ledger
+    :return: None
+    """
+    with _ledgers_lock:
+        for ledger in _ledgers.values():
+            ledger.close()
+        _ledgers.clear()
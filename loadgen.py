@@ -0,0 +1,270 @@
+import argparse
+import bisect
+import itertools
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from instrumentation import REGISTRY, Histogram, Registry
+from ledger import get_ledger
+from order_core import Menu, OrderProcessor, default_pricing_engine
+from ticket import get_allocator
+
+POPULARITY = ('uniform', 'zipf', 'weights')
+# latencies reported at the end, in this order; the first two are measured here, the rest by the
+# instrumentation timers of order_core, ticket and storage
+REPORTED = ('customer', 'checkout', 'process_order', 'get_next_ticket_number', 'ticket_reserve',
+            'ticket_lock_wait', 'db_pool_wait')
+LOCK_WAITS = ('ticket_lock_wait', 'db_pool_wait')
+
+
+@dataclass(frozen=True)
+class LoadConfig:
+    """What every simulated customer does; shared by all worker processes."""
+    db_path: str
+    menu_items: int = 20
+    menu_csv: Optional[str] = None        # real menu instead of menu_items synthetic drinks
+    popularity: str = 'zipf'
+    skew: float = 1.1                     # zipf exponent: item k is picked in proportion to 1 / k**skew
+    weights: Optional[Sequence[float]] = None
+    customers: int = 200                  # per thread
+    duration: Optional[float] = None      # seconds per thread; stops earlier than customers when set
+    items_per_order: int = 3              # mean, orders have 1 to 2 * mean - 1 items
+    think_ms: float = 0.0                 # pause between two clicks of a customer
+    block_size: int = 1
+    threads: int = 4
+    seed: int = 0
+
+
+def popularity_weights(config: LoadConfig, items: int) -> List[float]:
+    """
+    Relative pick frequency of every menu slot
+    :param config: load configuration
+    :param items: menu size
+    :return: one weight per slot
+    """
+    if config.popularity == 'uniform':
+        return [1.0] * items
+    if config.popularity == 'zipf':
+        return [1 / (k + 1) ** config.skew for k in range(items)]
+    if config.popularity == 'weights':
+        if not config.weights or len(config.weights) != items:
+            raise ValueError(f"Expected {items} weights, one per menu item.")
+        return [float(w) for w in config.weights]
+    raise ValueError(f"Unknown popularity {config.popularity!r}, choose from {', '.join(POPULARITY)}.")
+
+
+def load_menu(config: LoadConfig) -> Menu:
+    """
+    The menu customers order from
+    :param config: load configuration
+    :return: menu
+    """
+    if config.menu_csv:
+        return Menu.from_csv(config.menu_csv)
+    return Menu([f"Drink {k:03d}" for k in range(config.menu_items)],
+                [1500 + 100 * (k % 30) for k in range(config.menu_items)])
+
+
+def customer_thread(config: LoadConfig, menu: Menu, cum_weights: List[float], registry: Registry,
+                    rng: random.Random, tickets: List[int]) -> None:
+    """
+    Serve customers one after the other: pick items, add them to a cart, check out
+    :param config: load configuration
+    :param menu: shared menu
+    :param cum_weights: cumulative popularity weights
+    :param registry: registry for the customer and checkout latencies
+    :param rng: this thread's random source
+    :param tickets: receives every ticket issued
+    :return: None
+    """
+    allocator = get_allocator(config.db_path, config.block_size)
+    engine = default_pricing_engine(menu)
+    ledger = get_ledger(config.db_path)
+    customer_timer = registry.timer('customer', 'Whole order, first item to checked out')
+    checkout_timer = registry.timer('checkout', 'Ticket, pricing and ledger hand-off')
+    deadline = time.monotonic() + config.duration if config.duration else None
+    total, slots = cum_weights[-1], len(cum_weights)
+
+    for _ in range(config.customers):
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        processor = OrderProcessor(menu, allocator, engine)
+        with customer_timer:
+            for _ in range(rng.randint(1, 2 * config.items_per_order - 1)):
+                if config.think_ms:
+                    time.sleep(config.think_ms / 1000)
+                processor.process_order(min(bisect.bisect(cum_weights, rng.random() * total), slots - 1))
+            with checkout_timer:
+                order = processor.checkout(ledger)
+        tickets.append(order.ticket)
+
+
+def run_worker(config: LoadConfig, worker: int) -> dict:
+    """
+    One load process: config.threads customer threads sharing the process's allocator and ledger
+    :param config: load configuration
+    :param worker: process number, seeds the random sources
+    :return: issued tickets, item count, elapsed seconds and every latency histogram
+    """
+    REGISTRY.reset()
+    registry = Registry()
+    menu = load_menu(config)
+    cum_weights = list(itertools.accumulate(popularity_weights(config, menu.get_menu_length())))
+    results: List[List[int]] = [[] for _ in range(config.threads)]
+    threads = [threading.Thread(target=customer_thread,
+                                args=(config, menu, cum_weights, registry,
+                                      random.Random(config.seed * 1000003 + worker * 1009 + k), results[k]))
+               for k in range(config.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    # every order is committed before the worker reports; flush, not close: the pool may hand this
+    # process another task, which must find the process's ledger still running
+    get_ledger(config.db_path).flush()
+
+    histograms: Dict[str, Histogram] = dict(REGISTRY.histograms)
+    histograms.update(registry.histograms)
+    return {
+        'tickets': [ticket for result in results for ticket in result],
+        'items': histograms['process_order'].count,
+        'elapsed': elapsed,
+        'histograms': histograms,
+    }
+
+
+def count_orders(db_path: str) -> int:
+    """
+    Orders in a ledger database
+    :param db_path: database path
+    :return: order count, 0 when the database doesn't exist yet
+    """
+    if not os.path.exists(db_path):
+        return 0
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute('select count(*) from orders').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def run_load(config: LoadConfig, processes: int) -> dict:
+    """
+    Run processes x config.threads customers against one database and merge what they measured
+    :param config: load configuration
+    :param processes: worker processes
+    :return: merged results, see report()
+    """
+    popularity_weights(config, load_menu(config).get_menu_length())  # fail here rather than in every worker
+    orders_before = count_orders(config.db_path)
+    start = time.perf_counter()
+    # spawn, not fork: every worker opens its own SQLite connections and ledger writer thread
+    with multiprocessing.get_context('spawn').Pool(processes) as pool:
+        parts = pool.starmap(run_worker, [(config, worker) for worker in range(processes)])
+    wall = time.perf_counter() - start
+
+    merged = Registry()
+    for part in parts:
+        merged.merge(part['histograms'])
+    tickets = [ticket for part in parts for ticket in part['tickets']]
+    return {
+        'processes': processes,
+        'threads': config.threads,
+        'orders': len(tickets),
+        'items': sum(part['items'] for part in parts),
+        'duplicate_tickets': len(tickets) - len(set(tickets)),
+        'ledger_orders': count_orders(config.db_path) - orders_before,
+        'elapsed': max(part['elapsed'] for part in parts),
+        'wall': wall,
+        'registry': merged,
+    }
+
+
+def report(result: dict) -> str:
+    """
+    Human-readable summary of a load run
+    :param result: run_load() result
+    :return: text
+    """
+    elapsed = result['elapsed']
+    workers = result['processes'] * result['threads']
+    lines = [
+        f"{result['processes']} processes x {result['threads']} threads, {result['orders']} orders "
+        f"({result['items']} items) in {elapsed:.2f} s",
+        f"throughput: {result['orders'] / elapsed:,.0f} orders/s, {result['items'] / elapsed:,.0f} items/s",
+        "",
+        f"{'latency (ms)':<24} {'count':>8} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}",
+    ]
+    histograms = result['registry'].histograms
+    for name in REPORTED:
+        histogram = histograms.get(name)
+        if histogram is None or not histogram.count:
+            continue
+        s = histogram.summary()
+        lines.append(f"{name:<24} {s['count']:>8} {s['p50_ms']:>9.3f} {s['p90_ms']:>9.3f} "
+                     f"{s['p99_ms']:>9.3f} {s['max_ms']:>9.3f}")
+    lines.append("")
+    for name in LOCK_WAITS:
+        histogram = histograms.get(name)
+        waited = histogram.total / 1e9 if histogram is not None else 0.0
+        lines.append(f"{name + ' total:':<24} {waited:8.3f} s  ({waited / (elapsed * workers):.1%} of worker time)")
+    reserve = histograms.get('ticket_reserve')
+    if reserve is not None and reserve.count:
+        lines.append(f"{'ticket_reserve total:':<24} {reserve.total / 1e9:8.3f} s  "
+                     f"({reserve.total / 1e9 / (elapsed * workers):.1%} of worker time, SQLite lock waits included)")
+    lines.append("")
+    lines.append(f"tickets: {result['duplicate_tickets']} duplicates; ledger: {result['ledger_orders']} orders "
+                 f"committed for {result['orders']} checked out")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Synthetic customers (processes x threads) ordering through OrderProcessor against one "
+                    "ticket/ledger database; reports throughput, lock waits and latency percentiles.")
+    parser.add_argument('--processes', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4, help='customer threads per process')
+    parser.add_argument('--customers', type=int, default=200, help='orders per thread')
+    parser.add_argument('--duration', type=float, default=None, help='stop each thread after this many seconds')
+    parser.add_argument('--db', default=None, help='database to load, a throw-away one by default')
+    parser.add_argument('--menu', default=None, help='menu CSV (name,price[,sku]) instead of synthetic drinks')
+    parser.add_argument('--menu-items', type=int, default=20, help='synthetic menu size')
+    parser.add_argument('--popularity', choices=POPULARITY, default='zipf')
+    parser.add_argument('--skew', type=float, default=1.1, help='zipf exponent')
+    parser.add_argument('--weights', default=None, help='comma-separated weight per menu item (--popularity weights)')
+    parser.add_argument('--items-per-order', type=int, default=3, help='mean items per order')
+    parser.add_argument('--think-ms', type=float, default=0.0, help='pause between clicks')
+    parser.add_argument('--block-size', type=int, default=1, help='ticket numbers reserved per database write')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        load_config = LoadConfig(
+            db_path=args.db or os.path.join(tmp, 'loadgen.db'),
+            menu_items=args.menu_items,
+            menu_csv=args.menu,
+            popularity=args.popularity,
+            skew=args.skew,
+            weights=[float(w) for w in args.weights.split(',')] if args.weights else None,
+            customers=args.customers,
+            duration=args.duration,
+            items_per_order=args.items_per_order,
+            think_ms=args.think_ms,
+            block_size=args.block_size,
+            threads=args.threads,
+            seed=args.seed,
+        )
+        try:
+            popularity_weights(load_config, load_menu(load_config).get_menu_length())
+        except ValueError as err:
+            parser.error(str(err))
+        print(report(run_load(load_config, args.processes)))
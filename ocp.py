@@ -1,11 +1,21 @@
+import functools
+import re
 import time
 
+from instrumentation import timer
+
+
 def time_measure_decorator(f):
-    def wrapper(*args):
-        s = time.time()         # start
-        r = f(*args)            # function
-        e = time.time()         # end
-        print(f'time : {e-s}')
+    # also aggregated (see instrumentation.REGISTRY.report()), one metric per function: the module and
+    # qualified name keep same-named functions of different modules or classes apart
+    timed = timer(re.sub(r'\W', '_', f"{f.__module__}.{f.__qualname__}"))(f)
+
+    @functools.wraps(f)             # keep the name and docstring of f
+    def wrapper(*args, **kwargs):
+        s = time.perf_counter_ns()  # start
+        r = timed(*args, **kwargs)  # function
+        e = time.perf_counter_ns()  # end
+        print(f'time : {(e - s) / 1e9:.9f}')
         return r
     return wrapper
 
@@ -22,9 +32,11 @@ def one_to_n_math(n):           # O(1)
     r = n * (n + 1) // 2
     return r
 
-# 함수 실행
-number = int(input("정수 입력 : "))
-print(one_to_n_loop(number))
 
-func = time_measure_decorator(one_to_n_math)
-print(func(number))
\ No newline at end of file
+if __name__ == "__main__":
+    # 함수 실행
+    number = int(input("정수 입력 : "))
+    print(one_to_n_loop(number))
+
+    func = time_measure_decorator(one_to_n_math)
+    print(func(number))
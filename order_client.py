@@ -0,0 +1,184 @@
+from typing import Any, List, Optional, Tuple
+
+import http_client
+from instrumentation import timer
+from journal import OrderJournal
+from ledger import CompletedOrder, OrderLedger
+from order_core import MAX_COUNT, Menu, OrderProcessor
+from pricing import PricingEngine
+
+
+class OrderServiceError(Exception):
+    """The order service refused a request or could not be reached."""
+
+    def __init__(self, message: str, status: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def order_from_dict(data: dict) -> CompletedOrder:
+    """
+    Rebuild a completed order from its JSON form
+    :param data: dictionary as produced by order_service.order_to_dict
+    :return: completed order
+    """
+    return CompletedOrder(
+        ticket=data['ticket'],
+        lines=[(line['name'], line['price'], line['amount']) for line in data['lines']],
+        total_price=data['total_price'],
+        discount=data['discount'],
+        final_price=data['final_price'],
+        created_at=data['created_at'],
+    )
+
+
+class OrderServiceClient:
+    """Blocking client of order_service.OrderServer over the shared keep-alive HTTP session."""
+
+    def __init__(self, base_url: str = 'http://127.0.0.1:8080', timeout: float = http_client.DEFAULT_TIMEOUT) -> None:
+        """
+        Initialization method for the OrderServiceClient class.
+        :param base_url: service address
+        :param timeout: seconds per request
+        :return: None
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, body: Optional[dict] = None) -> Any:
+        """
+        Send one request and decode the JSON answer
+        :param method: HTTP method
+        :param path: URL path
+        :param body: JSON body
+        :return: decoded answer, None for empty answers
+        """
+        import requests  # loaded with the shared session on first use, not when the kiosk starts
+        try:
+            response = http_client.get_session().request(method, self.base_url + path, json=body,
+                                                         timeout=self.timeout)
+        except requests.exceptions.RequestException as err:
+            raise OrderServiceError(f"Order service unreachable: {err}") from err
+        if response.status_code >= 400:
+            try:
+                message = response.json()['error']
+            except (ValueError, KeyError, TypeError):
+                message = response.reason
+            raise OrderServiceError(message, response.status_code)
+        return response.json() if response.content else None
+
+    def menu(self) -> Tuple[List[str], List[int], List[Optional[str]], int]:
+        """
+        Fetch the service's menu
+        :return: drink names, prices, SKUs and menu version
+        """
+        data = self._request('GET', '/menu')
+        items = data['items']
+        return ([item['name'] for item in items], [item['price'] for item in items],
+                [item['sku'] for item in items], data['version'])
+
+    def create_cart(self, items: Optional[List[list]] = None, menu_version: Optional[int] = None) -> str:
+        """
+        Open a cart on the service
+        :param items: [item, count] or [item, count, modifiers] entries to fill it with
+        :param menu_version: menu version the items refer to
+        :return: cart ID
+        """
+        body: dict = {'items': items or []}
+        if menu_version is not None:
+            body['menu_version'] = menu_version
+        return self._request('POST', '/carts', body)['cart_id']
+
+    def add_item(self, cart_id: str, item: Any, count: int = 1, modifiers: Optional[dict] = None) -> dict:
+        """
+        Add to an open cart
+        :param cart_id: cart ID
+        :param item: menu index, name or SKU
+        :param count: units to add
+        :param modifiers: {"size": ..., "shots": ...}, None for a regular drink
+        :return: the cart afterwards
+        """
+        body = {'item': item, 'count': count}
+        if modifiers:
+            body['modifiers'] = modifiers
+        return self._request('POST', f'/carts/{cart_id}/items', body)
+
+    def cart(self, cart_id: str) -> dict:
+        """
+        Fetch an open cart
+        :param cart_id: cart ID
+        :return: lines and totals
+        """
+        return self._request('GET', f'/carts/{cart_id}')
+
+    def discard_cart(self, cart_id: str) -> None:
+        """
+        Drop an open cart
+        :param cart_id: cart ID
+        :return: None
+        """
+        self._request('DELETE', f'/carts/{cart_id}')
+
+    def checkout(self, cart_id: str) -> CompletedOrder:
+        """
+        Check a cart out: the service issues the ticket and records the order
+        :param cart_id: cart ID
+        :return: completed order
+        """
+        return order_from_dict(self._request('POST', f'/carts/{cart_id}/checkout')['order'])
+
+    def next_ticket(self) -> int:
+        """
+        Issue a ticket number on the service
+        :return: ticket number
+        """
+        return self._request('POST', '/tickets')['ticket']
+
+
+class RemoteOrderProcessor(OrderProcessor):
+    """
+    Cart of a thin-client kiosk: lines and totals are kept locally for the display,
+    the checkout (ticket, pricing of record, ledger) is done by the order service.
+    """
+
+    def __init__(self, menu: Menu, client: OrderServiceClient,
+                 pricing_engine: Optional[PricingEngine] = None, journal: Optional[OrderJournal] = None) -> None:
+        """
+        Initialization method for the RemoteOrderProcessor class.
+        :param menu: the service's menu
+        :param client: order service client
+        :param pricing_engine: pricing rules for the on-screen totals
+        :param journal: local event journal, None to keep no journal
+        :return: None
+        """
+        super().__init__(menu, pricing_engine=pricing_engine, journal=journal)
+        self.client = client
+
+    @timer('get_next_ticket_number', 'Issuing a queue ticket')
+    def get_next_ticket_number(self) -> int:
+        """
+        Ask the order service for a ticket number
+        :return: next ticket number
+        """
+        ticket = self.client.next_ticket()
+        if self.journal is not None:
+            self.journal.ticket_issued(self.session, ticket)
+        return ticket
+
+    def checkout(self, ledger: Optional[OrderLedger] = None) -> CompletedOrder:
+        """
+        Send the whole cart to the order service in one request and check it out there
+        :param ledger: ignored, the service records the order in its own ledger
+        :return: completed order as priced by the service
+        """
+        # the service takes at most MAX_COUNT units per entry, so large lines go as several entries
+        items = [[line.slot, min(MAX_COUNT, line.quantity - start),
+                  {'size': line.modifiers.size, 'shots': line.modifiers.shots}]
+                 for line in self.cart for start in range(0, line.quantity, MAX_COUNT)]
+        cart_id = self.client.create_cart(items, self.menu.version)
+        order = self.client.checkout(cart_id)
+        if self.journal is not None:
+            self.journal.ticket_issued(self.session, order.ticket)
+            self.journal.checkout(self.session, order.total_price, order.discount)
+        self.checked_out = True
+        return order
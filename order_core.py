@@ -0,0 +1,526 @@
+import csv
+import json
+import queue
+import sqlite3
+import threading
+from array import array
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from cart import REGULAR, Cart, LineKey, Modifiers
+from instrumentation import timer
+from journal import OrderJournal
+from ledger import CompletedOrder, OrderLedger
+from pricing import PriceResult, PricingEngine, ThresholdDiscount, percent_of
+from receipt import ReceiptRenderer
+from ticket import TicketAllocator, get_allocator
+
+# Order logic shared by the GUI kiosk, the order service and the console scripts. Nothing here
+# imports tkinter or requests, so importing it is cheap (see benchmarks/bench_startup.py).
+
+MAX_COUNT = 99  # most units in one cart entry the order service accepts; clients split larger lines
+
+
+class Menu:
+    """
+    Represents the cafe menu as an immutable, versioned snapshot.
+    Names and SKUs live in tuples and prices in a read-only int64 array, so every item costs
+    a slot in three compact sequences. The name/SKU index costs about as much again (a dict entry
+    and an int per slot), so it is only built for the first lookup by name or SKU, or right away
+    when SKUs have to be checked for clashes.
+    """
+    __slots__ = ('drinks', 'prices', 'skus', 'version', '_length', '_index')
+
+    def __init__(self, drinks: Sequence[str], prices: Sequence[int],
+                 skus: Optional[Sequence[Optional[str]]] = None, version: int = 1):
+        """
+        Initialization method for the Menu class.
+        :param drinks: beverage name list
+        :param prices: beverage price list
+        :param skus: optional stock keeping unit per beverage, must be unique
+        :param version: snapshot version, bumped by replace()
+        """
+        if len(drinks) != len(prices):
+            raise ValueError("Drinks and prices lists must have the same length.")
+        if skus is not None and len(skus) != len(drinks):
+            raise ValueError("Drinks and SKUs lists must have the same length.")
+
+        set_slot = object.__setattr__
+        set_slot(self, 'drinks', tuple(drinks))
+        set_slot(self, 'prices', memoryview(array('q', prices)).toreadonly())
+        set_slot(self, 'skus', tuple(skus) if skus is not None else (None,) * len(drinks))
+        set_slot(self, 'version', version)
+        set_slot(self, '_length', len(drinks))
+        set_slot(self, '_index', None)
+        if skus is not None and any(sku is not None for sku in self.skus):
+            self._lookup()  # a bad SKU must fail here, not at the first lookup
+
+    def _lookup(self) -> Dict[str, int]:
+        """
+        The name/SKU index, built on first use
+        :return: name or SKU -> slot
+        """
+        index = self._index
+        if index is None:
+            index = {}
+            drinks = self.drinks
+            for slot in range(self._length - 1, -1, -1):  # walk backwards so a repeated name maps to its first slot
+                index[drinks[slot]] = slot
+            for slot, sku in enumerate(self.skus):
+                if sku is None:
+                    continue
+                if sku in index and index[sku] != slot:
+                    raise ValueError(f"Duplicate SKU or SKU clashing with a drink name: {sku}")
+                index[sku] = slot
+            object.__setattr__(self, '_index', index)  # two threads may both build it; either result is the same
+        return index
+
+    def __setattr__(self, name, value) -> None:
+        raise AttributeError("Menu snapshots are immutable, use replace() to derive a new one.")
+
+    def __reduce__(self):
+        # memoryview can't be pickled, so rebuild from plain lists (e.g. when sent to a worker process)
+        return Menu, (self.drinks, self.prices.tolist(), self.skus, self.version)
+
+    def display_menu(self) -> str:
+        """
+        Generate a dynamic menu string
+        :return: formatted menu string
+        """
+        return "".join(
+            [f"{k + 1}) {self.drinks[k]} {self.prices[k]} won\n"
+             for k in range(self._length)]
+        ) + f"{self._length + 1}) Exit : "
+
+    def get_price(self, idx: int) -> int:
+        """
+        Get the price of a drink at a given index.
+        :param idx: index of the drink
+        :return: price of the drink
+        """
+        if 0 <= idx < self._length:
+            return self.prices[idx]
+        else:
+            raise IndexError("Invalid menu index.")
+
+    def get_drink_name(self, idx: int) -> str:
+        """
+        Get the name of a drink at a given index.
+        :param idx: index of the drink
+        :return: name of the drink
+        """
+        if 0 <= idx < self._length:
+            return self.drinks[idx]
+        else:
+            raise IndexError("Invalid menu index.")
+
+    def get_menu_length(self) -> int:
+        """
+        Get the number of items on the menu.
+        :return: the length of the menu
+        """
+        return self._length
+
+    def index_of(self, key: str) -> int:
+        """
+        Find the slot of a drink by name or SKU in O(1).
+        :param key: drink name or SKU
+        :return: index of the drink
+        """
+        index = self._index
+        if index is None:
+            index = self._lookup()
+        try:
+            return index[key]
+        except KeyError:
+            raise KeyError(f"No menu item named or with SKU {key!r}.") from None
+
+    def find(self, key: str) -> Optional[int]:
+        """
+        Like index_of, but return None for unknown keys.
+        :param key: drink name or SKU
+        :return: index of the drink or None
+        """
+        index = self._index
+        if index is None:
+            index = self._lookup()
+        return index.get(key)
+
+    def replace(self, drinks: Optional[Sequence[str]] = None, prices: Optional[Sequence[int]] = None,
+                skus: Optional[Sequence[Optional[str]]] = None) -> 'Menu':
+        """
+        Derive the next snapshot with some columns swapped out. This snapshot is left untouched.
+        :param drinks: new beverage name list, or None to keep the current one
+        :param prices: new beverage price list, or None to keep the current one
+        :param skus: new SKU list, or None to keep the current one
+        :return: new Menu with version + 1
+        """
+        return Menu(drinks if drinks is not None else self.drinks,
+                    prices if prices is not None else self.prices,
+                    skus if skus is not None else self.skus,
+                    self.version + 1)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, int, Optional[str]]], version: int = 1) -> 'Menu':
+        """
+        Build a menu from (name, price, sku) rows.
+        :param rows: iterable of (name, price, sku) tuples, sku may be None
+        :param version: snapshot version
+        :return: new Menu
+        """
+        drinks: List[str] = []
+        prices = array('q')
+        skus: List[Optional[str]] = []
+        for name, price, sku in rows:
+            drinks.append(name)
+            prices.append(int(price))
+            skus.append(sku or None)
+        return cls(drinks, prices, skus, version)
+
+    @classmethod
+    def from_csv(cls, path: str, version: int = 1) -> 'Menu':
+        """
+        Load a menu from a CSV file with a header row of name, price and optionally sku.
+        :param path: CSV file path
+        :param version: snapshot version
+        :return: new Menu
+        """
+        with open(path, newline='', encoding='utf-8') as fp:
+            return cls.from_rows(((row['name'], row['price'], row.get('sku')) for row in csv.DictReader(fp)),
+                                 version)
+
+    @classmethod
+    def from_json(cls, path: str, version: int = 1) -> 'Menu':
+        """
+        Load a menu from a JSON array of {"name", "price", "sku"} objects.
+        :param path: JSON file path
+        :param version: snapshot version
+        :return: new Menu
+        """
+        with open(path, encoding='utf-8') as fp:
+            items = json.load(fp)
+        return cls.from_rows(((item['name'], item['price'], item.get('sku')) for item in items), version)
+
+    @classmethod
+    def from_sqlite(cls, db_path: str, table: str = 'menu', version: int = 1) -> 'Menu':
+        """
+        Load a menu from a SQLite table with name, price and sku columns, in rowid order.
+        :param db_path: path of the SQLite database
+        :param table: table to read
+        :param version: snapshot version
+        :return: new Menu
+        """
+        conn = sqlite3.connect(db_path)
+        try:
+            return cls.from_rows(conn.execute(f'select name, price, sku from {table} order by rowid'), version)
+        finally:
+            conn.close()
+
+
+@lru_cache(maxsize=8)
+def default_pricing_engine(menu: Menu) -> PricingEngine:
+    """
+    Compile the kiosk's standard discount rule for a menu, once per menu snapshot
+    :param menu: menu snapshot
+    :return: compiled pricing engine
+    """
+    return PricingEngine(menu, [ThresholdDiscount(OrderProcessor.DISCOUNT_THRESHOLD, OrderProcessor.DISCOUNT_PERCENT)])
+
+
+class OrderProcessor:
+    """Processes cafe orders, applies discounts, and prints receipts."""
+    DISCOUNT_THRESHOLD = 10000
+    DISCOUNT_PERCENT = 10
+    receipt_renderer = ReceiptRenderer()  # layouts are compiled once and shared by every order
+
+    def __init__(self, menu: Menu, ticket_allocator: Optional[TicketAllocator] = None,
+                 pricing_engine: Optional[PricingEngine] = None, journal: Optional[OrderJournal] = None) -> None:
+        """
+        Initialization method for the OrderProcessor class.
+        :param menu: An instance of the Menu class.
+        :param ticket_allocator: ticket number source, the shared allocator of 'queue_number.db' by default
+        :param pricing_engine: compiled pricing rules, the DISCOUNT_THRESHOLD/DISCOUNT_PERCENT rule by default
+        :param journal: event journal every cart change is appended to, None to keep no journal
+        :return: None
+        """
+        self.menu = menu
+        self.cart = Cart(menu)  # sparse: a new order costs the same for 4 drinks or 5,000
+        self.pricing_engine = pricing_engine if pricing_engine is not None else default_pricing_engine(menu)
+        self.pricing = self.pricing_engine.session()
+        # the allocator draws from the process-wide connection pool, the schema is set up once there;
+        # the default one is looked up on the first ticket so building a cart never touches the database
+        self.ticket_allocator = ticket_allocator
+        self.journal = journal
+        self.session = journal.new_session() if journal is not None else 0
+        self.checked_out = False  # the cart was sold; reset() opens the next journal session
+
+    @property
+    def amounts(self) -> Dict[int, int]:
+        """
+        Quantity per ordered menu slot, every modifier combination counted
+        :return: menu slot -> quantity, slots not ordered are absent
+        """
+        return self.cart.amounts
+
+    @property
+    def total_price(self) -> int:
+        """
+        Price of the cart before discounts, modifier upcharges included
+        :return: subtotal in won
+        """
+        return self.cart.subtotal
+
+    def apply_discount(self, price: int) -> int:
+        """
+        Apply the discount rate of the threshold tier the amount reaches
+        :param price: price before discount
+        :return: price after discount
+        """
+        tier = self.pricing_engine.threshold_tier(price)
+        if tier is not None:
+            return price - percent_of(price, tier[1])
+        return price
+
+    def get_price_result(self, now: Optional[datetime] = None) -> PriceResult:
+        """
+        Price the current cart with every pricing rule
+        :param now: evaluation time for time-dependent rules, the current time by default
+        :return: subtotal, discount, total and the rules that applied
+        """
+        return self.pricing.result(now)
+
+    @timer('process_order', 'Adding one item to the cart')
+    def process_order(self, idx: int, modifiers: Modifiers = REGULAR, count: int = 1) -> LineKey:
+        """
+        Process the order and accumulate the total price
+        :param idx: index of the ordered drink
+        :param modifiers: size and extra shots
+        :param count: number of drinks
+        :return: key of the cart line the drinks went to
+        """
+        line = self.cart.add(idx, count, modifiers)
+        self.pricing.add(idx, count, count * line.upcharge)
+        if self.journal is not None:
+            self.journal.item_added(self.session, idx, count)
+        return line.key
+
+    def remove_order(self, idx: int, modifiers: Modifiers = REGULAR, count: int = 1) -> LineKey:
+        """
+        Take drinks back out of the cart
+        :param idx: index of the drink
+        :param modifiers: size and extra shots of the line to take them from
+        :param count: number of drinks
+        :return: key of the cart line, gone from the cart when it reached 0
+        """
+        line = self.cart.remove(idx, count, modifiers)
+        self.pricing.add(idx, -count, -count * line.upcharge)
+        if self.journal is not None:
+            self.journal.item_added(self.session, idx, -count)
+        return line.key
+
+    def reset(self) -> None:
+        """
+        Empty the cart to take the next order. Only the cart state is cleared; the menu, pricing plan,
+        allocator and journal are kept, so one processor can serve every customer of a kiosk lane.
+        :return: None
+        """
+        abandoned = len(self.cart) > 0 and not self.checked_out
+        self.cart.clear()
+        self.pricing.clear()
+        if self.journal is not None:
+            if self.checked_out:
+                self.session = self.journal.new_session()  # the sold cart is closed in the journal
+            elif abandoned:
+                self.journal.reset(self.session)
+        self.checked_out = False
+
+    def set_menu(self, menu: Menu, pricing_engine: Optional[PricingEngine] = None) -> None:
+        """
+        Switch an empty cart to a new menu snapshot, e.g. after the catalog was reloaded.
+        A cart with items keeps the snapshot it was started with until it is reset.
+        :param menu: new menu snapshot
+        :param pricing_engine: pricing rules compiled for menu, the default discount by default
+        :return: None
+        """
+        if len(self.cart):
+            raise ValueError("Only an empty cart can switch menus.")
+        self.menu = menu
+        self.cart = Cart(menu, self.cart.size_upcharges, self.cart.shot_price)
+        self.pricing_engine = pricing_engine if pricing_engine is not None else default_pricing_engine(menu)
+        self.pricing = self.pricing_engine.session()
+
+    @timer('get_receipt_text', 'Rendering the receipt text')
+    def get_receipt_text(self) -> str:
+        """
+        Return order summary and final price with formatted alignment
+        :return: formatted receipt text as string
+        """
+        return self.receipt_renderer.render_text(self.build_completed_order())
+
+    def build_completed_order(self, ticket: Optional[int] = None) -> CompletedOrder:
+        """
+        Snapshot the current order for the order ledger and the receipt renderer
+        :param ticket: queue ticket number issued for this order, if any yet
+        :return: completed order record
+        """
+        menu = self.menu
+        lines = [(line.name(menu), line.unit_price, line.quantity) for line in self.cart]  # in the order added
+
+        price = self.get_price_result()
+        return CompletedOrder(
+            ticket=ticket,
+            lines=lines,
+            total_price=price.subtotal,
+            discount=price.discount,
+            final_price=price.total,
+            created_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        )
+
+    @timer('get_next_ticket_number', 'Issuing a queue ticket')
+    def get_next_ticket_number(self) -> int:
+        """
+        Function that Produce next ticket number (Database version, allocated atomically)
+        :return: next ticket number
+        """
+        if self.ticket_allocator is None:
+            self.ticket_allocator = get_allocator('queue_number.db')
+        ticket = self.ticket_allocator.next_number()
+        if self.journal is not None:
+            self.journal.ticket_issued(self.session, ticket)
+        return ticket
+
+    def checkout(self, ledger: Optional[OrderLedger] = None) -> CompletedOrder:
+        """
+        Issue a queue ticket for the current order and record it
+        :param ledger: ledger the order is queued to, None to not record it
+        :return: completed order carrying its ticket number
+        """
+        order = self.build_completed_order(self.get_next_ticket_number())
+        if ledger is not None:
+            ledger.record(order)
+        if self.journal is not None:
+            self.journal.checkout(self.session, order.total_price, order.discount)
+        self.checked_out = True
+        return order
+
+    def run(self) -> None:
+        """
+        Take an order on the console until Exit is chosen, then print the receipt
+        :return: None
+        """
+        length = self.menu.get_menu_length()
+        while True:
+            try:
+                choice = int(input(self.menu.display_menu()))
+                if 1 <= choice <= length:
+                    self.process_order(choice - 1)
+                elif choice == length + 1:
+                    print("Order finished~")
+                    break
+                else:
+                    print(f"Menu {choice} is invalid. Please choose from the above menu.")
+            except ValueError:
+                print("Please enter a valid number. Try again.")
+
+        if self.total_price > 0:
+            print(self.get_receipt_text())
+
+
+class OrderProcessorPool:
+    """
+    Bounded pool of reusable OrderProcessors, one checked out per lane or customer at a time.
+    Processors are built lazily up to size and reset() on release instead of being thrown away,
+    so a busy kiosk allocates no new carts, pricing sessions or journal sessions per order beyond
+    what reset() itself needs.
+    """
+
+    def __init__(self, factory: Callable[[], OrderProcessor], size: int = 4, timeout: float = 30.0) -> None:
+        """
+        Initialization method for the OrderProcessorPool class.
+        :param factory: builds one empty processor, e.g. lambda: OrderProcessor(menu, allocator, engine, journal)
+        :param size: maximum number of processors checked out at the same time
+        :param timeout: seconds acquire() waits for a free processor
+        :return: None
+        """
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.created = 0
+        self._idle: "queue.LifoQueue[OrderProcessor]" = queue.LifoQueue(maxsize=size)
+        self._checked_out: Set[int] = set()  # id() of every processor handed out and not released yet
+        self._lock = threading.Lock()
+
+    def _check_out(self, processor: OrderProcessor) -> OrderProcessor:
+        """
+        Record a processor as handed out
+        :param processor: processor about to be returned by acquire()
+        :return: the same processor
+        """
+        with self._lock:
+            self._checked_out.add(id(processor))
+        return processor
+
+    def acquire(self) -> OrderProcessor:
+        """
+        Take an empty processor, building a new one while the pool is below its size
+        :return: checked-out processor
+        """
+        try:
+            return self._check_out(self._idle.get_nowait())
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self.created < self.size:
+                self.created += 1
+                build = True
+            else:
+                build = False
+        if build:
+            try:
+                return self._check_out(self.factory())
+            except BaseException:
+                with self._lock:
+                    self.created -= 1
+                raise
+
+        try:
+            return self._check_out(self._idle.get(timeout=self.timeout))
+        except queue.Empty:
+            raise TimeoutError("No free order processor.") from None
+
+    def release(self, processor: OrderProcessor) -> None:
+        """
+        Reset a processor and hand it to the next acquire()
+        :param processor: processor taken with acquire() and not released since
+        :return: None
+        """
+        with self._lock:
+            if id(processor) not in self._checked_out:
+                raise ValueError("Processor was not taken from this pool or was already released.")
+            self._checked_out.discard(id(processor))
+        try:
+            processor.reset()
+        except BaseException:
+            # a processor that can't be emptied isn't handed out again; make room for a new one
+            with self._lock:
+                self.created -= 1
+            raise
+        self._idle.put_nowait(processor)
+
+    @contextmanager
+    def session(self) -> Iterator[OrderProcessor]:
+        """
+        Check out a processor for the duration of the with block
+        :return: context manager yielding an empty processor
+        """
+        processor = self.acquire()
+        try:
+            yield processor
+        finally:
+            self.release(processor)
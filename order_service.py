@@ -0,0 +1,489 @@
+import argparse
+import asyncio
+import json
+import re
+import signal
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from cart import Modifiers
+from order_core import MAX_COUNT, Menu, OrderProcessor, default_pricing_engine
+from ledger import CompletedOrder, OrderLedger, get_ledger
+from pricing import PricingEngine
+from receipt import ReceiptRenderer
+from ticket import TicketAllocator, get_allocator
+
+DEFAULT_DRINKS = ["Ice Americano", "Cafe Latte", "Watermelon Juice", "Ice tea"]
+DEFAULT_PRICES = [2000, 3000, 4900, 3500]
+MAX_BODY = 64 * 1024  # bytes, larger request bodies are refused with 413
+REASONS = {200: 'OK', 201: 'Created', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 409: 'Conflict', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+Response = Tuple[int, Optional[Any]]
+
+
+class StaleMenuError(ValueError):
+    """A client built its cart against another menu version than the service's."""
+
+
+class UnknownCartError(KeyError):
+    """No open cart has the given ID (never opened, checked out, discarded or expired)."""
+
+
+def order_to_dict(order: CompletedOrder) -> Dict[str, Any]:
+    """
+    JSON-ready form of a completed order (same fields as ReceiptRenderer.render_json)
+    :param order: completed order
+    :return: dictionary
+    """
+    return {
+        'ticket': order.ticket,
+        'lines': [{'name': name, 'price': price, 'amount': amount} for name, price, amount in order.lines],
+        'total_price': order.total_price,
+        'discount': order.discount,
+        'final_price': order.final_price,
+        'created_at': order.created_at,
+    }
+
+
+class OrderService:
+    """
+    Holds the open carts of every connected kiosk and checks them out against one ticket counter
+    and one order ledger. Cart methods are meant for a single thread (the event loop); only
+    finish_checkout and next_ticket touch the database and may run on worker threads.
+    """
+
+    def __init__(self, menu: Menu, pricing_engine: Optional[PricingEngine] = None,
+                 ticket_allocator: Optional[TicketAllocator] = None, ledger: Optional[OrderLedger] = None,
+                 cart_ttl: float = 900) -> None:
+        """
+        Initialization method for the OrderService class.
+        :param menu: menu every cart is built from
+        :param pricing_engine: compiled pricing rules, the kiosk's default discount by default
+        :param ticket_allocator: ticket number source shared by all kiosks
+        :param ledger: ledger completed orders are recorded in, None to not record them
+        :param cart_ttl: seconds an untouched cart is kept before it is dropped
+        :return: None
+        """
+        self.menu = menu
+        self.pricing_engine = pricing_engine if pricing_engine is not None else default_pricing_engine(menu)
+        self.ticket_allocator = ticket_allocator
+        self.ledger = ledger
+        self.cart_ttl = cart_ttl
+        self.receipt_renderer = ReceiptRenderer()
+        self.carts: "OrderedDict[str, Tuple[OrderProcessor, float]]" = OrderedDict()  # oldest touched first
+        self.orders_completed = 0
+        self._completed_lock = threading.Lock()  # finish_checkout runs on several worker threads
+
+    def menu_dict(self) -> Dict[str, Any]:
+        """
+        JSON-ready form of the menu
+        :return: version and items
+        """
+        menu = self.menu
+        return {'version': menu.version,
+                'items': [{'index': i, 'name': menu.drinks[i], 'price': menu.prices[i], 'sku': menu.skus[i]}
+                          for i in range(menu.get_menu_length())]}
+
+    def _prune(self, now: float) -> None:
+        """
+        Drop carts nobody touched for cart_ttl seconds
+        :param now: current time.monotonic()
+        :return: None
+        """
+        while self.carts:
+            cart_id, (_, touched) = next(iter(self.carts.items()))
+            if now - touched < self.cart_ttl:
+                break
+            del self.carts[cart_id]
+
+    def _cart(self, cart_id: str) -> OrderProcessor:
+        """
+        Look up an open cart and mark it as used
+        :param cart_id: cart ID
+        :return: the cart's order processor
+        """
+        try:
+            processor, _ = self.carts[cart_id]
+        except KeyError:
+            raise UnknownCartError(cart_id) from None
+        self.carts[cart_id] = (processor, time.monotonic())
+        self.carts.move_to_end(cart_id)
+        return processor
+
+    def _resolve(self, item: Any) -> int:
+        """
+        Turn a menu index, name or SKU into a menu index
+        :param item: index or key
+        :return: menu index
+        """
+        if isinstance(item, bool) or not isinstance(item, (int, str)):
+            raise ValueError("Item must be a menu index, name or SKU.")
+        if isinstance(item, int):
+            if not 0 <= item < self.menu.get_menu_length():
+                raise IndexError("Invalid menu index.")
+            return item
+        idx = self.menu.find(item)
+        if idx is None:
+            raise ValueError(f"No menu item named or with SKU {item!r}.")
+        return idx
+
+    def create_cart(self, items: Optional[List[Any]] = None, menu_version: Optional[int] = None) -> str:
+        """
+        Open a new cart, optionally filled in one go
+        :param items: [item, count] or [item, count, {"size": ..., "shots": ...}] entries, item being a
+            menu index, name or SKU
+        :param menu_version: menu version the client used, checked when given
+        :return: cart ID
+        """
+        if menu_version is not None and menu_version != self.menu.version:
+            raise StaleMenuError(f"Menu version {menu_version} is out of date, current is {self.menu.version}.")
+        processor = OrderProcessor(self.menu, self.ticket_allocator, self.pricing_engine)
+        for entry in items or ():
+            if not isinstance(entry, list) or not 2 <= len(entry) <= 3:
+                raise ValueError("Cart items must be [item, count] or [item, count, modifiers].")
+            self._add(processor, *entry)
+        now = time.monotonic()
+        self._prune(now)
+        cart_id = uuid.uuid4().hex
+        self.carts[cart_id] = (processor, now)
+        return cart_id
+
+    def _add(self, processor: OrderProcessor, item: Any, count: Any, modifiers: Any = None) -> None:
+        """
+        Add count units of an item to a cart
+        :param processor: cart
+        :param item: menu index, name or SKU
+        :param count: units to add, 1 to MAX_COUNT
+        :param modifiers: {"size": ..., "shots": ...}, None for a regular drink
+        :return: None
+        """
+        if isinstance(count, bool) or not isinstance(count, int) or not 1 <= count <= MAX_COUNT:
+            raise ValueError(f"Count must be an integer from 1 to {MAX_COUNT}.")
+        if modifiers is None:
+            modifiers = {}
+        if not isinstance(modifiers, dict) or not set(modifiers) <= {'size', 'shots'}:
+            raise ValueError("Modifiers must be an object with size and/or shots.")
+        shots = modifiers.get('shots', 0)
+        if isinstance(shots, bool) or not isinstance(shots, int) or not 0 <= shots <= 9:
+            raise ValueError("Shots must be an integer from 0 to 9.")
+        processor.process_order(self._resolve(item), Modifiers(str(modifiers.get('size', 'regular')), shots), count)
+
+    def add_item(self, cart_id: str, item: Any, count: Any = 1, modifiers: Any = None) -> Dict[str, Any]:
+        """
+        Add an item to an open cart
+        :param cart_id: cart ID
+        :param item: menu index, name or SKU
+        :param count: units to add
+        :param modifiers: {"size": ..., "shots": ...}, None for a regular drink
+        :return: the cart afterwards
+        """
+        processor = self._cart(cart_id)
+        self._add(processor, item, count, modifiers)
+        return self.cart_dict(cart_id)
+
+    def cart_dict(self, cart_id: str) -> Dict[str, Any]:
+        """
+        JSON-ready form of an open cart, priced with every rule
+        :param cart_id: cart ID
+        :return: lines and totals
+        """
+        processor = self._cart(cart_id)
+        menu = self.menu
+        price = processor.get_price_result()
+        return {
+            'cart_id': cart_id,
+            'menu_version': menu.version,
+            'lines': [{'index': line.slot, 'name': menu.drinks[line.slot], 'size': line.modifiers.size,
+                       'shots': line.modifiers.shots, 'price': line.unit_price, 'amount': line.quantity}
+                      for line in processor.cart],
+            'subtotal': price.subtotal,
+            'discount': price.discount,
+            'total': price.total,
+            'applied': [{'rule': label, 'discount': discount} for label, discount in price.applied],
+        }
+
+    def discard_cart(self, cart_id: str) -> None:
+        """
+        Drop an open cart
+        :param cart_id: cart ID
+        :return: None
+        """
+        if self.carts.pop(cart_id, None) is None:
+            raise UnknownCartError(cart_id)
+
+    def take_cart(self, cart_id: str) -> OrderProcessor:
+        """
+        Remove a cart for checkout, so no further items can be added to it; give it back with
+        return_cart() if the checkout fails
+        :param cart_id: cart ID
+        :return: the cart's order processor
+        """
+        try:
+            processor, _ = self.carts.pop(cart_id)
+        except KeyError:
+            raise UnknownCartError(cart_id) from None
+        if processor.total_price <= 0:
+            self.return_cart(cart_id, processor)
+            raise ValueError("Cart is empty.")
+        return processor
+
+    def return_cart(self, cart_id: str, processor: OrderProcessor) -> None:
+        """
+        Reopen a cart taken by take_cart whose checkout failed, so the customer can try again
+        :param cart_id: cart ID
+        :param processor: the cart's order processor
+        :return: None
+        """
+        self.carts[cart_id] = (processor, time.monotonic())
+
+    def finish_checkout(self, processor: OrderProcessor) -> CompletedOrder:
+        """
+        Issue the ticket and record the order (blocking, safe on worker threads)
+        :param processor: cart returned by take_cart
+        :return: completed order
+        """
+        order = processor.checkout(self.ledger)
+        with self._completed_lock:
+            self.orders_completed += 1
+        return order
+
+    def checkout(self, cart_id: str) -> CompletedOrder:
+        """
+        take_cart and finish_checkout in one call, for use without an event loop
+        :param cart_id: cart ID
+        :return: completed order
+        """
+        processor = self.take_cart(cart_id)
+        try:
+            return self.finish_checkout(processor)
+        except BaseException:
+            self.return_cart(cart_id, processor)
+            raise
+
+    def next_ticket(self) -> int:
+        """
+        Issue a ticket number without an order (blocking)
+        :return: ticket number
+        """
+        return OrderProcessor(self.menu, self.ticket_allocator, self.pricing_engine).get_next_ticket_number()
+
+
+class OrderServer:
+    """
+    Minimal HTTP/1.1 JSON front end of an OrderService on asyncio, with keep-alive connections.
+    Cart operations run on the event loop; ticket numbering and ledger writes run on a small thread pool.
+
+        GET    /menu                     menu items and version
+        POST   /carts                    open a cart, body {"items": [[item, count(, modifiers)], ...], "menu_version": n}
+        GET    /carts/{id}               cart lines and totals
+        POST   /carts/{id}/items         add to a cart, body {"item": index|name|sku, "count": n, "modifiers": {...}}
+        DELETE /carts/{id}               drop a cart
+        POST   /carts/{id}/checkout      issue a ticket, record the order, return it with its receipt
+        POST   /tickets                  issue a ticket number
+    """
+
+    def __init__(self, service: OrderService, workers: int = 4) -> None:
+        """
+        Initialization method for the OrderServer class.
+        :param service: order service to expose
+        :param workers: threads for blocking database work
+        :return: None
+        """
+        self.service = service
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='order-db')
+        self.routes: List[Tuple[str, "re.Pattern", Callable[..., Awaitable[Response]]]] = [
+            ('GET', re.compile(r'/menu'), self.get_menu),
+            ('POST', re.compile(r'/carts'), self.post_cart),
+            ('GET', re.compile(r'/carts/(\w+)'), self.get_cart),
+            ('DELETE', re.compile(r'/carts/(\w+)'), self.delete_cart),
+            ('POST', re.compile(r'/carts/(\w+)/items'), self.post_item),
+            ('POST', re.compile(r'/carts/(\w+)/checkout'), self.post_checkout),
+            ('POST', re.compile(r'/tickets'), self.post_ticket),
+        ]
+
+    async def get_menu(self, body: Dict[str, Any]) -> Response:
+        """GET /menu"""
+        return 200, self.service.menu_dict()
+
+    async def post_cart(self, body: Dict[str, Any]) -> Response:
+        """POST /carts"""
+        cart_id = self.service.create_cart(body.get('items'), body.get('menu_version'))
+        return 201, self.service.cart_dict(cart_id)
+
+    async def get_cart(self, body: Dict[str, Any], cart_id: str) -> Response:
+        """GET /carts/{id}"""
+        return 200, self.service.cart_dict(cart_id)
+
+    async def delete_cart(self, body: Dict[str, Any], cart_id: str) -> Response:
+        """DELETE /carts/{id}"""
+        self.service.discard_cart(cart_id)
+        return 204, None
+
+    async def post_item(self, body: Dict[str, Any], cart_id: str) -> Response:
+        """POST /carts/{id}/items"""
+        return 200, self.service.add_item(cart_id, body.get('item'), body.get('count', 1), body.get('modifiers'))
+
+    async def post_checkout(self, body: Dict[str, Any], cart_id: str) -> Response:
+        """POST /carts/{id}/checkout: the database part runs on the thread pool"""
+        processor = self.service.take_cart(cart_id)
+        try:
+            order = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.service.finish_checkout, processor)
+        except BaseException:
+            self.service.return_cart(cart_id, processor)  # the ticket or ledger step failed, keep the cart
+            raise
+        return 200, {'order': order_to_dict(order),
+                     'receipt': self.service.receipt_renderer.render_text(order)}
+
+    async def post_ticket(self, body: Dict[str, Any]) -> Response:
+        """POST /tickets"""
+        ticket = await asyncio.get_running_loop().run_in_executor(self.executor, self.service.next_ticket)
+        return 201, {'ticket': ticket}
+
+    async def dispatch(self, method: str, path: str, raw_body: bytes) -> Response:
+        """
+        Route one request and map exceptions to status codes
+        :param method: HTTP method
+        :param path: URL path
+        :param raw_body: request body
+        :return: status code and JSON payload
+        """
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.fullmatch(path)
+            if match is None:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            try:
+                body = json.loads(raw_body) if raw_body else {}
+                if not isinstance(body, dict):
+                    raise ValueError("Request body must be a JSON object.")
+                return await handler(body, *match.groups())
+            except UnknownCartError:
+                return 404, {'error': 'Unknown cart.'}
+            except StaleMenuError as err:
+                return 409, {'error': str(err)}
+            except (ValueError, IndexError, TypeError) as err:
+                return 400, {'error': str(err)}
+            except Exception as err:
+                print(f"Order service error on {method} {path}: {err}")
+                return 500, {'error': 'Internal error.'}
+        if allowed:
+            return 405, {'error': f"{method} is not allowed on {path}."}
+        return 404, {'error': f"No endpoint {path}."}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serve the requests of one connection until the client closes it
+        :param reader: connection input
+        :param writer: connection output
+        :return: None
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                raw_length = headers.get('content-length') or '0'
+                length = int(raw_length) if raw_length.isdigit() else -1  # isdigit() also rejects a sign
+                if length < 0:
+                    # the body's end is unknown, so the connection can't be reused
+                    status, payload = 400, {'error': f"Invalid Content-Length {raw_length!r}."}
+                    keep_alive = False
+                elif length > MAX_BODY:
+                    status, payload = 413, {'error': 'Request body too large.'}
+                    keep_alive = False
+                else:
+                    raw_body = await reader.readexactly(length) if length else b''
+                    status, payload = await self.dispatch(method, urlsplit(target).path, raw_body)
+                    keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else b''
+                head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                        f"Content-Type: application/json; charset=utf-8\r\n"
+                        f"Content-Length: {len(data)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+                writer.write(head.encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # client went away or sent something that isn't HTTP
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8080,
+                    ready: Optional[Callable[[str, int], None]] = None) -> None:
+        """
+        Accept connections until cancelled or the process gets SIGTERM/SIGINT
+        :param host: interface to listen on
+        :param port: TCP port, 0 for any free one
+        :param ready: called with the bound host and port once listening
+        :return: None
+        """
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        bound_host, bound_port = server.sockets[0].getsockname()[:2]
+        # stop cleanly on SIGTERM/SIGINT so atexit still flushes the ledger
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stopping.set)
+            except (NotImplementedError, RuntimeError, ValueError):  # Windows, or not the main thread
+                pass
+        if ready:
+            ready(bound_host, bound_port)
+        try:
+            async with server:
+                await stopping.wait()
+        finally:
+            self.executor.shutdown(wait=True)
+
+
+def load_menu(path: Optional[str]) -> Menu:
+    """
+    Load the service menu from a .csv, .json or SQLite file, or use the kiosk's default drinks
+    :param path: menu file or None
+    :return: menu
+    """
+    if path is None:
+        return Menu(DEFAULT_DRINKS, DEFAULT_PRICES)
+    if path.endswith('.csv'):
+        return Menu.from_csv(path)
+    if path.endswith('.json'):
+        return Menu.from_json(path)
+    return Menu.from_sqlite(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve menu, cart, checkout and ticket endpoints to kiosks.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080, help='0 picks a free port')
+    parser.add_argument('--db', default='queue_number.db', help='ticket counter and order ledger')
+    parser.add_argument('--menu', default=None, help='.csv, .json or SQLite menu file')
+    parser.add_argument('--ticket-block', type=int, default=1, help='ticket numbers reserved per database write')
+    parser.add_argument('--workers', type=int, default=4, help='threads for database work')
+    args = parser.parse_args()
+
+    order_service = OrderService(load_menu(args.menu), ticket_allocator=get_allocator(args.db, args.ticket_block),
+                                 ledger=get_ledger(args.db))
+    app = OrderServer(order_service, args.workers)
+    asyncio.run(app.serve(args.host, args.port,
+                          ready=lambda host, port: print(f"Order service listening on http://{host}:{port}", flush=True)))
@@ -0,0 +1,307 @@
+from dataclasses import dataclass
+from datetime import datetime, time
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+Percent = Union[int, str, Decimal]  # 10, "12.5" or Decimal("12.5") -> never a float
+
+
+def to_basis_points(percent: Percent) -> int:
+    """
+    Convert a percentage to integer hundredths of a percent
+    :param percent: percentage, e.g. 10 or "12.5"
+    :return: basis points, e.g. 1000 or 1250
+    """
+    if isinstance(percent, float):
+        raise TypeError("Use int, str or Decimal percentages, not float.")
+    return int(Decimal(percent) * 100)
+
+
+def percent_of(amount: int, basis_points: int) -> int:
+    """
+    Take a percentage of a won amount, rounding half up to whole won
+    :param amount: amount in won
+    :param basis_points: percentage in hundredths of a percent
+    :return: rounded share in won
+    """
+    return (amount * basis_points + 5000) // 10000
+
+
+@dataclass(frozen=True)
+class ThresholdDiscount:
+    """percent off the whole order once the subtotal reaches threshold; only the highest tier reached applies."""
+    threshold: int
+    percent: Percent
+    name: str = ''
+
+
+@dataclass(frozen=True)
+class ItemDiscount:
+    """amount_off won and/or percent off every unit of one item (menu name or SKU)."""
+    item: str
+    amount_off: int = 0
+    percent: Percent = 0
+    name: str = ''
+
+
+@dataclass(frozen=True)
+class BuyXGetY:
+    """For every buy + free units of an item, free of them cost nothing (buy=1, free=1 is BOGO)."""
+    item: str
+    buy: int = 1
+    free: int = 1
+    name: str = ''
+
+
+@dataclass(frozen=True)
+class HappyHour:
+    """percent off the listed items (all items if empty) between start and end."""
+    start: time
+    end: time
+    percent: Percent
+    items: Tuple[str, ...] = ()
+    name: str = ''
+
+
+@dataclass(frozen=True)
+class ComboDiscount:
+    """amount_off won for every complete set of the listed items in the cart."""
+    items: Tuple[str, ...]
+    amount_off: int
+    name: str = ''
+
+
+Rule = Union[ThresholdDiscount, ItemDiscount, BuyXGetY, HappyHour, ComboDiscount]
+
+
+@dataclass(frozen=True)
+class PriceResult:
+    """Outcome of pricing one cart, all amounts in won."""
+    subtotal: int
+    discount: int
+    total: int
+    applied: Tuple[Tuple[str, int], ...]  # (rule label, discount) of every rule that took something off
+
+
+# Compiled per-line rule: (label, fn(amount, unit price) -> discount)
+LineRule = Tuple[str, Callable[[int, int], int]]
+
+
+class PricingEngine:
+    """
+    Compiles pricing rules against one Menu snapshot into a per-slot evaluation plan.
+    Item names and SKUs are resolved to menu slots once, percentages become integer basis points,
+    and every rule is filed under the slots it reads, so a cart line change only touches its own rules.
+    """
+
+    def __init__(self, menu, rules: Sequence[Rule]) -> None:
+        """
+        Initialization method for the PricingEngine class.
+        :param menu: Menu snapshot the rules refer to
+        :param rules: pricing rules
+        :return: None
+        """
+        self.menu = menu
+        self.rules = tuple(rules)
+        self.line_rules: List[Tuple[LineRule, ...]] = []
+        self.combos: List[Tuple[str, Tuple[int, ...], int]] = []
+        self.combos_by_slot: Dict[int, List[int]] = {}
+        self.happy_hours: List[Tuple[str, time, time, int, Optional[frozenset]]] = []
+        self.thresholds: List[Tuple[int, int, str]] = []  # ascending by threshold
+        self._compile()
+
+    def _compile(self) -> None:
+        """
+        Build the evaluation plan from self.rules
+        :return: None
+        """
+        line_rules: List[List[LineRule]] = [[] for _ in range(self.menu.get_menu_length())]
+        for rule in self.rules:
+            if isinstance(rule, ItemDiscount):
+                slot, off, bp = self.menu.index_of(rule.item), rule.amount_off, to_basis_points(rule.percent)
+                label = rule.name or f"{rule.item} discount"
+                line_rules[slot].append((label, lambda amount, price, off=off, bp=bp:
+                                         amount * min(price, off + percent_of(price, bp))))
+            elif isinstance(rule, BuyXGetY):
+                if rule.buy < 1 or rule.free < 1:
+                    raise ValueError("BuyXGetY needs buy >= 1 and free >= 1.")
+                slot, group, free = self.menu.index_of(rule.item), rule.buy + rule.free, rule.free
+                label = rule.name or f"{rule.item} {rule.buy}+{rule.free}"
+                line_rules[slot].append((label, lambda amount, price, group=group, free=free:
+                                         (amount // group) * free * price))
+            elif isinstance(rule, ComboDiscount):
+                slots = tuple(sorted({self.menu.index_of(item) for item in rule.items}))
+                combo = len(self.combos)
+                self.combos.append((rule.name or " + ".join(rule.items), slots, rule.amount_off))
+                for slot in slots:
+                    self.combos_by_slot.setdefault(slot, []).append(combo)
+            elif isinstance(rule, HappyHour):
+                slots = frozenset(self.menu.index_of(item) for item in rule.items) if rule.items else None
+                self.happy_hours.append((rule.name or "Happy hour", rule.start, rule.end,
+                                         to_basis_points(rule.percent), slots))
+            elif isinstance(rule, ThresholdDiscount):
+                self.thresholds.append((rule.threshold, to_basis_points(rule.percent),
+                                        rule.name or f"{Decimal(rule.percent).normalize():f}%"))
+            else:
+                raise TypeError(f"Unknown pricing rule: {rule!r}")
+        self.line_rules = [tuple(rules) for rules in line_rules]
+        self.thresholds.sort()
+
+    def session(self) -> 'PricingSession':
+        """
+        Start incremental pricing for one cart
+        :return: new PricingSession
+        """
+        return PricingSession(self)
+
+    def price(self, amounts: Dict[int, int], now: Optional[datetime] = None) -> PriceResult:
+        """
+        Price a whole cart in one go
+        :param amounts: menu slot -> quantity
+        :param now: evaluation time for happy hours, the current time by default
+        :return: price result
+        """
+        session = self.session()
+        for idx, amount in amounts.items():
+            session.set_line(idx, amount)
+        return session.result(now)
+
+    def threshold_tier(self, subtotal: int) -> Optional[Tuple[int, int, str]]:
+        """
+        Find the highest threshold tier a subtotal reaches
+        :param subtotal: cart subtotal in won
+        :return: (threshold, basis points, label) or None
+        """
+        tier = None
+        for candidate in self.thresholds:
+            if candidate[0] > subtotal:
+                break
+            tier = candidate
+        return tier
+
+    def next_threshold(self, subtotal: int) -> Optional[Tuple[int, str]]:
+        """
+        How far a subtotal is from the next threshold tier
+        :param subtotal: cart subtotal in won
+        :return: (won still to spend, label of that tier) or None if the top tier is reached
+        """
+        for threshold, _, label in self.thresholds:
+            if threshold > subtotal:
+                return threshold - subtotal, label
+        return None
+
+
+class PricingSession:
+    """Incrementally maintained price of one cart against a PricingEngine plan."""
+
+    def __init__(self, engine: PricingEngine) -> None:
+        """
+        Initialization method for the PricingSession class.
+        :param engine: compiled pricing engine
+        :return: None
+        """
+        self.engine = engine
+        self.clear()
+
+    def clear(self) -> None:
+        """
+        Empty the cart
+        :return: None
+        """
+        self.amounts: Dict[int, int] = {}
+        self.subtotal = 0
+        self._line_gross: Dict[int, int] = {}
+        self._line_discounts: Dict[int, Tuple[Tuple[str, int], ...]] = {}
+        self._line_discount_total = 0
+        self._combo_discounts: Dict[int, int] = {}
+        self._combo_discount_total = 0
+
+    def add(self, idx: int, count: int = 1, upcharge: int = 0) -> None:
+        """
+        Change the quantity of one line by count
+        :param idx: menu slot
+        :param count: quantity delta, may be negative
+        :param upcharge: change of the line's modifier upcharges (size, extra shots)
+        :return: None
+        """
+        amount = self.amounts.get(idx, 0)
+        current = self._line_gross.get(idx, 0) - amount * self.engine.menu.get_price(idx)
+        self.set_line(idx, amount + count, current + upcharge)
+
+    def set_line(self, idx: int, amount: int, upcharge: int = 0) -> None:
+        """
+        Set the quantity of one line and re-evaluate only the rules reading that line
+        :param idx: menu slot
+        :param amount: new quantity, 0 removes the line
+        :param upcharge: modifier upcharges of all the line's units; they count towards the subtotal,
+            thresholds and happy hours, item rules only discount the menu price
+        :return: None
+        """
+        if amount < 0:
+            raise ValueError("Line quantity can't be negative.")
+        engine = self.engine
+        price = engine.menu.get_price(idx)
+
+        gross = amount * price + upcharge if amount else 0
+        self.subtotal += gross - self._line_gross.get(idx, 0)
+        old = self._line_discounts.pop(idx, ())
+        self._line_discount_total -= sum(discount for _, discount in old)
+        if amount:
+            self.amounts[idx] = amount
+            self._line_gross[idx] = gross
+            new = tuple((label, fn(amount, price)) for label, fn in engine.line_rules[idx])
+            new = tuple(entry for entry in new if entry[1] > 0)
+            if new:
+                self._line_discounts[idx] = new
+                self._line_discount_total += sum(discount for _, discount in new)
+        else:
+            self.amounts.pop(idx, None)
+            self._line_gross.pop(idx, None)
+
+        for combo in engine.combos_by_slot.get(idx, ()):
+            _, slots, amount_off = engine.combos[combo]
+            discount = min(self.amounts.get(slot, 0) for slot in slots) * amount_off
+            self._combo_discount_total += discount - self._combo_discounts.get(combo, 0)
+            if discount:
+                self._combo_discounts[combo] = discount
+            else:
+                self._combo_discounts.pop(combo, None)
+
+    def result(self, now: Optional[datetime] = None) -> PriceResult:
+        """
+        Combine the cached line and combo discounts with the time- and total-dependent rules
+        :param now: evaluation time for happy hours, the current time by default
+        :return: price result
+        """
+        engine = self.engine
+        applied: List[Tuple[str, int]] = []
+        for idx in sorted(self._line_discounts):  # menu order, however the lines were edited
+            applied.extend(self._line_discounts[idx])
+        for combo in sorted(self._combo_discounts):
+            applied.append((engine.combos[combo][0], self._combo_discounts[combo]))
+        discount_total = self._line_discount_total + self._combo_discount_total
+
+        if engine.happy_hours and self.subtotal:
+            clock = (now or datetime.now()).time()
+            for label, start, end, bp, slots in engine.happy_hours:
+                active = start <= clock < end if start <= end else (clock >= start or clock < end)
+                if not active:
+                    continue
+                if slots is None:
+                    base = self.subtotal
+                else:
+                    base = sum(gross for idx, gross in self._line_gross.items() if idx in slots)
+                discount = percent_of(base, bp)
+                if discount:
+                    applied.append((label, discount))
+                    discount_total += discount
+
+        tier = engine.threshold_tier(self.subtotal)
+        if tier is not None:
+            discount = percent_of(max(self.subtotal - discount_total, 0), tier[1])
+            if discount:
+                applied.append((tier[2], discount))
+                discount_total += discount
+
+        discount_total = min(discount_total, self.subtotal)
+        return PriceResult(self.subtotal, discount_total, self.subtotal - discount_total, tuple(applied))
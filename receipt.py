@@ -0,0 +1,157 @@
+import argparse
+import html
+import json
+import sys
+from typing import Callable, Dict, Iterable, List, Union
+
+from ledger import CompletedOrder, load_orders
+
+# ESC/POS control sequences
+ESC_INIT = b'\x1b@'
+ESC_ALIGN_LEFT = b'\x1ba\x00'
+ESC_ALIGN_CENTER = b'\x1ba\x01'
+ESC_BOLD_ON = b'\x1bE\x01'
+ESC_BOLD_OFF = b'\x1bE\x00'
+GS_CUT = b'\x1dV\x00'
+
+
+class ReceiptRenderer:
+    """
+    Renders a CompletedOrder as plain text, ESC/POS bytes, HTML or JSON.
+    Layout pieces that don't depend on the order are built once in __init__,
+    rendering only walks the order's non-zero lines.
+    """
+    FORMATS = ('text', 'escpos', 'html', 'json')
+
+    def __init__(self, width: int = 50, encoding: str = 'cp949') -> None:
+        """
+        Initialization method for the ReceiptRenderer class.
+        :param width: width of the separator rules in characters
+        :param encoding: character set of the receipt printer for ESC/POS output
+        :return: None
+        """
+        self.width = width
+        self.encoding = encoding
+
+        rule = "-" * width + "\n"
+        self._text_header = f"{'Product':<15} {'Price':<10} {'Amount':<10} {'Subtotal':<10}\n" + rule
+        self._text_line = "{:<15} {:<10} {:<10} {} won\n".format
+        self._text_totals = rule + f"{'Total price before discount:':<30} " + "{} won\n"
+        self._text_discount = (f"{'Discount amount:':<30} " + "{} won\n"
+                               + f"{'Total price after discount:':<30} " + "{} won\n").format
+        self._text_no_discount = f"{'No discount applied.':<30}\n" + f"{'Total price:':<30} " + "{:>5} won\n"
+
+        self._escpos_header = (ESC_INIT + ESC_ALIGN_CENTER + ESC_BOLD_ON + b'RECEIPT\n' + ESC_BOLD_OFF
+                               + ESC_ALIGN_LEFT)
+        self._escpos_footer = b'\n\n\n' + GS_CUT
+
+        self._html_head = ('<div class="receipt"><table><thead><tr><th>Product</th><th>Price</th>'
+                           '<th>Amount</th><th>Subtotal</th></tr></thead><tbody>')
+        self._html_line = '<tr><td>{}</td><td>{}</td><td>{}</td><td>{} won</td></tr>'.format
+
+        self._renderers: Dict[str, Callable[[CompletedOrder], Union[str, bytes]]] = {
+            'text': self.render_text,
+            'escpos': self.render_escpos,
+            'html': self.render_html,
+            'json': self.render_json,
+        }
+
+    def render(self, order: CompletedOrder, fmt: str = 'text') -> Union[str, bytes]:
+        """
+        Render one order
+        :param order: order to render
+        :param fmt: one of FORMATS
+        :return: str, or bytes for 'escpos'
+        """
+        try:
+            renderer = self._renderers[fmt]
+        except KeyError:
+            raise ValueError(f"Unknown receipt format: {fmt}") from None
+        return renderer(order)
+
+    def render_many(self, orders: Iterable[CompletedOrder], fmt: str = 'text') -> List[Union[str, bytes]]:
+        """
+        Render a batch of orders, e.g. the end-of-day reprints
+        :param orders: orders to render
+        :param fmt: one of FORMATS
+        :return: rendered receipts in the same order
+        """
+        if fmt not in self._renderers:
+            raise ValueError(f"Unknown receipt format: {fmt}")
+        renderer = self._renderers[fmt]
+        return [renderer(order) for order in orders]
+
+    def render_text(self, order: CompletedOrder) -> str:
+        """
+        Render the kiosk's on-screen receipt
+        :param order: order to render
+        :return: receipt text
+        """
+        line = self._text_line
+        parts = [self._text_header]
+        parts += [line(name, price, amount, price * amount) for name, price, amount in order.lines]
+        parts.append(self._text_totals.format(order.total_price))
+        if order.discount > 0:
+            parts.append(self._text_discount(order.discount, order.final_price))
+        else:
+            parts.append(self._text_no_discount.format(order.total_price))
+        parts.append('\t' + order.created_at)
+        return "".join(parts)
+
+    def render_escpos(self, order: CompletedOrder) -> bytes:
+        """
+        Render a byte stream for an ESC/POS receipt printer
+        :param order: order to render
+        :return: printer bytes ending with a paper cut
+        """
+        body = self.render_text(order)
+        if order.ticket is not None:
+            body += f"\nQueue number ticket: {order.ticket}"
+        return self._escpos_header + body.encode(self.encoding, errors='replace') + self._escpos_footer
+
+    def render_html(self, order: CompletedOrder) -> str:
+        """
+        Render an HTML fragment
+        :param order: order to render
+        :return: HTML string
+        """
+        line = self._html_line
+        parts = [self._html_head]
+        parts += [line(html.escape(name), price, amount, price * amount) for name, price, amount in order.lines]
+        parts.append(f'</tbody></table><p>Total price before discount: {order.total_price} won</p>')
+        if order.discount > 0:
+            parts.append(f'<p>Discount amount: {order.discount} won</p>')
+        parts.append(f'<p class="total">Total price: {order.final_price} won</p>')
+        if order.ticket is not None:
+            parts.append(f'<p class="ticket">Queue number ticket: {order.ticket}</p>')
+        parts.append(f'<p class="time">{order.created_at}</p></div>')
+        return "".join(parts)
+
+    def render_json(self, order: CompletedOrder) -> str:
+        """
+        Render a JSON document
+        :param order: order to render
+        :return: JSON string
+        """
+        return json.dumps({
+            'ticket': order.ticket,
+            'lines': [{'name': name, 'price': price, 'amount': amount} for name, price, amount in order.lines],
+            'total_price': order.total_price,
+            'discount': order.discount,
+            'final_price': order.final_price,
+            'created_at': order.created_at,
+        }, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reprint every receipt of a day from the order ledger.")
+    parser.add_argument('day', help='date as YYYY-MM-DD')
+    parser.add_argument('--format', choices=ReceiptRenderer.FORMATS, default='text')
+    parser.add_argument('--db', default='queue_number.db')
+    args = parser.parse_args()
+
+    receipts = ReceiptRenderer().render_many(load_orders(args.db, args.day), args.format)
+    if args.format == 'escpos':
+        sys.stdout.buffer.write(b''.join(receipts))
+    else:
+        print("\n\n".join(receipts))
@@ -0,0 +1,360 @@
+import asyncio
+import atexit
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+
+class JobStats:
+    """What a periodic job did so far; updated on the scheduler thread, read anywhere."""
+
+    def __init__(self) -> None:
+        """
+        Initialization method for the JobStats class.
+        :return: None
+        """
+        self.runs = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_error: Optional[BaseException] = None
+        self.last_duration = 0.0  # seconds
+        self.next_run: Optional[float] = None  # time.monotonic() of the next run
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        JSON-ready form
+        :return: dictionary
+        """
+        return {'runs': self.runs, 'failures': self.failures, 'consecutive_failures': self.consecutive_failures,
+                'last_error': repr(self.last_error) if self.last_error is not None else None,
+                'last_duration_ms': round(self.last_duration * 1e3, 3)}
+
+
+class Job:
+    """A periodic job: func every interval seconds (jittered), backing off exponentially while it fails."""
+
+    def __init__(self, name: str, func: Callable[[], Any], interval: float, jitter: float = 0.1,
+                 max_backoff: Optional[float] = None, timeout: Optional[float] = None, first_delay: float = 0.0,
+                 on_result: Optional[Callable[[Any], None]] = None,
+                 on_error: Optional[Callable[[BaseException], None]] = None) -> None:
+        """
+        Initialization method for the Job class.
+        :param name: unique job name
+        :param func: blocking callable (run on the scheduler's worker threads) or coroutine function
+        :param interval: seconds between the end of one run and the start of the next
+        :param jitter: each delay is spread by up to this fraction either way, so kiosks started
+            together don't hit a server in the same second
+        :param max_backoff: longest delay after repeated failures, 10 x interval by default
+        :param timeout: seconds a coroutine job may run before it is cancelled (blocking calls can't be cut short)
+        :param first_delay: seconds before the first run
+        :param on_result: called with func's result after every successful run (on the scheduler thread)
+        :param on_error: called with the exception after every failed run (on the scheduler thread)
+        :return: None
+        """
+        if interval <= 0:
+            raise ValueError("Interval must be positive.")
+        if not 0 <= jitter < 1:
+            raise ValueError("Jitter must be from 0 to less than 1.")
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff if max_backoff is not None else 10 * interval
+        self.timeout = timeout
+        self.first_delay = first_delay
+        self.on_result = on_result
+        self.on_error = on_error
+        self.stats = JobStats()
+        self._wake: Optional[asyncio.Event] = None  # set by run_now(); created on the scheduler loop
+
+    def next_delay(self, rng: random.Random) -> float:
+        """
+        Seconds to wait before the next run: the interval, doubled per consecutive failure up to
+        max_backoff, then jittered
+        :param rng: random source
+        :return: delay
+        """
+        failures = self.stats.consecutive_failures
+        delay = min(self.interval * 2 ** failures, self.max_backoff) if failures else self.interval
+        return delay * (1 + self.jitter * (2 * rng.random() - 1))
+
+
+class Scheduler:
+    """
+    Runs the kiosk's periodic side jobs (weather refresh, database checkpoints, metrics flush, ...)
+    on one asyncio loop in a dedicated thread. Blocking jobs go to a fixed pool of workers, and at
+    most max_concurrency jobs run at once, however many are due, so a busy kiosk never spawns threads.
+    All public methods are thread-safe.
+    """
+
+    def __init__(self, max_concurrency: int = 2, name: str = 'kiosk-scheduler', seed: Optional[int] = None) -> None:
+        """
+        Initialization method for the Scheduler class.
+        :param max_concurrency: jobs running at the same time (also the number of worker threads)
+        :param name: thread name
+        :param seed: seed of the jitter, for reproducible runs
+        :return: None
+        """
+        if max_concurrency < 1:
+            raise ValueError("Concurrency must be at least 1.")
+        self.max_concurrency = max_concurrency
+        self.name = name
+        self.jobs: Dict[str, Job] = {}
+        self._rng = random.Random(seed)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._executor = ThreadPoolExecutor(max_concurrency, thread_name_prefix=f'{name}-worker')
+        self._loop = asyncio.new_event_loop()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._thread = threading.Thread(target=self._run_loop, name=name, daemon=True)
+        self._started = threading.Event()
+        self._lock = threading.Lock()  # guards start/stop
+        self._stopped = False
+
+    def _run_loop(self) -> None:
+        """
+        Body of the scheduler thread
+        :return: None
+        """
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._loop.call_soon(self._started.set)
+        self._loop.run_forever()
+
+    def start(self) -> 'Scheduler':
+        """
+        Start the scheduler thread (once; later calls do nothing)
+        :return: self
+        """
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError("Scheduler is stopped.")
+            if not self._thread.is_alive():
+                self._thread.start()
+        self._started.wait()
+        return self
+
+    def _call(self, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn on the scheduler loop and wait for its result
+        :param fn: callable
+        :return: fn's result
+        """
+        if threading.current_thread() is self._thread:
+            return fn()
+        self.start()
+
+        async def call() -> Any:
+            return fn()
+        return asyncio.run_coroutine_threadsafe(call(), self._loop).result()
+
+    def every(self, name: str, func: Callable[[], Any], interval: float, **options) -> Job:
+        """
+        Schedule a periodic job, replacing a job of the same name
+        :param name: unique job name
+        :param func: blocking callable or coroutine function
+        :param interval: seconds between runs
+        :param options: other Job arguments (jitter, max_backoff, timeout, first_delay, on_result, on_error)
+        :return: the job
+        """
+        job = Job(name, func, interval, **options)
+
+        def add() -> None:
+            old = self._tasks.pop(name, None)
+            if old is not None:
+                old.cancel()
+            job._wake = asyncio.Event()
+            self.jobs[name] = job
+            self._tasks[name] = self._loop.create_task(self._job_loop(job), name=f'job {name}')
+        self._call(add)
+        return job
+
+    def cancel(self, name: str) -> bool:
+        """
+        Stop a job; a run in progress is cancelled too when it is a coroutine, and finishes unreported otherwise
+        :param name: job name
+        :return: True if the job existed
+        """
+        def remove() -> bool:
+            task = self._tasks.pop(name, None)
+            self.jobs.pop(name, None)
+            if task is None:
+                return False
+            task.cancel()
+            return True
+        return self._call(remove)
+
+    def run_now(self, name: str) -> bool:
+        """
+        Run a job as soon as a slot is free instead of waiting for its next turn
+        :param name: job name
+        :return: True if the job exists
+        """
+        def wake() -> bool:
+            job = self.jobs.get(name)
+            if job is None:
+                return False
+            job._wake.set()
+            return True
+        return self._call(wake)
+
+    async def _job_loop(self, job: Job) -> None:
+        """
+        Run one job until it is cancelled
+        :param job: the job
+        :return: None
+        """
+        delay = job.first_delay
+        while True:
+            job.stats.next_run = time.monotonic() + delay
+            try:
+                await asyncio.wait_for(job._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            job._wake.clear()
+            job.stats.next_run = None
+
+            async with self._semaphore:
+                start = time.perf_counter()
+                try:
+                    if asyncio.iscoroutinefunction(job.func):
+                        result = await asyncio.wait_for(job.func(), job.timeout)
+                    else:
+                        result = await self._loop.run_in_executor(self._executor, job.func)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as err:
+                    job.stats.failures += 1
+                    job.stats.consecutive_failures += 1
+                    job.stats.last_error = err
+                    self._report(job.on_error, err, job)
+                else:
+                    job.stats.consecutive_failures = 0
+                    self._report(job.on_result, result, job)
+                finally:
+                    job.stats.runs += 1
+                    job.stats.last_duration = time.perf_counter() - start
+            delay = job.next_delay(self._rng)
+
+    @staticmethod
+    def _report(callback: Optional[Callable[[Any], None]], value: Any, job: Job) -> None:
+        """
+        Hand a result or error to a job's callback; a failing callback never stops the job
+        :param callback: on_result or on_error, may be None
+        :param value: result or exception
+        :param job: the job
+        :return: None
+        """
+        if callback is None:
+            return
+        try:
+            callback(value)
+        except Exception as err:
+            print(f"Scheduler job {job.name}: callback failed: {err}")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Statistics of every job
+        :return: job name -> JobStats.to_dict()
+        """
+        return {name: job.stats.to_dict() for name, job in list(self.jobs.items())}
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Cancel every job and stop the thread; blocking jobs still running are waited for up to timeout
+        :param timeout: seconds to wait for the thread
+        :return: None
+        """
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            running = self._thread.is_alive()
+        if running:
+            async def shutdown() -> None:
+                tasks = list(self._tasks.values())
+                self._tasks.clear()
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                self._loop.stop()
+            asyncio.run_coroutine_threadsafe(shutdown(), self._loop)
+            self._thread.join(timeout)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if not self._thread.is_alive():
+            self._loop.close()
+
+
+class TkBridge:
+    """Delivers scheduler results on the Tk thread via root.after, the only safe way to touch widgets."""
+
+    def __init__(self, root) -> None:
+        """
+        Initialization method for the TkBridge class.
+        :param root: tk.Tk, tk.Toplevel or anything with after(ms, callback)
+        :return: None
+        """
+        self.root = root
+
+    def post(self, fn: Callable[..., None], *args) -> None:
+        """
+        Run fn(*args) on the Tk thread soon; dropped once the window is gone
+        :param fn: callable
+        :param args: its arguments
+        :return: None
+        """
+        try:
+            self.root.after(0, lambda: fn(*args))
+        except RuntimeError:  # main loop gone (Tcl raises RuntimeError from foreign threads after destroy)
+            pass
+        except Exception as err:
+            if type(err).__name__ != 'TclError':  # window destroyed; tkinter isn't imported here
+                raise
+
+    def wrap(self, fn: Callable[..., None]) -> Callable[..., None]:
+        """
+        Turn a Tk-thread callback into one the scheduler can call, e.g. on_result=bridge.wrap(label_update)
+        :param fn: callable touching widgets
+        :return: callable posting fn to the Tk thread
+        """
+        return lambda *args: self.post(fn, *args)
+
+
+_scheduler: Optional[Scheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    """
+    Return the process-wide scheduler, starting it on first use
+    :return: shared Scheduler instance
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler().start()
+        return _scheduler
+
+
+@atexit.register
+def stop_scheduler() -> None:
+    """
+    Stop the process-wide scheduler
+    :return: None
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is not None:
+            _scheduler.stop()
+            _scheduler = None
+
+
+def job_names(scheduler: Scheduler, prefix: str) -> List[str]:
+    """
+    Names of the jobs starting with prefix, e.g. to cancel everything one window scheduled
+    :param scheduler: scheduler
+    :param prefix: name prefix
+    :return: job names
+    """
+    return [name for name in list(scheduler.jobs) if name.startswith(prefix)]
@@ -0,0 +1,90 @@
+import time
+from typing import List, Optional
+
+
+class StallMonitor:
+    """
+    Measures how responsive an event loop is. A tick is scheduled every interval; any delay
+    beyond that is time the loop was busy with something else (a stall). Works with a Tk root
+    or any object offering after(ms, callback), so it can be measured without a display.
+    """
+
+    def __init__(self, root, interval_ms: int = 10, keep: int = 10000) -> None:
+        """
+        Initialization method for the StallMonitor class.
+        :param root: object with after(ms, callback), e.g. tk.Tk
+        :param interval_ms: tick interval in milliseconds
+        :param keep: most recent stalls kept for percentiles
+        :return: None
+        """
+        self.root = root
+        self.interval_ms = interval_ms
+        self.keep = keep
+        self.max_stall = 0.0  # seconds
+        self.ticks = 0
+        self.stalls: List[float] = []
+        self._expected: Optional[float] = None
+        self._after_id = None
+
+    def start(self) -> None:
+        """
+        Start ticking
+        :return: None
+        """
+        self._expected = time.perf_counter() + self.interval_ms / 1000
+        self._after_id = self.root.after(self.interval_ms, self._tick)
+
+    def stop(self) -> None:
+        """
+        Stop ticking
+        :return: None
+        """
+        if self._after_id is not None and hasattr(self.root, 'after_cancel'):
+            self.root.after_cancel(self._after_id)
+        self._after_id = None
+        self._expected = None
+
+    def reset(self) -> None:
+        """
+        Forget the stalls measured so far
+        :return: None
+        """
+        self.max_stall = 0.0
+        self.ticks = 0
+        self.stalls.clear()
+
+    def _tick(self) -> None:
+        """
+        Record how late this tick ran and schedule the next one
+        :return: None
+        """
+        if self._expected is None:
+            return
+        now = time.perf_counter()
+        stall = max(0.0, now - self._expected)
+        self.ticks += 1
+        self.max_stall = max(self.max_stall, stall)
+        self.stalls.append(stall)
+        if len(self.stalls) > self.keep:
+            del self.stalls[:len(self.stalls) - self.keep]
+        self._expected = now + self.interval_ms / 1000
+        self._after_id = self.root.after(self.interval_ms, self._tick)
+
+    def percentile(self, pct: float) -> float:
+        """
+        Stall percentile of the kept ticks
+        :param pct: percentile from 0 to 100
+        :return: stall in seconds
+        """
+        if not self.stalls:
+            return 0.0
+        ordered = sorted(self.stalls)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def summary(self) -> str:
+        """
+        One line report
+        :return: text
+        """
+        return (f"UI stalls over {self.ticks} ticks: p50 {self.percentile(50) * 1e3:.1f} ms, "
+                f"p99 {self.percentile(99) * 1e3:.1f} ms, max {self.max_stall * 1e3:.1f} ms")
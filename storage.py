@@ -0,0 +1,222 @@
+import atexit
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from instrumentation import timer
+
+# Applied to every pooled connection. WAL lets readers run next to the single writer,
+# synchronous=NORMAL drops the fsync on every commit (WAL stays consistent after a crash,
+# only the last commits before a power loss may be rolled back).
+DEFAULT_PRAGMAS: List[Tuple[str, str]] = [
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('temp_store', 'MEMORY'),
+    ('cache_size', '-8000'),  # negative -> KiB, i.e. 8 MB page cache
+    ('foreign_keys', 'ON'),
+]
+
+SCHEMA: List[str] = [
+    '''
+    create table if not exists ticket (
+    id integer primary key autoincrement,
+    number integer not null
+    )
+    ''',
+    'insert into ticket (number) select 0 where not exists (select 1 from ticket)',
+    '''
+    create table if not exists orders (
+    id integer primary key autoincrement,
+    ticket integer not null,
+    total_price integer not null,
+    discount integer not null,
+    final_price integer not null,
+    created_at text not null
+    )
+    ''',
+    '''
+    create table if not exists order_lines (
+    order_id integer not null references orders (id),
+    drink_name text not null,
+    price integer not null,
+    amount integer not null
+    )
+    ''',
+    'create index if not exists order_lines_order_id on order_lines (order_id)',
+    'create index if not exists orders_created_at on orders (created_at)',
+    # menu catalog: slots follow the id order; every change bumps menu_revision (see catalog.py)
+    '''
+    create table if not exists menu (
+    id integer primary key,
+    name text not null,
+    price integer not null check (price >= 0),
+    sku text unique
+    )
+    ''',
+    'create table if not exists menu_revision (id integer primary key check (id = 1), revision integer not null)',
+    'insert into menu_revision (id, revision) select 1, 0 where not exists (select 1 from menu_revision)',
+    '''
+    create trigger if not exists menu_inserted after insert on menu
+    begin update menu_revision set revision = revision + 1; end
+    ''',
+    '''
+    create trigger if not exists menu_updated after update on menu
+    begin update menu_revision set revision = revision + 1; end
+    ''',
+    '''
+    create trigger if not exists menu_deleted after delete on menu
+    begin update menu_revision set revision = revision + 1; end
+    ''',
+]
+
+
+_pool_wait = timer('db_pool_wait', 'Waiting for a free pooled connection (only when all are checked out)')
+
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections to a single database file."""
+
+    def __init__(self, db_path: str, size: int = 4, timeout: float = 30.0) -> None:
+        """
+        Initialization method for the ConnectionPool class.
+        Connections are opened lazily, up to size of them.
+        :param db_path: path of the SQLite database
+        :param size: maximum number of open connections
+        :param timeout: seconds to wait for a free connection or a database lock
+        :return: None
+        """
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=size)
+        self._all: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+        with self.transaction() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    def _open(self) -> sqlite3.Connection:
+        """
+        Open a new autocommit connection with the pool pragmas applied
+        :return: new connection
+        """
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        for name, value in DEFAULT_PRAGMAS:
+            conn.execute(f'pragma {name} = {value}')
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        """
+        Take an idle connection, opening a new one while the pool is below its size
+        :return: checked-out connection
+        """
+        if self._closed:
+            raise RuntimeError("Connection pool is closed.")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._all) < self.size:
+                conn = self._open()
+                self._all.append(conn)
+                return conn
+
+        try:
+            with _pool_wait:
+                return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError("No free database connection.") from None
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Check out a connection for the duration of the with block.
+        Connections are in autocommit mode; use transaction() to group statements.
+        :return: context manager yielding a connection
+        """
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:  # never hand a half-finished transaction to the next user
+                conn.rollback()
+            self._idle.put(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Check out a connection and run the with block as one write transaction.
+        Commits on success, rolls back if the block raises.
+        :return: context manager yielding a connection
+        """
+        with self.connection() as conn:
+            conn.execute('begin immediate')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('rollback')
+                raise
+            conn.execute('commit')
+
+    def checkpoint(self, mode: str = 'PASSIVE') -> Tuple[int, int, int]:
+        """
+        Copy the write-ahead log back into the database file so the WAL doesn't keep growing
+        :param mode: PASSIVE (never waits for readers or writers), FULL, RESTART or TRUNCATE
+        :return: (busy flag, frames in the WAL, frames checkpointed) as reported by SQLite
+        """
+        mode = mode.upper()
+        if mode not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+            raise ValueError(f"Unknown checkpoint mode {mode!r}.")
+        with self.connection() as conn:
+            busy, frames, checkpointed = conn.execute(f'pragma wal_checkpoint({mode})').fetchone()
+        return busy, frames, checkpointed
+
+    def close(self) -> None:
+        """
+        Close every connection owned by the pool
+        :return: None
+        """
+        with self._lock:
+            self._closed = True
+            for conn in self._all:
+                conn.close()
+            self._all.clear()
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str = 'queue_number.db') -> ConnectionPool:
+    """
+    Return the process-wide pool for a database, creating it (and its schema) on first use
+    :param db_path: path of the SQLite database
+    :return: shared ConnectionPool instance
+    """
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = ConnectionPool(db_path)
+            _pools[db_path] = pool
+        return pool
+
+
+@atexit.register
+def close_pools() -> None:
+    """
+    Close every process-wide pool
+    :return: None
+    """
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
@@ -0,0 +1,281 @@
+import argparse
+import csv
+import hashlib
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from crawler import HOLLYS_COLUMNS, HOLLYS_PAGES, HOLLYS_URL, PageCrawler, Row, parse_hollys_page
+
+CHANGE_COLUMNS = ('변경', '매장명', '주소', '전화번호', '일시')  # change (inserted/changed/deleted), store row
+INSERTED, CHANGED, DELETED = 'inserted', 'changed', 'deleted'
+MAX_DELETED = 0.2  # share of the known stores one sync may delete; more looks like a broken crawl
+
+SCHEMA = '''
+create table if not exists stores (
+key text primary key,
+name text,
+address text,
+phone text,
+digest blob not null,
+changed_at text
+)
+'''
+
+
+def store_key(row: Row) -> str:
+    """
+    Key of a store across crawls: its name and address, so branches sharing a name stay apart
+    :param row: store row
+    :return: key, empty for a row without a name
+    """
+    name = (row[0] or '').strip()
+    return f"{name}\x1f{(row[1] or '').strip()}" if name else ''
+
+
+def hash_records(rows: Sequence[Row]) -> List[bytes]:
+    """
+    Digest of the name, address and phone of every row (the crawl time is left out)
+    :param rows: store rows
+    :return: 16-byte digest per row
+    """
+    blake2b = hashlib.blake2b
+    return [blake2b(f"{row[0] or ''}\x1f{row[1] or ''}\x1f{row[2] or ''}".encode('utf-8'), digest_size=16).digest()
+            for row in rows]
+
+
+def parse_hashed_hollys_page(page: bytes) -> List[Row]:
+    """
+    parse_hollys_page plus the digest of every row as a fifth column, so that with the crawler's
+    parse_workers the hashing runs on the same processes as the parsing, at no extra transfer cost
+    :param page: page HTML
+    :return: store rows with their digests
+    """
+    rows = parse_hollys_page(page)
+    return [row + [digest] for row, digest in zip(rows, hash_records(rows))]
+
+
+class StoreIndex:
+    """Persistent key -> digest index of the stores seen by the last complete crawl (a SQLite table)."""
+
+    def __init__(self, path: str) -> None:
+        """
+        Initialization method for the StoreIndex class.
+        :param path: SQLite database path
+        :return: None
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('pragma journal_mode = WAL')
+        self.conn.execute('pragma synchronous = NORMAL')
+        self.conn.execute(SCHEMA)
+        with self.conn:  # indexes written before stores were keyed by name and address
+            self.conn.execute("update stores set key = key || char(31) || trim(coalesce(address, '')) "
+                              "where instr(key, char(31)) = 0")
+
+    def digests(self) -> Dict[str, bytes]:
+        """
+        Load every key and digest
+        :return: key -> digest
+        """
+        return dict(self.conn.execute('select key, digest from stores'))
+
+    def upsert(self, rows: Iterable[Tuple[str, Row, bytes]]) -> None:
+        """
+        Insert or replace stores in one transaction
+        :param rows: (key, row, digest)
+        :return: None
+        """
+        with self.conn:
+            self.conn.executemany(
+                'insert into stores values (?, ?, ?, ?, ?, ?) on conflict (key) do update set '
+                'name = excluded.name, address = excluded.address, phone = excluded.phone, '
+                'digest = excluded.digest, changed_at = excluded.changed_at',
+                [(key, row[0], row[1], row[2], digest, row[3]) for key, row, digest in rows])
+
+    def delete(self, keys: Sequence[str]) -> List[Row]:
+        """
+        Remove stores in one transaction
+        :param keys: keys to remove
+        :return: the removed rows
+        """
+        removed = []
+        with self.conn:
+            for key in keys:
+                found = self.conn.execute(
+                    'delete from stores where key = ? returning name, address, phone, changed_at', (key,)).fetchall()
+                removed.extend(list(row) for row in found)
+        return removed
+
+    def export_csv(self, path: str, columns: Sequence[str], encoding: str = 'cp949', index: bool = False) -> int:
+        """
+        Write the current store list, e.g. to regenerate holly.csv (일시 is when each store last changed)
+        :param path: CSV path (rewritten)
+        :param columns: header names
+        :param encoding: file encoding
+        :param index: numbered rows in the layout holly.csv always had (see crawler.CsvSink)
+        :return: rows written
+        """
+        count = 0
+        with open(path, 'w', newline='', encoding=encoding, errors='replace') as fp:
+            writer = csv.writer(fp, lineterminator='\n') if index else csv.writer(fp)
+            writer.writerow(['', *columns] if index else columns)
+            for row in self.conn.execute('select name, address, phone, changed_at from stores order by rowid'):
+                writer.writerow((count, *row) if index else row)
+                count += 1
+        return count
+
+    def close(self) -> None:
+        """
+        Release the database
+        :return: None
+        """
+        self.conn.close()
+
+
+class StoreSyncSink:
+    """
+    Crawl sink that writes only differences: rows are hashed and compared with the index, and only
+    inserted and changed stores reach the index and the change log. finish() records the stores
+    missing from a complete crawl as deleted, unless the crawl looks broken (a page without stores,
+    or more than max_deleted of the known stores gone). Re-running an interrupted crawl costs no extra writes,
+    so the sink needs no checkpoint. Rows from parse_hashed_hollys_page come with their digest and
+    are not hashed again.
+    """
+
+    def __init__(self, index_path: str, changes_path: Optional[str], encoding: str = 'cp949',
+                 max_deleted: float = MAX_DELETED) -> None:
+        """
+        Initialization method for the StoreSyncSink class.
+        :param index_path: SQLite database of the hash index
+        :param changes_path: CSV the changes are appended to, None to keep no change log
+        :param encoding: change log encoding
+        :param max_deleted: largest share of the known stores finish() deletes, 1 for no limit
+        :return: None
+        """
+        self.index = StoreIndex(index_path)
+        self.known = self.index.digests()
+        self.known_before = len(self.known)  # write() adds new stores to known; the deletion limit uses this
+        self.seen: Set[str] = set()
+        self.max_deleted = max_deleted
+        self.empty_pages: List[int] = []
+        self.counts = {INSERTED: 0, CHANGED: 0, DELETED: 0, 'unchanged': 0, 'duplicate': 0}
+        self._fp = None
+        if changes_path:
+            new_file = not os.path.exists(changes_path) or os.path.getsize(changes_path) == 0
+            self._fp = open(changes_path, 'a', newline='', encoding=encoding, errors='replace')
+            self._log = csv.writer(self._fp)
+            if new_file:
+                self._log.writerow(CHANGE_COLUMNS)
+
+    def write(self, page: int, rows: List[Row]) -> None:
+        """
+        Compare one page with the index and write its inserted and changed stores
+        :param page: page number
+        :param rows: parsed rows
+        :return: None
+        """
+        if not rows:
+            self.empty_pages.append(page)  # an error page or a new layout parses to nothing
+        updates = []
+        digests = [row[4] for row in rows] if rows and len(rows[0]) > 4 else hash_records(rows)
+        known, seen = self.known, self.seen
+        for row, digest in zip(rows, digests):
+            key = store_key(row)
+            if not key:
+                continue
+            if key in seen:
+                self.counts['duplicate'] += 1  # the same store listed twice, the first row wins
+                continue
+            seen.add(key)
+            previous = known.get(key)
+            if previous == digest:
+                self.counts['unchanged'] += 1
+                continue
+            change = INSERTED if previous is None else CHANGED
+            self.counts[change] += 1
+            known[key] = digest
+            updates.append((key, row, digest))
+            if self._fp:
+                self._log.writerow((change, *row[:4]))
+        if updates:
+            self.index.upsert(updates)
+            if self._fp:
+                self._fp.flush()
+
+    def finish(self) -> None:
+        """
+        Record the stores a complete crawl did not return as deleted. Only call it after every page was written.
+        Nothing is deleted when a page had no stores or too many stores are missing; the index then
+        keeps them until a sync that looks complete.
+        :return: None
+        """
+        missing = [key for key in self.known if key not in self.seen]
+        if missing and (self.empty_pages or len(missing) > self.max_deleted * self.known_before):
+            reason = (f"pages {self.empty_pages} had no stores" if self.empty_pages
+                      else f"{len(missing)} of {self.known_before} stores are missing")
+            print(f"Store sync: not deleting {len(missing)} stores, {reason}")
+            self.counts['deletions_skipped'] = len(missing)
+            return
+        for row in self.index.delete(missing):
+            self.counts[DELETED] += 1
+            if self._fp:
+                self._log.writerow((DELETED, *row))
+        for key in missing:
+            del self.known[key]
+        if self._fp:
+            self._fp.flush()
+
+    def close(self) -> None:
+        """
+        Release the index and the change log
+        :return: None
+        """
+        if self._fp:
+            self._fp.close()
+        self.index.close()
+
+
+def sync_hollys(index_path: str = 'holly.index.db', changes_path: Optional[str] = 'holly.changes.csv',
+                concurrency: int = 4, rate_limit: Optional[float] = 8, parse_workers: int = 0,
+                url_template: str = HOLLYS_URL, pages: Iterable[int] = HOLLYS_PAGES) -> Dict[str, int]:
+    """
+    Crawl the Hollys store list and record only what changed since the last complete sync
+    :param index_path: hash index database
+    :param changes_path: change log CSV, None for none
+    :param concurrency: pages fetched at the same time
+    :param rate_limit: requests per second
+    :param parse_workers: processes parsing and hashing the pages, 0 to do both on the fetch threads
+    :param url_template: store list URL with a {page} placeholder
+    :param pages: page numbers to crawl
+    :return: inserted, changed, deleted, unchanged and duplicate counts (and deletions_skipped when
+        the crawl looked broken, see StoreSyncSink.finish)
+    """
+    sink = StoreSyncSink(index_path, changes_path)
+    crawler = PageCrawler(url_template, parse_hashed_hollys_page, sink, concurrency=concurrency,
+                          rate_limit=rate_limit, parse_workers=parse_workers)
+    try:
+        crawler.crawl(pages)
+        sink.finish()  # a failed crawl stops above, so missing pages are never taken for deleted stores
+    finally:
+        sink.close()
+    return sink.counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally sync the Hollys store list into a hash index.")
+    parser.add_argument('--index', default='holly.index.db', help='hash index database')
+    parser.add_argument('--changes', default='holly.changes.csv', help='change log CSV')
+    parser.add_argument('--export', default=None, help='also write the full current store list to this CSV')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rate-limit', type=float, default=8, help='requests per second')
+    parser.add_argument('--parse-workers', type=int, default=0, help='processes parsing and hashing pages')
+    args = parser.parse_args()
+    counts = sync_hollys(args.index, args.changes, args.concurrency, args.rate_limit, args.parse_workers)
+    print(", ".join(f"{count} {name}" for name, count in counts.items()))
+    if args.export:
+        store_index = StoreIndex(args.index)
+        try:
+            print(f"{store_index.export_csv(args.export, HOLLYS_COLUMNS, index=True)} stores exported to {args.export}")
+        finally:
+            store_index.close()
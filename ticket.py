@@ -0,0 +1,83 @@
+import threading
+from typing import Dict, Tuple
+
+from instrumentation import timer
+from storage import get_pool
+
+_lock_wait = timer('ticket_lock_wait', 'Waiting for the allocator lock of the process (only when another thread holds it)')
+
+
+class TicketAllocator:
+    """Hands out queue ticket numbers atomically from the ticket table."""
+
+    def __init__(self, db_path: str = 'queue_number.db', block_size: int = 1) -> None:
+        """
+        Initialization method for the TicketAllocator class.
+        :param db_path: path of the SQLite database holding the ticket table
+        :param block_size: how many numbers to reserve per database round-trip
+        :return: None
+        """
+        if block_size < 1:
+            raise ValueError("Block size must be at least 1.")
+
+        self.db_path = db_path
+        self.block_size = block_size
+        self.pool = get_pool(db_path)  # creates the ticket table and its counter row once per process
+        self._lock = threading.Lock()
+        self._next = 0   # next number to hand out from the reserved block
+        self._limit = 0  # last number of the reserved block
+
+    @timer('ticket_reserve', 'Reserving ticket numbers in the database, SQLite lock waits included')
+    def _reserve(self, count: int) -> int:
+        """
+        Advance the stored counter by count in a single statement
+        :param count: how many numbers to reserve
+        :return: the last reserved number
+        """
+        # One UPDATE ... RETURNING is one implicit transaction: read and write can't interleave with other writers
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                'update ticket set number = number + ? where id = (select max(id) from ticket) returning number',
+                (count,)
+            ).fetchall()  # fetch to the end so the statement (and its write lock) finishes here
+        return rows[0][0]
+
+    def next_number(self) -> int:
+        """
+        Produce the next ticket number
+        With block_size > 1 numbers are unique but processes sharing the database
+        interleave blocks, so they are not strictly increasing across processes.
+        :return: next ticket number
+        """
+        if not self._lock.acquire(blocking=False):  # the uncontended case stays untimed
+            with _lock_wait:
+                self._lock.acquire()
+        try:
+            if self._next == 0 or self._next > self._limit:
+                self._limit = self._reserve(self.block_size)
+                self._next = self._limit - self.block_size + 1
+            number = self._next
+            self._next += 1
+            return number
+        finally:
+            self._lock.release()
+
+
+_allocators: Dict[Tuple[str, int], TicketAllocator] = {}
+_allocators_lock = threading.Lock()
+
+
+def get_allocator(db_path: str = 'queue_number.db', block_size: int = 1) -> TicketAllocator:
+    """
+    Return the process-wide allocator for a database, creating it on first use
+    :param db_path: path of the SQLite database holding the ticket table
+    :param block_size: how many numbers to reserve per database round-trip
+    :return: shared TicketAllocator instance
+    """
+    key = (db_path, block_size)
+    with _allocators_lock:
+        allocator = _allocators.get(key)
+        if allocator is None:
+            allocator = TicketAllocator(db_path, block_size)
+            _allocators[key] = allocator
+        return allocator
@@ -0,0 +1,79 @@
+from typing import Optional
+
+import http_client
+from instrumentation import timer
+from weather_cache import WeatherCache
+
+
+class WeatherStatusError(Exception):
+    """The weather endpoint answered with a non-200 status code."""
+
+
+
+class WeatherManager:
+    def __init__(self, url: str = "https://wttr.in/incheon?format=4", update_interval: float = 30,
+                 snapshot_path: Optional[str] = 'weather_cache.json'):
+        """
+        Initialization method for the WeatherManager class.
+        :param url: weather endpoint returning one line of text (a local stub server works too)
+        :param update_interval: seconds before the weather is fetched again
+        :param snapshot_path: on-disk cache file so a restarted kiosk shows the last weather at once
+        """
+        self.url = url
+        self.update_interval = update_interval
+        # refreshes run on the shared HTTP worker pool instead of a new thread each time
+        self.cache = WeatherCache(self.fetch_weather, ttl=update_interval, snapshot_path=snapshot_path,
+                                  submit=http_client.submit)
+
+    @property
+    def current_weather(self) -> str:
+        """
+        Text for the weather label: the cached weather (fresh or stale) or why there is none
+        :return: display text
+        """
+        if self.cache.value is not None and self.cache.is_usable():
+            return f"Current weather ({self.cache.value})"
+        err = self.cache.last_error
+        if err is None:
+            return 'Loading weather information...'
+        import requests  # already loaded by the fetch that failed
+        if isinstance(err, requests.exceptions.Timeout):
+            return "Weather information timeout"
+        if isinstance(err, requests.exceptions.RequestException):
+            return "Weather information error: Connection failed"
+        if isinstance(err, WeatherStatusError):
+            return str(err)
+        return f"Weather information error: {str(err)}"
+
+    @timer('fetch_weather', 'Fetching the weather text')
+    def fetch_weather(self) -> str:
+        """
+        Fetch the weather text from the endpoint
+        :return: weather text
+        """
+        response = http_client.get(self.url, timeout=5)  # 타임아웃 설정, keep-alive session with retries
+        if response.status_code != 200:
+            raise WeatherStatusError(f"Weather information cannot be loaded. (Status code : {response.status_code})")
+        return response.text.strip()
+
+    def refresh(self) -> str:
+        """
+        Fetch the weather now (blocking), for the kiosk's scheduler; a failed fetch is raised so the job backs off
+        :return: text for the weather label
+        """
+        self.cache.refresh()
+        if self.cache.last_error is not None:
+            raise self.cache.last_error
+        return self.current_weather
+
+    def should_update(self) -> bool:
+        """
+        Check if the weather information should be updated based on the last update time and interval.
+        :return: True if update is needed, False otherwise.
+        """
+        return self.cache.needs_refresh()
+
+    def update_weather_async(self, callback_func) -> None:
+        """Update weather information asynchronously (at most one fetch in flight)"""
+        # 이미 업데이트 중이면 중복 요청 방지 - the cache only lets one refresh run
+        self.cache.refresh_async(lambda: callback_func(self.current_weather) if callback_func else None)
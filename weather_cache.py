@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+
+class WeatherCache:
+    """
+    Caches the latest weather text with a TTL and serves stale values while revalidating.
+    At most one refresh runs at a time, and every successful fetch is snapshotted to disk
+    so a rebooted kiosk shows the last known weather before its first request completes.
+    """
+
+    def __init__(self, fetch: Callable[[], str], ttl: float = 30, stale_ttl: float = 3600,
+                 snapshot_path: Optional[str] = 'weather_cache.json', retry_interval: Optional[float] = None,
+                 submit: Optional[Callable[[Callable[[], None]], object]] = None) -> None:
+        """
+        Initialization method for the WeatherCache class.
+        :param fetch: callable returning fresh weather text, raising on failure
+        :param ttl: seconds a fetched value counts as fresh
+        :param stale_ttl: seconds a value may still be served while a refresh is pending
+        :param snapshot_path: JSON file for the on-disk snapshot, None to disable it
+        :param retry_interval: seconds to wait after a failed fetch before trying again, ttl by default
+        :param submit: runs background refreshes (e.g. a shared worker pool), a new daemon thread each time by default
+        :return: None
+        """
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.snapshot_path = snapshot_path
+        self.retry_interval = ttl if retry_interval is None else retry_interval
+        self.submit = submit
+        self.value: Optional[str] = None
+        self.fetched_at = 0.0  # time.time() of the last successful fetch
+        self.last_error: Optional[Exception] = None
+        self.failed_at = 0.0  # time.time() of the last failed fetch
+        self.fetch_count = 0
+        self._lock = threading.Lock()
+        self._done = threading.Condition(self._lock)
+        self._refreshing = False
+        self._load_snapshot()
+
+    def age(self) -> float:
+        """
+        Seconds since the cached value was fetched
+        :return: age in seconds, infinite if nothing was fetched yet
+        """
+        return time.time() - self.fetched_at if self.value is not None else float('inf')
+
+    def is_fresh(self) -> bool:
+        """
+        Check whether the cached value is within its TTL
+        :return: True if no refresh is needed
+        """
+        return self.age() <= self.ttl
+
+    def is_usable(self) -> bool:
+        """
+        Check whether the cached value may still be shown, fresh or stale
+        :return: True if the value is younger than stale_ttl
+        """
+        return self.age() <= self.stale_ttl
+
+    def _due(self) -> bool:
+        """
+        Check whether the value expired and the last failure (if any) is old enough to retry; caller holds the lock
+        :return: True if a fetch is due
+        """
+        return not self.is_fresh() and time.time() - self.failed_at >= self.retry_interval
+
+    def needs_refresh(self) -> bool:
+        """
+        Check whether a refresh should be started (value expired and none in flight)
+        :return: True if refresh_async would fetch
+        """
+        with self._lock:
+            return not self._refreshing and self._due()
+
+    def refresh(self) -> Optional[str]:
+        """
+        Fetch a new value now. If a refresh is already running, wait for it instead of fetching again.
+        :return: the cached value afterwards (None if nothing was ever fetched)
+        """
+        with self._lock:
+            if self._refreshing:
+                while self._refreshing:
+                    self._done.wait()
+                return self.value
+            self._refreshing = True
+        self._run_fetch()
+        return self.value
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for an in-flight refresh to finish without starting one
+        :param timeout: seconds to wait at most, None for no limit
+        :return: True if no refresh is running anymore
+        """
+        with self._lock:
+            return self._done.wait_for(lambda: not self._refreshing, timeout)
+
+    def refresh_async(self, callback: Optional[Callable[[], None]] = None) -> bool:
+        """
+        Start a background refresh unless one is already running or the value is still fresh
+        :param callback: called from the worker thread once the refresh finished, successful or not
+        :return: True if a refresh was started
+        """
+        with self._lock:
+            if self._refreshing or not self._due():
+                return False
+            self._refreshing = True
+
+        def worker() -> None:
+            self._run_fetch()
+            if callback:
+                callback()
+
+        if self.submit is not None:
+            self.submit(worker)
+        else:
+            threading.Thread(target=worker, daemon=True).start()
+        return True
+
+    def _run_fetch(self) -> None:
+        """
+        Call fetch and store its result; the caller must have set _refreshing
+        :return: None
+        """
+        try:
+            try:
+                value = self.fetch()
+            except Exception as err:
+                with self._lock:
+                    self.last_error = err
+                    self.failed_at = time.time()
+                    self.fetch_count += 1
+                return
+
+            with self._lock:
+                self.value = value
+                self.fetched_at = time.time()
+                self.last_error = None
+                self.failed_at = 0.0
+                self.fetch_count += 1
+            self._save_snapshot()  # still marked as refreshing, so wait() also covers the snapshot
+        finally:
+            # also after a BaseException (KeyboardInterrupt, SystemExit), or no refresh could ever start again
+            with self._lock:
+                self._refreshing = False
+                self._done.notify_all()
+
+    def _load_snapshot(self) -> None:
+        """
+        Restore the last value from disk, ignoring a missing or damaged file
+        :return: None
+        """
+        if not self.snapshot_path:
+            return
+        try:
+            with open(self.snapshot_path, encoding='utf-8') as fp:
+                snapshot = json.load(fp)
+            self.value = str(snapshot['value'])
+            self.fetched_at = float(snapshot['fetched_at'])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def _save_snapshot(self) -> None:
+        """
+        Write the current value to disk atomically (temp file + rename)
+        :return: None
+        """
+        if not self.snapshot_path:
+            return
+        with self._lock:
+            snapshot = {'value': self.value, 'fetched_at': self.fetched_at}
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as fp:
+                json.dump(snapshot, fp, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as err:
+            print(f"Weather snapshot could not be saved: {err}")
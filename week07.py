@@ -1,9 +1,12 @@
-import kiosk
+import catalog
+import order_core
 
 if __name__ == "__main__":
+    # first-run contents of the menu catalog; later changes go to the database (python -m catalog --help)
     menu_drinks = ["Ice Americano", "Cafe Latte", "Watermelon Juice", "Ice tea"]
     menu_prices = [2000, 3000, 4900, 3300]
 
-    menu = kiosk.Menu(menu_drinks, menu_prices)
-    order_process1or = kiosk.OrderProcessor(menu)    # has-a [aggregation]
+    catalog.seed_menu('queue_number.db', menu_drinks, menu_prices)
+    menu = catalog.load_menu('queue_number.db')
+    order_process1or = order_core.OrderProcessor(menu)    # has-a [aggregation]
     order_process1or.run()
\ No newline at end of file
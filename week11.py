@@ -1,10 +1,10 @@
-import requests
+import http_client
 
 # url = f"https://wttr.in/incheon?format=%C+%t"
 # url = f"https://kin.naver.com"
 # url = f"https://wttr.in/incheon?&n&Q"
 url = f"https://wttr.in/incheon?&0&Q"
-response = requests.get(url)
+response = http_client.get(url)
 # print(response)
 # print(response.status_code)
 if response.status_code == 200:
@@ -1,4 +1,5 @@
 import tkinter as tk
+from catalog import MenuCatalog, seed_menu
 from kiosk import KioskGUI
 
 if __name__ == "__main__":
@@ -9,9 +10,12 @@ if __name__ == "__main__":
     # else:
     #     print(f"상태 코드 : {response.status_code}")
 
+    # first-run contents of the menu catalog; later changes go to the database (python -m catalog --help)
+    # and show up on the running kiosk
     menu_drinks = ["Ice Americano", "Cafe Latte", "Watermelon Juice", "Ice tea"]
     menu_prices = [2000, 3000, 4900, 3500]
+    seed_menu('queue_number.db', menu_drinks, menu_prices)
 
     root = tk.Tk()
-    app = KioskGUI(root, menu_drinks, menu_prices)
+    app = KioskGUI(root, menu_drinks, menu_prices, catalog=MenuCatalog('queue_number.db'))
     root.mainloop()
\ No newline at end of file